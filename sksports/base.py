@@ -7,8 +7,10 @@
 import numpy as np
 import pandas as pd
 
-from .extraction import activity_power_profile
-from .io import bikeread
+from .extraction import activities_power_profile
+from .extraction import activity_fatigue_power_profile
+from .io import ActivityArchive
+from .io import bikeread_many
 from .utils import validate_filenames
 
 
@@ -22,7 +24,34 @@ class Rider(object):
     Parameters
     ----------
     n_jobs : int, (default=1)
-        The number of workers to use for the different processing.
+        The number of workers to use for the different processing. The
+        activities are read by ``n_jobs`` processes.
+
+    durations : str or array-like, optional
+        The durations for which the power-profile of each activity is computed
+        and stored. By default, all durations with a step of a second are
+        used. Refer to :func:`sksports.extraction.activity_power_profile` for
+        the available options.
+
+    interpolate : bool, default=False
+        Whether to linearly interpolate the power-profile computed for
+        ``durations`` on all durations with a step of a second before storing
+        it. Refer to :func:`sksports.extraction.activity_power_profile`.
+
+    dtype : str or dtype, optional
+        The floating dtype used to read the activities and store the
+        power-profile (e.g. ``np.float32`` to halve the memory). By default,
+        ``np.float64`` is used.
+
+    work_thresholds : array-like, optional
+        The work, in kJ, after which the fatigue power-profile of each activity
+        is computed. By default, the fatigue power-profile is not computed.
+        Refer to :func:`sksports.extraction.activity_fatigue_power_profile`.
+
+    max_gap : Timedelta, timedelta, np.timedelta64, int, or str, optional
+        The gaps longer than ``max_gap`` in the activities (e.g. auto-pause)
+        are not filled when reading the activities and the power-profile is
+        not computed across them. By default, the gaps are filled.
 
     Attributes
     ----------
@@ -30,11 +59,23 @@ class Rider(object):
         DataFrame containing all information regarding the power-profile of a
         rider for each ride.
 
+    fatigue_power_profile_ : DataFrame
+        DataFrame containing the power-profile indexed by the work threshold
+        and the duration for each ride. It is None if ``work_thresholds`` is
+        None.
+
     """
 
-    def __init__(self, n_jobs=1):
+    def __init__(self, n_jobs=1, durations=None, dtype=None,
+                 work_thresholds=None, max_gap=None, interpolate=False):
         self.n_jobs = n_jobs
+        self.durations = durations
+        self.dtype = dtype
+        self.work_thresholds = work_thresholds
+        self.max_gap = max_gap
+        self.interpolate = interpolate
         self.power_profile_ = None
+        self.fatigue_power_profile_ = None
 
     def add_activities(self, filenames):
         """Compute the power-profile for each activity and add it to the
@@ -42,9 +83,11 @@ class Rider(object):
 
         Parameters
         ----------
-        filenames : str or list of str
+        filenames : str, list of str, or ActivityArchive
             A string a list of string to the file to read. You can use
-            wildcards to automatically check several files.
+            wildcards to automatically check several files. The activities of
+            an :class:`sksports.io.ActivityArchive` are added without reading
+            the original files.
 
         Returns
         -------
@@ -65,9 +108,18 @@ class Rider(object):
                 00:00:05            64.400000
 
         """
-        filenames = validate_filenames(filenames)
-        activities_pp = [activity_power_profile(bikeread(f))
-                         for f in filenames]
+        if isinstance(filenames, ActivityArchive):
+            activities = [activity if self.dtype is None
+                          else activity.astype(self.dtype, copy=False)
+                          for activity in filenames]
+        else:
+            filenames = validate_filenames(filenames)
+            activities = [activity for _, activity in bikeread_many(
+                filenames, n_jobs=self.n_jobs, dtype=self.dtype,
+                max_gap=self.max_gap)]
+        activities_pp = activities_power_profile(
+            activities, durations=self.durations,
+            interpolate=self.interpolate, max_gap=self.max_gap)
         activities_pp = pd.concat(activities_pp, axis=1)
 
         if self.power_profile_ is not None:
@@ -84,6 +136,19 @@ class Rider(object):
         else:
             self.power_profile_ = activities_pp
 
+        if self.work_thresholds is not None:
+            activities_fpp = pd.concat(
+                [activity_fatigue_power_profile(
+                    activity, self.work_thresholds, durations=self.durations,
+                    max_gap=self.max_gap)
+                 for activity in activities], axis=1)
+            if self.fatigue_power_profile_ is not None:
+                self.fatigue_power_profile_ = \
+                    self.fatigue_power_profile_.join(activities_fpp,
+                                                     how='outer')
+            else:
+                self.fatigue_power_profile_ = activities_fpp
+
     def delete_activities(self, dates, time_comparison=False):
         """Delete the activities power-profile from some specific dates.
 
@@ -152,6 +217,10 @@ class Rider(object):
 
         mask_date = np.bitwise_not(mask_date)
         self.power_profile_ = self.power_profile_.loc[:, mask_date]
+        if self.fatigue_power_profile_ is not None:
+            self.fatigue_power_profile_ = self.fatigue_power_profile_.loc[
+                :, self.fatigue_power_profile_.columns.isin(
+                    self.power_profile_.columns)]
 
     def record_power_profile(self, range_dates=None, columns=None):
         """Compute the record power-profile.
@@ -227,7 +296,8 @@ class Rider(object):
         return pd.DataFrame(rpp)
 
     @classmethod
-    def from_csv(cls, filename, n_jobs=1):
+    def from_csv(cls, filename, n_jobs=1, durations=None, dtype=None,
+                 work_thresholds=None, max_gap=None, interpolate=False):
         """Load rider information from a CSV file.
 
         Parameters
@@ -238,6 +308,28 @@ class Rider(object):
         n_jobs : int, (default=1)
             The number of workers to use for the different processing.
 
+        durations : str or array-like, optional
+            The durations for which the power-profile of the activities added
+            later on will be computed. By default, all durations with a step
+            of a second are used.
+
+        dtype : str or dtype, optional
+            The floating dtype used to store the power-profile. By default,
+            ``np.float64`` is used.
+
+        work_thresholds : array-like, optional
+            The work, in kJ, after which the fatigue power-profile of the
+            activities added later on will be computed. By default, the
+            fatigue power-profile is not computed.
+
+        max_gap : Timedelta, timedelta, np.timedelta64, int, or str, optional
+            The gaps longer than ``max_gap`` in the activities added later on
+            are not filled. By default, the gaps are filled.
+
+        interpolate : bool, default=False
+            Whether the power-profile of the activities added later on will
+            be interpolated on all durations with a step of a second.
+
         Returns
         -------
         rider : sksports.Rider
@@ -267,12 +359,16 @@ class Rider(object):
 
         """
         df = pd.read_csv(filename, index_col=[0, 1])
+        if dtype is not None:
+            df = df.astype(dtype)
         df.columns = pd.to_datetime(df.columns)
         df.index = pd.MultiIndex(levels=[df.index.levels[0],
                                          pd.to_timedelta(df.index.levels[1])],
                                  labels=df.index.labels,
                                  name=[None, None])
-        rider = cls(n_jobs=n_jobs)
+        rider = cls(n_jobs=n_jobs, durations=durations, dtype=dtype,
+                    work_thresholds=work_thresholds, max_gap=max_gap,
+                    interpolate=interpolate)
         rider.power_profile_ = df
         return rider
 
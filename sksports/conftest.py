@@ -0,0 +1,10 @@
+# Authors: Guillaume Lemaitre <g.lemaitre58@gmail.com>
+#          Cedric Lemaitre
+# License: MIT
+
+# the Numba kernels are an optional backend which cannot be imported when
+# numba is not installed
+try:
+    import numba  # noqa
+except ImportError:
+    collect_ignore = ['extraction/_power_profile_numba.py']
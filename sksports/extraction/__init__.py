@@ -13,10 +13,27 @@ from .gradient import gradient_elevation
 from .gradient import gradient_heart_rate
 
 from .power_profile import activity_power_profile
+from .power_profile import activities_power_profile
+from .power_profile import activity_fatigue_power_profile
+from .power_profile import activity_best_efforts
+from .power_profile import IncrementalPowerProfile
+
+from .backend import available_backends
+from .backend import get_backend
+from .backend import register_backend
+from .backend import select_backend
 
 
 __all__ = ['acceleration',
            'gradient_activity',
            'gradient_elevation',
            'gradient_heart_rate',
-           'activity_power_profile']
+           'activity_power_profile',
+           'activities_power_profile',
+           'activity_fatigue_power_profile',
+           'activity_best_efforts',
+           'IncrementalPowerProfile',
+           'available_backends',
+           'get_backend',
+           'register_backend',
+           'select_backend']
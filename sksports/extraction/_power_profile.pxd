@@ -9,6 +9,60 @@ cpdef (double, Py_ssize_t) max_mean_power_interval(
     floating[:] activity_power, Py_ssize_t time_interval) nogil
 
 
+cpdef _cumulative_sum(floating[:] data)
+
+
+cpdef (double, Py_ssize_t) max_mean_power_interval_cumsum(
+    double[:] cumsum, double[:] compensation, Py_ssize_t[:] n_missing,
+    Py_ssize_t time_interval) nogil
+
+
+cpdef max_mean_power_curve(floating[:] activity_power,
+                           Py_ssize_t[:] durations, bint pruned=*,
+                           bint clip=*)
+
+
+cpdef max_mean_power_curve_batch(floating[:] activity_power,
+                                 Py_ssize_t[:] offsets,
+                                 Py_ssize_t[:] durations,
+                                 Py_ssize_t[:] durations_offsets,
+                                 bint pruned=*, unsigned char[:] clip=*)
+
+
+cpdef max_mean_power_curve_work(floating[:] activity_power,
+                                double[:] work_thresholds,
+                                Py_ssize_t[:] durations, bint pruned=*,
+                                bint clip=*)
+
+
+cpdef max_mean_power_top_k(floating[:] activity_power,
+                           Py_ssize_t[:] durations, Py_ssize_t n_efforts)
+
+
+cpdef _update_max_mean_power_curve(floating[:] activity_power,
+                                   double[:] cumsum, double[:] compensation,
+                                   Py_ssize_t[:] n_missing,
+                                   Py_ssize_t n_element, double[:] max_sum,
+                                   Py_ssize_t[:] max_sum_idx)
+
+
+cpdef _update_max_mean_power_curve_chunk(floating[:] activity_power,
+                                         double[:] cumsum,
+                                         double[:] compensation,
+                                         Py_ssize_t[:] n_missing,
+                                         Py_ssize_t n_starts,
+                                         Py_ssize_t offset,
+                                         Py_ssize_t[:] durations,
+                                         double[:] max_sum,
+                                         Py_ssize_t[:] max_sum_idx,
+                                         bint pruned=*, bint clip=*)
+
+
 cpdef _associated_data_power_profile(floating[:] data,
                                      integral[:] pp_index,
                                      integral[:] duration)
+
+
+cpdef _associated_data_power_profile_2d(floating[:, :] data,
+                                        Py_ssize_t[:] pp_index,
+                                        Py_ssize_t[:] duration)
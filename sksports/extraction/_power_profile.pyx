@@ -8,10 +8,28 @@
 # License: MIT
 
 from cython.parallel import parallel, prange
+from libc.float cimport DBL_EPSILON
+from libc.math cimport fabs, sqrt, INFINITY, NAN
 from libc.stdlib cimport malloc, free
 cimport openmp
 import numpy as np
 
+# minimum number of samples in a block when bounding the window sums
+DEF MIN_BLOCK_SIZE = 16
+
+
+cdef struct BlockBounds:
+    # extrema of the detrended cumulative sum and of its compensation term for
+    # consecutive blocks of ``block_size`` elements
+    Py_ssize_t block_size
+    Py_ssize_t n_blocks
+    double trend
+    double margin
+    double* max_cumsum
+    double* min_cumsum
+    double* max_compensation
+    double* min_compensation
+
 
 cpdef (double, Py_ssize_t) max_mean_power_interval(
     floating[:] activity_power, Py_ssize_t time_interval) nogil:
@@ -57,6 +75,941 @@ cpdef (double, Py_ssize_t) max_mean_power_interval(
     return max_mean / time_interval, idx_max_mean
 
 
+cpdef _cumulative_sum(floating[:] data):
+    """Compute the compensated cumulative sum of some data.
+
+    The running sum is computed using the Kahan-Babuska-Neumaier summation.
+    The compensation term is stored next to the cumulative sum such that the
+    sum over any window can be recovered without losing precision, even for
+    long activities. Missing values are accounted as zeros and counted
+    separately.
+
+    Parameters
+    ----------
+    data : ndarray, shape (n_samples,)
+        The data to sum.
+
+    Returns
+    -------
+    cumsum : ndarray, shape (n_samples + 1,)
+        The cumulative sum with ``cumsum[0] = 0``.
+
+    compensation : ndarray, shape (n_samples + 1,)
+        The cumulative compensation term of the summation.
+
+    n_missing : ndarray, shape (n_samples + 1,)
+        The cumulative count of missing values.
+
+    """
+    cdef:
+        Py_ssize_t n_element = data.shape[0]
+        double[:] cumsum = np.empty((n_element + 1,))
+        double[:] compensation = np.empty((n_element + 1,))
+        Py_ssize_t[:] n_missing = np.empty((n_element + 1,), dtype=np.intp)
+
+    with nogil:
+        _compensated_cumsum(data, &cumsum[0], &compensation[0],
+                            &n_missing[0])
+
+    return np.asarray(cumsum), np.asarray(compensation), np.asarray(n_missing)
+
+
+cdef void _compensated_cumsum(floating[:] data, double* cumsum,
+                              double* compensation,
+                              Py_ssize_t* n_missing) nogil:
+    cumsum[0] = 0.0
+    compensation[0] = 0.0
+    n_missing[0] = 0
+    _extend_compensated_cumsum(data, cumsum, compensation, n_missing)
+
+
+cdef void _extend_compensated_cumsum(floating[:] data, double* cumsum,
+                                     double* compensation,
+                                     Py_ssize_t* n_missing) nogil:
+    # the summation continues from the state stored in the first elements
+    cdef:
+        Py_ssize_t idx_element
+        double acc = cumsum[0], comp = compensation[0], value, tmp
+        Py_ssize_t missing = n_missing[0]
+
+    for idx_element in range(data.shape[0]):
+        value = data[idx_element]
+        if value != value:
+            # NaN are not summed but a window containing them is invalid
+            missing = missing + 1
+            value = 0.0
+        tmp = acc + value
+        if fabs(acc) >= fabs(value):
+            comp = comp + ((acc - tmp) + value)
+        else:
+            comp = comp + ((value - tmp) + acc)
+        acc = tmp
+        cumsum[idx_element + 1] = acc
+        compensation[idx_element + 1] = comp
+        n_missing[idx_element + 1] = missing
+
+
+cdef inline double _window_sum(double* cumsum, double* compensation,
+                               Py_ssize_t start, Py_ssize_t end) nogil:
+    return ((cumsum[end] - cumsum[start]) +
+            (compensation[end] - compensation[start]))
+
+
+cdef (double, Py_ssize_t) _max_mean_cumsum(
+    double* cumsum, double* compensation, Py_ssize_t* n_missing,
+    Py_ssize_t n_element, Py_ssize_t time_interval, bint clip=True) nogil:
+    cdef:
+        double max_sum
+        Py_ssize_t idx_max_sum
+
+    max_sum, idx_max_sum = _max_sum_cumsum(
+        cumsum, compensation, n_missing, n_element, time_interval, clip)
+    if idx_max_sum < 0:
+        return NAN, idx_max_sum
+    return max_sum / time_interval, idx_max_sum
+
+
+cdef (double, Py_ssize_t) _max_sum_cumsum(
+    double* cumsum, double* compensation, Py_ssize_t* n_missing,
+    Py_ssize_t n_element, Py_ssize_t time_interval, bint clip=True) nogil:
+    # Without clipping, the maximum is the one of the valid windows, even if
+    # negative, and its index is -1 if there is no valid window.
+    cdef:
+        Py_ssize_t idx_element, idx_max_sum = 0 if clip else -1
+        double acc, max_sum = 0.0 if clip else -INFINITY
+
+    for idx_element in range(n_element - time_interval):
+        if (n_missing[idx_element + time_interval] !=
+                n_missing[idx_element]):
+            continue
+        acc = _window_sum(cumsum, compensation, idx_element,
+                          idx_element + time_interval)
+        if acc > max_sum:
+            max_sum = acc
+            idx_max_sum = idx_element
+
+    return max_sum, idx_max_sum
+
+
+cpdef (double, Py_ssize_t) max_mean_power_interval_cumsum(
+    double[:] cumsum, double[:] compensation, Py_ssize_t[:] n_missing,
+    Py_ssize_t time_interval) nogil:
+    """Compute the maximum power delivered for a specific amount of time.
+
+    The power for each window is obtained from the cumulative sum of the power
+    such that the cost is linear with the number of samples and independent of
+    ``time_interval``.
+
+    Parameters
+    ----------
+    cumsum : ndarray, shape (n_samples + 1,)
+        The cumulative sum of the power computed with :func:`_cumulative_sum`.
+
+    compensation : ndarray, shape (n_samples + 1,)
+        The compensation term computed with :func:`_cumulative_sum`.
+
+    n_missing : ndarray, shape (n_samples + 1,)
+        The cumulative count of missing values computed with
+        :func:`_cumulative_sum`.
+
+    time_interval : int
+        The time interval for which we compute the mean power.
+
+    Returns
+    -------
+    max_mean : double
+        The maximum power delivered for a specific amount of time.
+
+    idx_max_mean : int
+        The index of the beginning of the window.
+
+    """
+    return _max_mean_cumsum(&cumsum[0], &compensation[0], &n_missing[0],
+                            cumsum.shape[0] - 1, time_interval)
+
+
+cdef inline Py_ssize_t _block_size(Py_ssize_t n_element) nogil:
+    return max(<Py_ssize_t>sqrt(n_element), MIN_BLOCK_SIZE)
+
+
+cdef inline Py_ssize_t _n_blocks(Py_ssize_t n_element) nogil:
+    return n_element // _block_size(n_element) + 1
+
+
+cdef void _block_bounds(double* cumsum, double* compensation,
+                        Py_ssize_t n_element, double* buffer,
+                        BlockBounds* bounds) nogil:
+    # ``buffer`` should be able to store ``4 * _n_blocks(n_element)`` values
+    cdef:
+        Py_ssize_t idx_block, idx_element, start, end
+        double detrended, magnitude = 0.0
+
+    bounds.block_size = _block_size(n_element)
+    bounds.n_blocks = _n_blocks(n_element)
+    bounds.max_cumsum = buffer
+    bounds.min_cumsum = buffer + bounds.n_blocks
+    bounds.max_compensation = buffer + 2 * bounds.n_blocks
+    bounds.min_compensation = buffer + 3 * bounds.n_blocks
+
+    # remove the average power from the cumulative sum such that the extrema
+    # only reflect the variations of power within a block
+    bounds.trend = ((cumsum[n_element] - cumsum[0]) / n_element
+                    if n_element > 0 else 0.0)
+    for idx_block in range(bounds.n_blocks):
+        start = idx_block * bounds.block_size
+        end = min(start + bounds.block_size, n_element + 1)
+        bounds.max_cumsum[idx_block] = cumsum[start] - bounds.trend * start
+        bounds.min_cumsum[idx_block] = bounds.max_cumsum[idx_block]
+        bounds.max_compensation[idx_block] = compensation[start]
+        bounds.min_compensation[idx_block] = compensation[start]
+        for idx_element in range(start, end):
+            detrended = cumsum[idx_element] - bounds.trend * idx_element
+            if detrended > bounds.max_cumsum[idx_block]:
+                bounds.max_cumsum[idx_block] = detrended
+            if detrended < bounds.min_cumsum[idx_block]:
+                bounds.min_cumsum[idx_block] = detrended
+            if compensation[idx_element] > bounds.max_compensation[idx_block]:
+                bounds.max_compensation[idx_block] = compensation[idx_element]
+            if compensation[idx_element] < bounds.min_compensation[idx_block]:
+                bounds.min_compensation[idx_block] = compensation[idx_element]
+            magnitude = max(magnitude, fabs(cumsum[idx_element]) +
+                            fabs(bounds.trend * idx_element) +
+                            fabs(compensation[idx_element]))
+    # the rounding errors of the detrending and of the window sums are
+    # covered by a margin proportional to the largest magnitude involved
+    bounds.margin = 32 * DBL_EPSILON * magnitude
+
+
+cdef inline double _window_sum_bound(BlockBounds* bounds, Py_ssize_t idx_block,
+                                     Py_ssize_t n_windows,
+                                     Py_ssize_t time_interval) nogil:
+    # Upper bound of the sum of the windows starting in a block. The windows
+    # end in at most two consecutive blocks.
+    cdef:
+        Py_ssize_t first_end, last_end
+        double max_cumsum, max_compensation
+
+    first_end = (idx_block * bounds.block_size + time_interval) // \
+        bounds.block_size
+    last_end = (min((idx_block + 1) * bounds.block_size, n_windows) - 1 +
+                time_interval) // bounds.block_size
+    max_cumsum = max(bounds.max_cumsum[first_end],
+                     bounds.max_cumsum[last_end])
+    max_compensation = max(bounds.max_compensation[first_end],
+                           bounds.max_compensation[last_end])
+    return ((max_cumsum - bounds.min_cumsum[idx_block]) +
+            bounds.trend * time_interval +
+            (max_compensation - bounds.min_compensation[idx_block]) +
+            bounds.margin)
+
+
+cdef (double, Py_ssize_t) _max_mean_cumsum_pruned(
+    double* cumsum, double* compensation, Py_ssize_t* n_missing,
+    Py_ssize_t n_element, Py_ssize_t time_interval,
+    BlockBounds* bounds, bint clip=True) nogil:
+    cdef:
+        double max_sum
+        Py_ssize_t idx_max_sum
+
+    max_sum, idx_max_sum = _max_sum_cumsum_pruned(
+        cumsum, compensation, n_missing, n_element, time_interval, bounds,
+        clip)
+    if idx_max_sum < 0:
+        return NAN, idx_max_sum
+    return max_sum / time_interval, idx_max_sum
+
+
+cdef (double, Py_ssize_t) _max_sum_cumsum_pruned(
+    double* cumsum, double* compensation, Py_ssize_t* n_missing,
+    Py_ssize_t n_element, Py_ssize_t time_interval,
+    BlockBounds* bounds, bint clip=True) nogil:
+    cdef:
+        Py_ssize_t n_windows = n_element - time_interval
+        Py_ssize_t n_blocks, idx_block, best_block = 0
+        Py_ssize_t idx_element, end, idx_max_sum = 0 if clip else -1
+        Py_ssize_t k
+        double acc, bound, max_sum = 0.0 if clip else -INFINITY
+        double max_bound = -INFINITY
+
+    if n_windows <= 0:
+        return max_sum, idx_max_sum
+    n_blocks = (n_windows - 1) // bounds.block_size + 1
+
+    # start with the most promising block to get a tight lower bound early
+    for idx_block in range(n_blocks):
+        bound = _window_sum_bound(bounds, idx_block, n_windows, time_interval)
+        if bound > max_bound:
+            max_bound = bound
+            best_block = idx_block
+
+    for k in range(-1, n_blocks):
+        if k == -1:
+            idx_block = best_block
+        elif k == best_block:
+            continue
+        else:
+            idx_block = k
+        idx_element = idx_block * bounds.block_size
+        bound = _window_sum_bound(bounds, idx_block, n_windows, time_interval)
+        # the windows of the block cannot be better than the current maximum:
+        # in case of equality, only the earliest window is kept.
+        if bound < max_sum or (bound == max_sum and
+                                idx_element > idx_max_sum):
+            continue
+        end = min(idx_element + bounds.block_size, n_windows)
+        for idx_element in range(idx_element, end):
+            if (n_missing[idx_element + time_interval] !=
+                    n_missing[idx_element]):
+                continue
+            acc = _window_sum(cumsum, compensation, idx_element,
+                              idx_element + time_interval)
+            if acc > max_sum or (acc == max_sum and
+                                  idx_element < idx_max_sum):
+                max_sum = acc
+                idx_max_sum = idx_element
+
+    return max_sum, idx_max_sum
+
+
+cpdef max_mean_power_curve(floating[:] activity_power,
+                           Py_ssize_t[:] durations, bint pruned=False,
+                           bint clip=True):
+    """Compute the maximum mean power for several durations at once.
+
+    The cumulative sum of the power is computed once and shared by all
+    durations which are processed in parallel.
+
+    Parameters
+    ----------
+    activity_power : ndarray, shape (n_samples,)
+        The power data of the activity.
+
+    durations : ndarray, shape (n_durations,)
+        The time intervals for which we compute the mean power.
+
+    pruned : bool, default=False
+        Whether to skip the blocks of windows for which an upper bound of the
+        sum, derived from the extrema of the cumulative sum, shows that they
+        cannot contain the maximum. The results are identical to the ones
+        obtained without pruning.
+
+    clip : bool, default=True
+        Whether the maximum is initialized to zero, as for the power, such
+        that it is never negative. Otherwise, the maximum can be negative and
+        it is NaN, with an index of -1, if no window is free of missing
+        values.
+
+    Returns
+    -------
+    power_profile : ndarray, shape (n_durations,)
+        The maximum mean power for each duration, with the same dtype as
+        ``activity_power``.
+
+    power_profile_idx : ndarray, shape (n_durations,)
+        The index of the beginning of the window for each duration.
+
+    """
+    cdef:
+        Py_ssize_t n_element = activity_power.shape[0]
+        Py_ssize_t n_durations = durations.shape[0]
+        Py_ssize_t idx_duration
+        floating[:] power_profile
+        Py_ssize_t[:] power_profile_idx = np.zeros((n_durations,),
+                                                   dtype=np.intp)
+        double* cumsum
+        double* compensation
+        Py_ssize_t* n_missing
+        double* bounds_buffer
+        BlockBounds bounds
+
+    # the power-profile has the same dtype as the power while the sums are
+    # accumulated in double precision
+    if floating is float:
+        power_profile = np.zeros((n_durations,), dtype=np.float32)
+    else:
+        power_profile = np.zeros((n_durations,), dtype=np.float64)
+
+    with nogil:
+        # a single scratch buffer is shared by all durations
+        cumsum = <double*>malloc((n_element + 1) *
+                                 (2 * sizeof(double) + sizeof(Py_ssize_t)))
+        compensation = cumsum + n_element + 1
+        n_missing = <Py_ssize_t*>(compensation + n_element + 1)
+        _compensated_cumsum(activity_power, cumsum, compensation, n_missing)
+
+        if pruned:
+            bounds_buffer = <double*>malloc(4 * _n_blocks(n_element) *
+                                            sizeof(double))
+            _block_bounds(cumsum, compensation, n_element, bounds_buffer,
+                          &bounds)
+            for idx_duration in prange(n_durations, schedule='dynamic'):
+                (power_profile[idx_duration],
+                 power_profile_idx[idx_duration]) = _max_mean_cumsum_pruned(
+                     cumsum, compensation, n_missing, n_element,
+                     durations[idx_duration], &bounds, clip)
+            free(bounds_buffer)
+        else:
+            for idx_duration in prange(n_durations, schedule='dynamic'):
+                (power_profile[idx_duration],
+                 power_profile_idx[idx_duration]) = _max_mean_cumsum(
+                     cumsum, compensation, n_missing, n_element,
+                     durations[idx_duration], clip)
+        free(cumsum)
+
+    return np.asarray(power_profile), np.asarray(power_profile_idx)
+
+
+cpdef max_mean_power_curve_batch(floating[:] activity_power,
+                                 Py_ssize_t[:] offsets,
+                                 Py_ssize_t[:] durations,
+                                 Py_ssize_t[:] durations_offsets,
+                                 bint pruned=False,
+                                 unsigned char[:] clip=None):
+    """Compute the maximum mean power curves of several activities at once.
+
+    The activities are concatenated and the work is scheduled over all pairs
+    of (activity, duration) such that short activities do not leave the
+    threads idle.
+
+    Parameters
+    ----------
+    activity_power : ndarray, shape (n_samples,)
+        The concatenated power data of the activities.
+
+    offsets : ndarray, shape (n_activities + 1,)
+        The power of the i-th activity is
+        ``activity_power[offsets[i]:offsets[i + 1]]``.
+
+    durations : ndarray, shape (n_durations,)
+        The concatenated time intervals for which we compute the mean power.
+
+    durations_offsets : ndarray, shape (n_activities + 1,)
+        The time intervals of the i-th activity are
+        ``durations[durations_offsets[i]:durations_offsets[i + 1]]``.
+
+    pruned : bool, default=False
+        Whether to skip the blocks of windows which cannot contain the
+        maximum. Refer to :func:`max_mean_power_curve`.
+
+    clip : ndarray of bool, shape (n_activities,), optional
+        Whether the maximum of each activity is never negative. Refer to
+        :func:`max_mean_power_curve`. By default, all the maxima are clipped.
+
+    Returns
+    -------
+    power_profile : ndarray, shape (n_durations,)
+        The maximum mean power for each activity and duration, with the same
+        dtype as ``activity_power``.
+
+    power_profile_idx : ndarray, shape (n_durations,)
+        The index of the beginning of the window for each activity and
+        duration, relative to the beginning of the activity.
+
+    """
+    cdef:
+        Py_ssize_t n_activities = offsets.shape[0] - 1
+        Py_ssize_t n_element = activity_power.shape[0]
+        Py_ssize_t n_durations = durations.shape[0]
+        Py_ssize_t idx_activity, idx_duration, start, low, high, middle
+        floating[:] power_profile
+        Py_ssize_t[:] power_profile_idx = np.zeros((n_durations,),
+                                                   dtype=np.intp)
+        Py_ssize_t[:] bounds_offsets = np.zeros((n_activities + 1,),
+                                                dtype=np.intp)
+        double* cumsum
+        double* compensation
+        Py_ssize_t* n_missing
+        double* bounds_buffer = NULL
+        BlockBounds* bounds = NULL
+
+    if floating is float:
+        power_profile = np.zeros((n_durations,), dtype=np.float32)
+    else:
+        power_profile = np.zeros((n_durations,), dtype=np.float64)
+    if clip is None:
+        clip = np.ones((n_activities,), dtype=np.uint8)
+
+    with nogil:
+        # the cumulative sum of each activity starts with an additional zero
+        cumsum = <double*>malloc((n_element + n_activities) *
+                                 (2 * sizeof(double) + sizeof(Py_ssize_t)))
+        compensation = cumsum + n_element + n_activities
+        n_missing = <Py_ssize_t*>(compensation + n_element + n_activities)
+        if pruned:
+            for idx_activity in range(n_activities):
+                bounds_offsets[idx_activity + 1] = (
+                    bounds_offsets[idx_activity] + 4 * _n_blocks(
+                        offsets[idx_activity + 1] - offsets[idx_activity]))
+            bounds_buffer = <double*>malloc(bounds_offsets[n_activities] *
+                                            sizeof(double))
+            bounds = <BlockBounds*>malloc(n_activities * sizeof(BlockBounds))
+
+        for idx_activity in prange(n_activities, schedule='dynamic'):
+            start = offsets[idx_activity] + idx_activity
+            _compensated_cumsum(
+                activity_power[offsets[idx_activity]:
+                               offsets[idx_activity + 1]],
+                cumsum + start, compensation + start, n_missing + start)
+            if pruned:
+                _block_bounds(
+                    cumsum + start, compensation + start,
+                    offsets[idx_activity + 1] - offsets[idx_activity],
+                    bounds_buffer + bounds_offsets[idx_activity],
+                    bounds + idx_activity)
+
+        for idx_duration in prange(n_durations, schedule='dynamic'):
+            # find the activity of the duration with a binary search
+            low = 0
+            high = n_activities
+            while high - low > 1:
+                middle = (low + high) // 2
+                if durations_offsets[middle] <= idx_duration:
+                    low = middle
+                else:
+                    high = middle
+            start = offsets[low] + low
+            if pruned:
+                (power_profile[idx_duration],
+                 power_profile_idx[idx_duration]) = _max_mean_cumsum_pruned(
+                     cumsum + start, compensation + start, n_missing + start,
+                     offsets[low + 1] - offsets[low], durations[idx_duration],
+                     bounds + low, clip[low])
+            else:
+                (power_profile[idx_duration],
+                 power_profile_idx[idx_duration]) = _max_mean_cumsum(
+                     cumsum + start, compensation + start, n_missing + start,
+                     offsets[low + 1] - offsets[low], durations[idx_duration],
+                     clip[low])
+
+        free(cumsum)
+        free(bounds_buffer)
+        free(bounds)
+
+    return np.asarray(power_profile), np.asarray(power_profile_idx)
+
+
+cpdef max_mean_power_curve_work(floating[:] activity_power,
+                                double[:] work_thresholds,
+                                Py_ssize_t[:] durations, bint pruned=False,
+                                bint clip=True):
+    """Compute the maximum mean power curves after some amount of work.
+
+    For each threshold, only the windows starting once the accumulated work
+    reaches the threshold are considered. The cumulative sum of the power is
+    computed once and is used both to find the start of each curve and to
+    compute the window sums. The work is scheduled over all pairs of
+    (threshold, duration).
+
+    Parameters
+    ----------
+    activity_power : ndarray, shape (n_samples,)
+        The power data of the activity, sampled at 1 Hz.
+
+    work_thresholds : ndarray, shape (n_thresholds,)
+        The amount of work, in Joules, done before the windows start.
+
+    durations : ndarray, shape (n_durations,)
+        The time intervals for which we compute the mean power.
+
+    pruned : bool, default=False
+        Whether to skip the blocks of windows which cannot contain the
+        maximum. Refer to :func:`max_mean_power_curve`.
+
+    clip : bool, default=True
+        Whether the maximum is never negative. Refer to
+        :func:`max_mean_power_curve`.
+
+    Returns
+    -------
+    power_profile : ndarray, shape (n_thresholds, n_durations)
+        The maximum mean power for each threshold and duration, with the same
+        dtype as ``activity_power``.
+
+    power_profile_idx : ndarray, shape (n_thresholds, n_durations)
+        The index of the beginning of the window for each threshold and
+        duration, or -1 without any valid window if ``clip`` is False.
+
+    work_idx : ndarray, shape (n_thresholds,)
+        The index of the first sample for which the work done before is at
+        least the threshold. It is ``n_samples`` if the threshold is never
+        reached.
+
+    """
+    cdef:
+        Py_ssize_t n_element = activity_power.shape[0]
+        Py_ssize_t n_thresholds = work_thresholds.shape[0]
+        Py_ssize_t n_durations = durations.shape[0]
+        Py_ssize_t idx_threshold, idx_duration, idx_pair, start
+        floating[:, :] power_profile
+        Py_ssize_t[:, :] power_profile_idx = np.zeros(
+            (n_thresholds, n_durations), dtype=np.intp)
+        Py_ssize_t[:] work_idx = np.zeros((n_thresholds,), dtype=np.intp)
+        Py_ssize_t[:] bounds_offsets = np.zeros((n_thresholds + 1,),
+                                                dtype=np.intp)
+        double* cumsum
+        double* compensation
+        Py_ssize_t* n_missing
+        double* bounds_buffer = NULL
+        BlockBounds* bounds = NULL
+
+    if floating is float:
+        power_profile = np.zeros((n_thresholds, n_durations),
+                                 dtype=np.float32)
+    else:
+        power_profile = np.zeros((n_thresholds, n_durations),
+                                 dtype=np.float64)
+
+    with nogil:
+        cumsum = <double*>malloc((n_element + 1) *
+                                 (2 * sizeof(double) + sizeof(Py_ssize_t)))
+        compensation = cumsum + n_element + 1
+        n_missing = <Py_ssize_t*>(compensation + n_element + 1)
+        _compensated_cumsum(activity_power, cumsum, compensation, n_missing)
+
+        # the work done before the i-th sample is the i-th cumulative sum
+        for idx_threshold in range(n_thresholds):
+            start = 0
+            while (start < n_element and
+                   cumsum[start] + compensation[start] <
+                   work_thresholds[idx_threshold]):
+                start = start + 1
+            work_idx[idx_threshold] = start
+            bounds_offsets[idx_threshold + 1] = (
+                bounds_offsets[idx_threshold] +
+                4 * _n_blocks(n_element - start))
+
+        if pruned:
+            bounds_buffer = <double*>malloc(bounds_offsets[n_thresholds] *
+                                            sizeof(double))
+            bounds = <BlockBounds*>malloc(n_thresholds * sizeof(BlockBounds))
+            for idx_threshold in prange(n_thresholds, schedule='dynamic'):
+                start = work_idx[idx_threshold]
+                _block_bounds(cumsum + start, compensation + start,
+                              n_element - start,
+                              bounds_buffer + bounds_offsets[idx_threshold],
+                              bounds + idx_threshold)
+
+        for idx_pair in prange(n_thresholds * n_durations,
+                               schedule='dynamic'):
+            idx_threshold = idx_pair // n_durations
+            idx_duration = idx_pair % n_durations
+            start = work_idx[idx_threshold]
+            if pruned:
+                (power_profile[idx_threshold, idx_duration],
+                 power_profile_idx[idx_threshold, idx_duration]) = \
+                    _max_mean_cumsum_pruned(
+                        cumsum + start, compensation + start,
+                        n_missing + start, n_element - start,
+                        durations[idx_duration], bounds + idx_threshold,
+                        clip)
+            else:
+                (power_profile[idx_threshold, idx_duration],
+                 power_profile_idx[idx_threshold, idx_duration]) = \
+                    _max_mean_cumsum(
+                        cumsum + start, compensation + start,
+                        n_missing + start, n_element - start,
+                        durations[idx_duration], clip)
+            if power_profile_idx[idx_threshold, idx_duration] >= 0:
+                power_profile_idx[idx_threshold, idx_duration] = \
+                    power_profile_idx[idx_threshold, idx_duration] + start
+
+        free(cumsum)
+        free(bounds_buffer)
+        free(bounds)
+
+    return (np.asarray(power_profile), np.asarray(power_profile_idx),
+            np.asarray(work_idx))
+
+
+cdef void _top_k_max_sum(double* cumsum, double* compensation,
+                         Py_ssize_t* n_missing, Py_ssize_t n_element,
+                         Py_ssize_t time_interval, Py_ssize_t n_efforts,
+                         double* max_sum, Py_ssize_t* max_sum_idx,
+                         Py_ssize_t* starts) nogil:
+    # ``starts`` is a scratch buffer of ``n_efforts`` elements storing the
+    # sorted starts of the efforts already selected
+    cdef:
+        Py_ssize_t n_windows = n_element - time_interval
+        Py_ssize_t idx_effort, idx_start, idx_element, n_starts = 0
+        Py_ssize_t idx_best
+        double acc, best
+
+    for idx_effort in range(n_efforts):
+        best = -INFINITY
+        idx_best = -1
+        idx_start = 0
+        idx_element = 0
+        while idx_element < n_windows:
+            # jump over the windows overlapping an effort already selected
+            if (idx_start < n_starts and
+                    idx_element > starts[idx_start] - time_interval):
+                idx_element = starts[idx_start] + time_interval
+                idx_start = idx_start + 1
+                continue
+            if (n_missing[idx_element + time_interval] ==
+                    n_missing[idx_element]):
+                acc = _window_sum(cumsum, compensation, idx_element,
+                                  idx_element + time_interval)
+                if acc > best:
+                    best = acc
+                    idx_best = idx_element
+            idx_element = idx_element + 1
+
+        max_sum[idx_effort] = best if idx_best >= 0 else NAN
+        max_sum_idx[idx_effort] = idx_best
+        if idx_best < 0:
+            continue
+        # insert the start of the new effort while keeping the order
+        idx_start = n_starts
+        while idx_start > 0 and starts[idx_start - 1] > idx_best:
+            starts[idx_start] = starts[idx_start - 1]
+            idx_start = idx_start - 1
+        starts[idx_start] = idx_best
+        n_starts = n_starts + 1
+
+
+cpdef max_mean_power_top_k(floating[:] activity_power,
+                           Py_ssize_t[:] durations, Py_ssize_t n_efforts):
+    """Compute the best non-overlapping efforts for several durations.
+
+    The efforts are selected greedily: the best window is selected and the
+    windows overlapping it are discarded before selecting the next one. Each
+    selection scans the windows once using the cumulative sum of the power
+    such that the cost is linear with the number of samples.
+
+    Parameters
+    ----------
+    activity_power : ndarray, shape (n_samples,)
+        The power data of the activity.
+
+    durations : ndarray, shape (n_durations,)
+        The time intervals for which we compute the mean power.
+
+    n_efforts : int
+        The number of efforts to find for each duration.
+
+    Returns
+    -------
+    efforts : ndarray, shape (n_durations, n_efforts)
+        The mean power of the efforts sorted in decreasing order, with the
+        same dtype as ``activity_power``. It is NaN when less than
+        ``n_efforts`` efforts fit in the activity.
+
+    efforts_idx : ndarray, shape (n_durations, n_efforts)
+        The index of the beginning of each effort. It is -1 when the effort
+        does not exist.
+
+    """
+    cdef:
+        Py_ssize_t n_element = activity_power.shape[0]
+        Py_ssize_t n_durations = durations.shape[0]
+        Py_ssize_t idx_duration, idx_effort
+        double[:, :] max_sum = np.zeros((n_durations, n_efforts))
+        Py_ssize_t[:, :] max_sum_idx = np.zeros((n_durations, n_efforts),
+                                                dtype=np.intp)
+        Py_ssize_t* starts
+        double* cumsum
+        double* compensation
+        Py_ssize_t* n_missing
+
+    with nogil:
+        cumsum = <double*>malloc((n_element + 1) *
+                                 (2 * sizeof(double) + sizeof(Py_ssize_t)))
+        compensation = cumsum + n_element + 1
+        n_missing = <Py_ssize_t*>(compensation + n_element + 1)
+        _compensated_cumsum(activity_power, cumsum, compensation, n_missing)
+
+        with parallel():
+            starts = <Py_ssize_t*>malloc(max(n_efforts, 1) *
+                                         sizeof(Py_ssize_t))
+            for idx_duration in prange(n_durations, schedule='dynamic'):
+                _top_k_max_sum(cumsum, compensation, n_missing, n_element,
+                               durations[idx_duration], n_efforts,
+                               &max_sum[idx_duration, 0],
+                               &max_sum_idx[idx_duration, 0], starts)
+                for idx_effort in range(n_efforts):
+                    max_sum[idx_duration, idx_effort] = (
+                        max_sum[idx_duration, idx_effort] /
+                        durations[idx_duration])
+            free(starts)
+        free(cumsum)
+
+    if floating is float:
+        power_profile = np.asarray(max_sum, dtype=np.float32)
+    else:
+        power_profile = np.asarray(max_sum)
+    return power_profile, np.asarray(max_sum_idx)
+
+
+cpdef _update_max_mean_power_curve(floating[:] activity_power,
+                                   double[:] cumsum, double[:] compensation,
+                                   Py_ssize_t[:] n_missing,
+                                   Py_ssize_t n_element, double[:] max_sum,
+                                   Py_ssize_t[:] max_sum_idx):
+    """Update the maximum mean power curve with new samples.
+
+    Only the windows ending in the new samples are computed such that the
+    cost is proportional to the number of new samples.
+
+    Parameters
+    ----------
+    activity_power : ndarray, shape (n_new_samples,)
+        The new power samples.
+
+    cumsum : ndarray, shape (n_capacity + 1,)
+        The cumulative sum computed for the ``n_element`` previous samples.
+        It is updated in place and should be large enough to store the new
+        samples.
+
+    compensation : ndarray, shape (n_capacity + 1,)
+        The compensation term of the cumulative sum, updated in place.
+
+    n_missing : ndarray, shape (n_capacity + 1,)
+        The cumulative count of missing values, updated in place.
+
+    n_element : int
+        The number of samples already accumulated.
+
+    max_sum : ndarray, shape (n_durations,)
+        The maximum sum over the windows for the durations from 1 to
+        ``n_durations`` seconds, updated in place. The durations which were
+        not computed yet should be initialized to zero.
+
+    max_sum_idx : ndarray, shape (n_durations,)
+        The index of the beginning of the window for each duration, updated
+        in place.
+
+    Returns
+    -------
+    None
+
+    """
+    cdef:
+        Py_ssize_t n_new_element = n_element + activity_power.shape[0]
+        Py_ssize_t idx_duration, time_interval, idx_element
+        double acc
+
+    with nogil:
+        _extend_compensated_cumsum(activity_power, &cumsum[n_element],
+                                   &compensation[n_element],
+                                   &n_missing[n_element])
+        for idx_duration in prange(max_sum.shape[0], schedule='static'):
+            time_interval = idx_duration + 1
+            for idx_element in range(max(n_element - time_interval, 0),
+                                     n_new_element - time_interval):
+                if (n_missing[idx_element + time_interval] !=
+                        n_missing[idx_element]):
+                    continue
+                acc = _window_sum(&cumsum[0], &compensation[0], idx_element,
+                                  idx_element + time_interval)
+                if acc > max_sum[idx_duration]:
+                    max_sum[idx_duration] = acc
+                    max_sum_idx[idx_duration] = idx_element
+
+
+cpdef _update_max_mean_power_curve_chunk(floating[:] activity_power,
+                                         double[:] cumsum,
+                                         double[:] compensation,
+                                         Py_ssize_t[:] n_missing,
+                                         Py_ssize_t n_starts,
+                                         Py_ssize_t offset,
+                                         Py_ssize_t[:] durations,
+                                         double[:] max_sum,
+                                         Py_ssize_t[:] max_sum_idx,
+                                         bint pruned=False, bint clip=True):
+    """Update the maximum mean power curve with the windows of a chunk.
+
+    Only the windows starting in the first ``n_starts`` samples of the chunk
+    are computed. The chunk should therefore contain the samples following
+    these starts up to the largest duration such that the memory used is
+    bounded by the size of the chunk and the largest duration.
+
+    Parameters
+    ----------
+    activity_power : ndarray, shape (n_chunk_samples,)
+        The power samples of the chunk.
+
+    cumsum : ndarray, shape (n_capacity + 1,)
+        The cumulative sum of the chunk, computed in place. The first element
+        should contain the cumulative sum of the samples preceding the chunk
+        such that the sums are identical to the ones computed on the whole
+        activity.
+
+    compensation : ndarray, shape (n_capacity + 1,)
+        The compensation term, with the same convention as ``cumsum``.
+
+    n_missing : ndarray, shape (n_capacity + 1,)
+        The cumulative count of missing values, with the same convention as
+        ``cumsum``.
+
+    n_starts : int
+        The number of windows starting in the chunk to compute.
+
+    offset : int
+        The index of the first sample of the chunk in the activity.
+
+    durations : ndarray, shape (n_durations,)
+        The time intervals for which we compute the mean power.
+
+    max_sum : ndarray, shape (n_durations,)
+        The maximum sum over the windows for each duration, updated in place.
+        It should be initialized to zero, or to ``-inf`` without clipping.
+
+    max_sum_idx : ndarray, shape (n_durations,)
+        The index of the beginning of the window for each duration, updated
+        in place.
+
+    pruned : bool, default=False
+        Whether to skip the blocks of windows which cannot contain the
+        maximum. Refer to :func:`max_mean_power_curve`.
+
+    clip : bool, default=True
+        Whether the maximum is never negative. Refer to
+        :func:`max_mean_power_curve`.
+
+    Returns
+    -------
+    None
+
+    """
+    cdef:
+        Py_ssize_t n_element = activity_power.shape[0]
+        Py_ssize_t idx_duration, time_interval, n_windows_element
+        Py_ssize_t idx_chunk_max
+        double chunk_max
+        double* bounds_buffer = NULL
+        BlockBounds bounds
+
+    with nogil:
+        _extend_compensated_cumsum(activity_power, &cumsum[0],
+                                   &compensation[0], &n_missing[0])
+        if pruned:
+            bounds_buffer = <double*>malloc(4 * _n_blocks(n_element) *
+                                            sizeof(double))
+            _block_bounds(&cumsum[0], &compensation[0], n_element,
+                          bounds_buffer, &bounds)
+
+        for idx_duration in prange(durations.shape[0], schedule='dynamic'):
+            time_interval = durations[idx_duration]
+            # the windows start in the first samples of the chunk and cannot
+            # end on the last sample of the activity
+            n_windows_element = min(n_starts + time_interval, n_element)
+            if pruned:
+                chunk_max, idx_chunk_max = _max_sum_cumsum_pruned(
+                    &cumsum[0], &compensation[0], &n_missing[0],
+                    n_windows_element, time_interval, &bounds, clip)
+            else:
+                chunk_max, idx_chunk_max = _max_sum_cumsum(
+                    &cumsum[0], &compensation[0], &n_missing[0],
+                    n_windows_element, time_interval, clip)
+            # in case of equality, the window of a previous chunk is kept
+            if chunk_max > max_sum[idx_duration]:
+                max_sum[idx_duration] = chunk_max
+                max_sum_idx[idx_duration] = idx_chunk_max + offset
+
+        free(bounds_buffer)
+
+
 cpdef _associated_data_power_profile(floating[:] data,
                                      integral[:] pp_index,
                                      integral[:] duration):
@@ -78,14 +1031,19 @@ cpdef _associated_data_power_profile(floating[:] data,
     -------
     complement_data : ndarray, shape (max_duration)
         The mean of the complementary data of the power-profile for each
-        duration.
+        duration, with the same dtype as ``data``.
 
     """
     cdef:
         Py_ssize_t time_interval, data_idx, i, j, n_elt
-        double[:] output = np.empty((pp_index.shape[0],))
+        floating[:] output
         double acc
 
+    if floating is float:
+        output = np.empty((pp_index.shape[0],), dtype=np.float32)
+    else:
+        output = np.empty((pp_index.shape[0],), dtype=np.float64)
+
     with nogil, parallel():
         for i in prange(pp_index.shape[0]):
             time_interval = duration[i]
@@ -95,4 +1053,75 @@ cpdef _associated_data_power_profile(floating[:] data,
                 acc = acc + data[j]
             output[i] = acc / time_interval
 
-    return np.array(output)
+    return np.asarray(output)
+
+
+cpdef _associated_data_power_profile_2d(floating[:, :] data,
+                                        Py_ssize_t[:] pp_index,
+                                        Py_ssize_t[:] duration):
+    """Compute the mean of all complementary data of the power-profile.
+
+    The mean of each channel is obtained from its cumulative sum such that
+    all channels are processed in a single pass.
+
+    Parameters
+    ----------
+    data : ndarray, shape (n_samples, n_channels)
+        The complementary data to use.
+
+    pp_index : ndarray, shape (max_duration,)
+        The indices of the maximum for a specific duration found when computing
+        the power-profile.
+
+    duration : ndarray, shape (max_duration,)
+        An array containing the duration (idx/integrer).
+
+    Returns
+    -------
+    complement_data : ndarray, shape (n_channels, max_duration)
+        The mean of the complementary data of the power-profile for each
+        channel and duration, with the same dtype as ``data``. The mean is
+        NaN if the window contains missing values.
+
+    """
+    cdef:
+        Py_ssize_t n_element = data.shape[0]
+        Py_ssize_t n_channels = data.shape[1]
+        Py_ssize_t n_durations = pp_index.shape[0]
+        Py_ssize_t idx_channel, idx_duration, start, end, offset
+        floating[:, ::1] output
+        double* cumsum
+        double* compensation
+        Py_ssize_t* n_missing
+
+    if floating is float:
+        output = np.empty((n_channels, n_durations), dtype=np.float32)
+    else:
+        output = np.empty((n_channels, n_durations), dtype=np.float64)
+
+    with nogil:
+        cumsum = <double*>malloc(n_channels * (n_element + 1) *
+                                 (2 * sizeof(double) + sizeof(Py_ssize_t)))
+        compensation = cumsum + n_channels * (n_element + 1)
+        n_missing = <Py_ssize_t*>(compensation +
+                                  n_channels * (n_element + 1))
+        for idx_channel in prange(n_channels, schedule='static'):
+            offset = idx_channel * (n_element + 1)
+            _compensated_cumsum(data[:, idx_channel], cumsum + offset,
+                                compensation + offset, n_missing + offset)
+
+        for idx_duration in prange(n_durations, schedule='static'):
+            start = pp_index[idx_duration]
+            end = start + duration[idx_duration]
+            for idx_channel in range(n_channels):
+                offset = idx_channel * (n_element + 1)
+                if n_missing[offset + end] != n_missing[offset + start]:
+                    output[idx_channel, idx_duration] = NAN
+                else:
+                    output[idx_channel, idx_duration] = _window_sum(
+                        cumsum + offset, compensation + offset, start,
+                        end) / duration[idx_duration]
+
+        free(cumsum)
+
+    return np.asarray(output)
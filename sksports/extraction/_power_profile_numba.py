@@ -0,0 +1,73 @@
+"""Power-profile kernels compiled just-in-time with Numba."""
+
+# Authors: Guillaume Lemaitre <g.lemaitre58@gmail.com>
+#          Cedric Lemaitre
+# License: MIT
+
+import numpy as np
+from numba import njit
+
+from ._power_profile_numpy import NumpyBackend
+
+
+@njit(nogil=True)
+def _extend_compensated_cumsum(data, cumsum, compensation, n_missing):
+    # the summation continues from the state stored in the first elements
+    acc = cumsum[0]
+    comp = compensation[0]
+    missing = n_missing[0]
+    for idx_element in range(data.shape[0]):
+        value = data[idx_element]
+        if value != value:
+            # NaN are not summed but a window containing them is invalid
+            missing += 1
+            value = 0.0
+        tmp = acc + value
+        if abs(acc) >= abs(value):
+            comp += (acc - tmp) + value
+        else:
+            comp += (value - tmp) + acc
+        acc = tmp
+        cumsum[idx_element + 1] = acc
+        compensation[idx_element + 1] = comp
+        n_missing[idx_element + 1] = missing
+
+
+@njit(nogil=True)
+def _max_sum_cumsum(cumsum, compensation, n_missing, n_element,
+                    time_interval, clip):
+    # without clipping, the maximum can be negative and its index is -1 if
+    # there is no valid window
+    idx_max_sum = 0 if clip else -1
+    max_sum = 0.0 if clip else -np.inf
+    for idx_element in range(n_element - time_interval):
+        if (n_missing[idx_element + time_interval] !=
+                n_missing[idx_element]):
+            continue
+        acc = ((cumsum[idx_element + time_interval] - cumsum[idx_element]) +
+               (compensation[idx_element + time_interval] -
+                compensation[idx_element]))
+        if acc > max_sum:
+            max_sum = acc
+            idx_max_sum = idx_element
+    return max_sum, idx_max_sum
+
+
+class NumbaBackend(NumpyBackend):
+    """Power-profile kernels compiled with Numba.
+
+    The cumulative sum is compensated and the windows are scanned in the same
+    order as in the Cython kernels such that the results are identical.
+
+    """
+
+    name = 'numba'
+
+    def _extend_cumulative_sum(self, data, cumsum, compensation, n_missing):
+        _extend_compensated_cumsum(np.asarray(data, dtype=np.float64),
+                                   cumsum, compensation, n_missing)
+
+    def _max_sum(self, cumsum, compensation, n_missing, n_element,
+                 time_interval, clip=True):
+        return _max_sum_cumsum(cumsum, compensation, n_missing, n_element,
+                               time_interval, clip)
@@ -0,0 +1,211 @@
+"""Power-profile kernels implemented with NumPy."""
+
+# Authors: Guillaume Lemaitre <g.lemaitre58@gmail.com>
+#          Cedric Lemaitre
+# License: MIT
+
+import numpy as np
+
+
+def _output_dtype(data):
+    """The kernels return float32 for float32 data and float64 otherwise."""
+    return np.float32 if np.asarray(data).dtype == np.float32 else np.float64
+
+
+class NumpyBackend(object):
+    """Power-profile kernels vectorized with NumPy.
+
+    The kernels have the same signature and return the same results as the
+    kernels of :mod:`sksports.extraction._power_profile` which are written in
+    Cython. The cumulative sum is not compensated such that the results are
+    only identical for data with integer values (e.g. the power). The
+    parameter ``pruned`` is accepted for compatibility and ignored since all
+    windows of a duration are computed at once.
+
+    """
+
+    name = 'numpy'
+
+    def _extend_cumulative_sum(self, data, cumsum, compensation, n_missing):
+        """Compute the cumulative sum of ``data`` in place.
+
+        The summation continues from the state stored in the first element of
+        ``cumsum``, ``compensation``, and ``n_missing`` which should have at
+        least ``data.size + 1`` elements.
+
+        """
+        data = np.asarray(data, dtype=np.float64)
+        missing = np.isnan(data)
+        n_element = data.size
+        # the sums are accumulated sequentially from the previous state
+        cumsum[1:n_element + 1] = np.cumsum(
+            np.concatenate([cumsum[:1], np.where(missing, 0., data)]))[1:]
+        compensation[1:n_element + 1] = compensation[0]
+        n_missing[1:n_element + 1] = np.cumsum(missing) + n_missing[0]
+
+    def _cumulative_sum(self, data):
+        n_element = np.asarray(data).shape[0]
+        cumsum = np.zeros(n_element + 1)
+        compensation = np.zeros(n_element + 1)
+        n_missing = np.zeros(n_element + 1, dtype=np.intp)
+        self._extend_cumulative_sum(data, cumsum, compensation, n_missing)
+        return cumsum, compensation, n_missing
+
+    def _window_sums(self, cumsum, compensation, n_missing, n_windows,
+                     time_interval):
+        """Sum of the windows starting in ``[0, n_windows)``.
+
+        The windows containing missing values are set to ``-inf``.
+
+        """
+        end = n_windows + time_interval
+        sums = ((cumsum[time_interval:end] - cumsum[:n_windows]) +
+                (compensation[time_interval:end] - compensation[:n_windows]))
+        sums[n_missing[time_interval:end] != n_missing[:n_windows]] = -np.inf
+        return sums
+
+    def _max_sum(self, cumsum, compensation, n_missing, n_element,
+                 time_interval, clip=True):
+        """Maximum sum of the windows starting in ``[0, n_element - d)``."""
+        # the maximum is initialized as in the Cython kernels
+        initial = (0.0, 0) if clip else (-np.inf, -1)
+        n_windows = n_element - time_interval
+        if n_windows <= 0:
+            return initial
+        sums = self._window_sums(cumsum, compensation, n_missing, n_windows,
+                                 time_interval)
+        idx_max_sum = np.argmax(sums)
+        if sums[idx_max_sum] > initial[0]:
+            return sums[idx_max_sum], idx_max_sum
+        return initial
+
+    def max_mean_power_curve(self, activity_power, durations, pruned=False,
+                             clip=True):
+        cumsum, compensation, n_missing = self._cumulative_sum(activity_power)
+        n_element = cumsum.size - 1
+        power_profile = np.zeros(len(durations))
+        power_profile_idx = np.zeros(len(durations), dtype=np.intp)
+        for idx_duration, duration in enumerate(durations):
+            max_sum, power_profile_idx[idx_duration] = self._max_sum(
+                cumsum, compensation, n_missing, n_element, duration, clip)
+            power_profile[idx_duration] = max_sum / duration
+        power_profile[power_profile_idx < 0] = np.nan
+        return (power_profile.astype(_output_dtype(activity_power)),
+                power_profile_idx)
+
+    def max_mean_power_curve_batch(self, activity_power, offsets, durations,
+                                   durations_offsets, pruned=False,
+                                   clip=None):
+        power_profile = np.zeros(len(durations),
+                                 dtype=_output_dtype(activity_power))
+        power_profile_idx = np.zeros(len(durations), dtype=np.intp)
+        for idx_activity in range(len(offsets) - 1):
+            start, end = durations_offsets[idx_activity:idx_activity + 2]
+            (power_profile[start:end],
+             power_profile_idx[start:end]) = self.max_mean_power_curve(
+                 activity_power[offsets[idx_activity]:
+                                offsets[idx_activity + 1]],
+                 durations[start:end],
+                 clip=True if clip is None else bool(clip[idx_activity]))
+        return power_profile, power_profile_idx
+
+    def max_mean_power_curve_work(self, activity_power, work_thresholds,
+                                  durations, pruned=False, clip=True):
+        cumsum, compensation, n_missing = self._cumulative_sum(activity_power)
+        n_element = cumsum.size - 1
+        work = cumsum[:n_element] + compensation[:n_element]
+        power_profile = np.zeros((len(work_thresholds), len(durations)))
+        power_profile_idx = np.zeros((len(work_thresholds), len(durations)),
+                                     dtype=np.intp)
+        work_idx = np.zeros(len(work_thresholds), dtype=np.intp)
+        for idx_threshold, threshold in enumerate(work_thresholds):
+            reached = work >= threshold
+            start = np.argmax(reached) if reached.any() else n_element
+            work_idx[idx_threshold] = start
+            for idx_duration, duration in enumerate(durations):
+                max_sum, idx_max_sum = self._max_sum(
+                    cumsum[start:], compensation[start:], n_missing[start:],
+                    n_element - start, duration, clip)
+                power_profile[idx_threshold, idx_duration] = max_sum / duration
+                power_profile_idx[idx_threshold, idx_duration] = (
+                    idx_max_sum + start if idx_max_sum >= 0 else -1)
+        power_profile[power_profile_idx < 0] = np.nan
+        return (power_profile.astype(_output_dtype(activity_power)),
+                power_profile_idx, work_idx)
+
+    def max_mean_power_top_k(self, activity_power, durations, n_efforts):
+        cumsum, compensation, n_missing = self._cumulative_sum(activity_power)
+        n_element = cumsum.size - 1
+        efforts = np.full((len(durations), n_efforts), np.nan)
+        efforts_idx = np.full((len(durations), n_efforts), -1, dtype=np.intp)
+        for idx_duration, duration in enumerate(durations):
+            n_windows = n_element - duration
+            if n_windows <= 0:
+                continue
+            sums = self._window_sums(cumsum, compensation, n_missing,
+                                     n_windows, duration)
+            for idx_effort in range(n_efforts):
+                idx_best = np.argmax(sums)
+                if sums[idx_best] == -np.inf:
+                    break
+                efforts[idx_duration, idx_effort] = sums[idx_best] / duration
+                efforts_idx[idx_duration, idx_effort] = idx_best
+                # discard the windows overlapping the selected effort
+                sums[max(idx_best - duration + 1, 0):
+                     idx_best + duration] = -np.inf
+        return efforts.astype(_output_dtype(activity_power)), efforts_idx
+
+    def _associated_data_power_profile_2d(self, data, pp_index, duration):
+        pp_index = np.asarray(pp_index)
+        duration = np.asarray(duration)
+        output = np.empty((data.shape[1], pp_index.size),
+                          dtype=_output_dtype(data))
+        for idx_channel in range(data.shape[1]):
+            cumsum, compensation, n_missing = self._cumulative_sum(
+                data[:, idx_channel])
+            end = pp_index + duration
+            mean = (((cumsum[end] - cumsum[pp_index]) +
+                     (compensation[end] - compensation[pp_index])) /
+                    duration)
+            mean[n_missing[end] != n_missing[pp_index]] = np.nan
+            output[idx_channel] = mean
+        return output
+
+    def _update_max_mean_power_curve(self, activity_power, cumsum,
+                                     compensation, n_missing, n_element,
+                                     max_sum, max_sum_idx):
+        n_new_element = n_element + len(activity_power)
+        self._extend_cumulative_sum(activity_power, cumsum[n_element:],
+                                    compensation[n_element:],
+                                    n_missing[n_element:])
+        for idx_duration in range(len(max_sum)):
+            time_interval = idx_duration + 1
+            start = max(n_element - time_interval, 0)
+            n_windows = n_new_element - time_interval - start
+            if n_windows <= 0:
+                continue
+            sums = self._window_sums(cumsum[start:], compensation[start:],
+                                     n_missing[start:], n_windows,
+                                     time_interval)
+            idx_max_sum = np.argmax(sums)
+            if sums[idx_max_sum] > max_sum[idx_duration]:
+                max_sum[idx_duration] = sums[idx_max_sum]
+                max_sum_idx[idx_duration] = idx_max_sum + start
+
+    def _update_max_mean_power_curve_chunk(self, activity_power, cumsum,
+                                           compensation, n_missing, n_starts,
+                                           offset, durations, max_sum,
+                                           max_sum_idx, pruned=False,
+                                           clip=True):
+        n_element = len(activity_power)
+        self._extend_cumulative_sum(activity_power, cumsum, compensation,
+                                    n_missing)
+        for idx_duration, time_interval in enumerate(durations):
+            chunk_max, idx_chunk_max = self._max_sum(
+                cumsum, compensation, n_missing,
+                min(n_starts + time_interval, n_element), time_interval,
+                clip)
+            # in case of equality, the window of a previous chunk is kept
+            if chunk_max > max_sum[idx_duration]:
+                max_sum[idx_duration] = chunk_max
+                max_sum_idx[idx_duration] = idx_chunk_max + offset
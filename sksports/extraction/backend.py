@@ -0,0 +1,282 @@
+"""Registry of the backends computing the power-profile kernels."""
+
+# Authors: Guillaume Lemaitre <g.lemaitre58@gmail.com>
+#          Cedric Lemaitre
+# License: MIT
+
+import os
+import timeit
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+import six
+
+ENV_BACKEND = 'SKSPORTS_BACKEND'
+# the relative tolerance of the results of the backends compared to the Cython
+# kernels, on non-integer data
+RTOL = 1e-9
+
+_BACKENDS = OrderedDict()
+_LOADED_BACKENDS = {}
+_SELECTED_BACKEND = None
+
+
+def register_backend(name, loader):
+    """Register a backend computing the power-profile kernels.
+
+    Read more in the :ref:`User Guide <backend>`.
+
+    Parameters
+    ----------
+    name : str
+        The name of the backend.
+
+    loader : callable
+        A callable without argument returning an object which exposes the
+        kernels of :mod:`sksports.extraction._power_profile`. It should raise
+        an ``ImportError`` if the backend is not available on the host.
+
+    Returns
+    -------
+    None
+
+    """
+    global _SELECTED_BACKEND
+    _BACKENDS[name] = loader
+    _LOADED_BACKENDS.pop(name, None)
+    # the fastest backend should be selected again
+    _SELECTED_BACKEND = None
+
+
+def _load_backend(name):
+    if name not in _LOADED_BACKENDS:
+        _LOADED_BACKENDS[name] = _BACKENDS[name]()
+    return _LOADED_BACKENDS[name]
+
+
+def available_backends():
+    """List the backends which can be used on the host.
+
+    Read more in the :ref:`User Guide <backend>`.
+
+    Returns
+    -------
+    backends : list of str
+        The names of the registered backends which could be loaded.
+
+    Examples
+    --------
+    >>> from sksports.extraction import available_backends
+    >>> 'numpy' in available_backends()
+    True
+
+    """
+    backends = []
+    for name in _BACKENDS:
+        try:
+            _load_backend(name)
+        except ImportError:
+            continue
+        backends.append(name)
+    return backends
+
+
+def get_backend(backend=None):
+    """Get the backend computing the power-profile kernels.
+
+    Read more in the :ref:`User Guide <backend>`.
+
+    Parameters
+    ----------
+    backend : str, optional
+        The name of the backend. By default, the backend is given by the
+        environment variable ``SKSPORTS_BACKEND``. If this variable is not
+        set or is ``'auto'``, the fastest backend available is selected with a
+        micro-benchmark run once.
+
+    Returns
+    -------
+    backend : object
+        The object exposing the kernels.
+
+    Examples
+    --------
+    >>> from sksports.extraction import get_backend
+    >>> get_backend('numpy').name
+    'numpy'
+
+    """
+    global _SELECTED_BACKEND
+    if backend is None:
+        backend = os.environ.get(ENV_BACKEND, 'auto')
+    if not isinstance(backend, six.string_types):
+        raise ValueError('"backend" should be a string. Got {!r} instead.'
+                         .format(backend))
+    if backend == 'auto':
+        if _SELECTED_BACKEND is None:
+            _SELECTED_BACKEND = select_backend()
+        backend = _SELECTED_BACKEND
+    if backend not in _BACKENDS:
+        raise ValueError('"backend" should be one of {} or "auto". Got {!r}'
+                         ' instead.'.format(list(_BACKENDS), backend))
+    try:
+        return _load_backend(backend)
+    except ImportError as e:
+        raise ValueError('The backend {!r} is not available: {}'
+                         .format(backend, e))
+
+
+def _benchmark_data():
+    rng = np.random.RandomState(0)
+    # the power is not rounded such that the backends are compared on
+    # non-integer data
+    power = (200 + 50 * rng.randn(3600)).clip(0)
+    power[[10, 11, 2000]] = np.nan
+    durations = np.unique(np.round(np.logspace(0, np.log10(3599), num=50))
+                          .astype(np.intp))
+    return power, durations
+
+
+def _check_kernels(backend, reference, power, durations):
+    """Find the kernels of a backend which differ from the reference.
+
+    The values are compared with the relative tolerance ``RTOL`` and the
+    indices of the windows should be identical.
+
+    """
+    n_samples = power.size
+    data = np.stack([power, np.sqrt(power), -power], axis=1)
+    offsets = np.array([0, 1000, n_samples], dtype=np.intp)
+    batch_durations = np.concatenate([durations[durations < 1000],
+                                      durations])
+    batch_offsets = np.array(
+        [0, np.sum(durations < 1000), batch_durations.size], dtype=np.intp)
+    update_durations = np.arange(1, 51, dtype=np.intp)
+
+    def update(kernels, name, *args):
+        # the kernels updating a power-profile are given new buffers
+        buffers = [np.zeros(n_samples + 1), np.zeros(n_samples + 1),
+                   np.zeros(n_samples + 1, dtype=np.intp)]
+        max_sum = np.zeros(update_durations.size)
+        max_sum_idx = np.zeros(update_durations.size, dtype=np.intp)
+        getattr(kernels, name)(power, *(buffers + list(args) +
+                                        [max_sum, max_sum_idx]))
+        return max_sum, max_sum_idx
+
+    kernels = OrderedDict([
+        ('max_mean_power_curve', lambda kernels: kernels.max_mean_power_curve(
+            power, durations, pruned=True)),
+        ('max_mean_power_curve(clip=False)',
+         lambda kernels: kernels.max_mean_power_curve(
+             -power, durations, pruned=True, clip=False)),
+        ('max_mean_power_curve_batch',
+         lambda kernels: kernels.max_mean_power_curve_batch(
+             power, offsets, batch_durations, batch_offsets, pruned=True)),
+        ('max_mean_power_curve_work',
+         lambda kernels: kernels.max_mean_power_curve_work(
+             power, np.array([0., 1e5, 5e5]), durations, pruned=True)),
+        ('max_mean_power_top_k',
+         lambda kernels: kernels.max_mean_power_top_k(power, durations, 3)),
+        ('_associated_data_power_profile_2d',
+         lambda kernels: (kernels._associated_data_power_profile_2d(
+             data, (n_samples - durations) // 2, durations),)),
+        ('_update_max_mean_power_curve',
+         lambda kernels: update(kernels, '_update_max_mean_power_curve', 0)),
+        ('_update_max_mean_power_curve_chunk',
+         lambda kernels: update(kernels, '_update_max_mean_power_curve_chunk',
+                                n_samples, 0, update_durations))])
+
+    failed = []
+    for name, kernel in kernels.items():
+        try:
+            results = kernel(backend)
+        except (AttributeError, TypeError):
+            # the kernel is missing or does not accept the parameters
+            failed.append(name)
+            continue
+        for result, expected in zip(results, kernel(reference)):
+            result, expected = np.asarray(result), np.asarray(expected)
+            if expected.dtype.kind == 'f':
+                same = np.allclose(result, expected, rtol=RTOL, atol=0,
+                                   equal_nan=True)
+            else:
+                same = np.array_equal(result, expected)
+            if result.shape != expected.shape or not same:
+                failed.append(name)
+                break
+    return failed
+
+
+def select_backend(n_repeats=3):
+    """Select the fastest backend available on the host.
+
+    Each kernel of each backend is checked against the Cython kernels on
+    non-integer data with missing values. The values should be identical up
+    to the relative tolerance ``RTOL``, which covers the cumulative sums
+    which are not compensated (e.g. the NumPy backend), and the windows found
+    should be identical. The backends giving different results are discarded
+    and the fastest of the other ones is selected.
+
+    Read more in the :ref:`User Guide <backend>`.
+
+    Parameters
+    ----------
+    n_repeats : int, default=3
+        The number of times each backend is timed. The fastest time is kept.
+
+    Returns
+    -------
+    backend : str
+        The name of the fastest backend.
+
+    """
+    power, durations = _benchmark_data()
+    reference = get_backend('cython')
+
+    timings = {}
+    for name in available_backends():
+        backend = _load_backend(name)
+        # the first calls are not timed since they can trigger a compilation
+        failed = _check_kernels(backend, reference, power, durations)
+        if failed:
+            warnings.warn('The backend {!r} is discarded since its kernels {}'
+                          ' do not compute the expected results.'
+                          .format(name, failed))
+            continue
+        timings[name] = min(timeit.repeat(
+            lambda: backend.max_mean_power_curve(power, durations,
+                                                 pruned=True),
+            number=1, repeat=n_repeats))
+    return min(timings, key=timings.get)
+
+
+class _ModuleBackend(object):
+    """Expose the kernels of a compiled module as a backend."""
+
+    def __init__(self, name, module):
+        self.name = name
+        self._module = module
+
+    def __getattr__(self, attr):
+        return getattr(self._module, attr)
+
+
+def _load_cython():
+    from . import _power_profile
+    return _ModuleBackend('cython', _power_profile)
+
+
+def _load_numba():
+    from ._power_profile_numba import NumbaBackend
+    return NumbaBackend()
+
+
+def _load_numpy():
+    from ._power_profile_numpy import NumpyBackend
+    return NumpyBackend()
+
+
+register_backend('cython', _load_cython)
+register_backend('numba', _load_numba)
+register_backend('numpy', _load_numpy)
@@ -11,6 +11,24 @@ from collections import Iterable
 import pandas as pd
 
 from ..exceptions import MissingDataError
+from ..io.segmented import SegmentedActivity
+
+
+def _diff(activity, column, periods):
+    """Compute the difference of a column without spanning the gaps."""
+    if isinstance(activity, SegmentedActivity):
+        return activity[column].diff(periods=periods).data[column]
+    return activity[column].diff(periods=periods)
+
+
+def _gradient_output(activity, gradient, name, append):
+    """Append the gradient to the activity or return it alone."""
+    if append:
+        activity[name] = gradient
+        return activity
+    if isinstance(activity, SegmentedActivity):
+        return activity._replace(gradient.to_frame(name))
+    return gradient
 
 
 def acceleration(activity, periods=5, append=True):
@@ -20,8 +38,9 @@ def acceleration(activity, periods=5, append=True):
 
     Parameters
     ----------
-    activity : DataFrame
-        The activity containing speed information.
+    activity : DataFrame or SegmentedActivity
+        The activity containing speed information. The gradients of a
+        :class:`sksports.io.SegmentedActivity` do not span its gaps.
 
     periods : int, default=5
         Periods to shift to compute the acceleration.
@@ -34,7 +53,8 @@ def acceleration(activity, periods=5, append=True):
     -------
     data : DataFrame or Series
         The original activity with an additional column containing the
-        acceleration or a single Series containing the acceleration.
+        acceleration or a single Series containing the acceleration. A
+        segmented activity gives a segmented activity.
 
     Examples
     --------
@@ -50,13 +70,9 @@ def acceleration(activity, periods=5, append=True):
                                'required. Got {} fields.'
                                .format(activity.columns))
 
-    acceleration = activity['speed'].diff(periods=periods) / periods
+    acceleration = _diff(activity, 'speed', periods) / periods
 
-    if append:
-        activity['acceleration'] = acceleration
-        return activity
-    else:
-        return acceleration
+    return _gradient_output(activity, acceleration, 'acceleration', append)
 
 
 def gradient_elevation(activity, periods=5, append=True):
@@ -66,8 +82,9 @@ def gradient_elevation(activity, periods=5, append=True):
 
     Parameters
     ----------
-    activity : DataFrame
-        The activity containing elevation and distance information.
+    activity : DataFrame or SegmentedActivity
+        The activity containing elevation and distance information. Refer to
+        :func:`sksports.extraction.acceleration` for segmented activities.
 
     periods : int, default=5
         Periods to shift to compute the elevation gradient.
@@ -97,15 +114,12 @@ def gradient_elevation(activity, periods=5, append=True):
                                'and distance data are required. Got {} fields.'
                                .format(activity.columns))
 
-    diff_elevation = activity['elevation'].diff(periods=periods)
-    diff_distance = activity['distance'].diff(periods=periods)
+    diff_elevation = _diff(activity, 'elevation', periods)
+    diff_distance = _diff(activity, 'distance', periods)
     gradient_elevation = diff_elevation / diff_distance
 
-    if append:
-        activity['gradient-elevation'] = gradient_elevation
-        return activity
-    else:
-        return gradient_elevation
+    return _gradient_output(activity, gradient_elevation,
+                            'gradient-elevation', append)
 
 
 def gradient_heart_rate(activity, periods=5, append=True):
@@ -115,8 +129,9 @@ def gradient_heart_rate(activity, periods=5, append=True):
 
     Parameters
     ----------
-    activity : DataFrame
-        The activity containing heart-rate information.
+    activity : DataFrame or SegmentedActivity
+        The activity containing heart-rate information. Refer to
+        :func:`sksports.extraction.acceleration` for segmented activities.
 
     periods : int, default=5
         Periods to shift to compute the heart-rate gradient.
@@ -151,13 +166,10 @@ def gradient_heart_rate(activity, periods=5, append=True):
                                ' data are required. Got {} fields.'
                                .format(activity.columns))
 
-    gradient_heart_rate = activity['heart-rate'].diff(periods=periods)
+    gradient_heart_rate = _diff(activity, 'heart-rate', periods)
 
-    if append:
-        activity['gradient-heart-rate'] = gradient_heart_rate
-        return activity
-    else:
-        return gradient_heart_rate
+    return _gradient_output(activity, gradient_heart_rate,
+                            'gradient-heart-rate', append)
 
 
 def gradient_activity(activity, periods=1, append=True, columns=None):
@@ -167,8 +179,9 @@ def gradient_activity(activity, periods=1, append=True, columns=None):
 
     Parameters
     ----------
-    activity : DataFrame
-        The activity to use to compute the gradient.
+    activity : DataFrame or SegmentedActivity
+        The activity to use to compute the gradient. Refer to
+        :func:`sksports.extraction.acceleration` for segmented activities.
 
     periods : int or array-like, default=1
         Periods to shift to compute the gradient. If an array-like is given,
@@ -183,7 +196,7 @@ def gradient_activity(activity, periods=1, append=True, columns=None):
 
     Returns
     -------
-    gradient : DataFrame
+    gradient : DataFrame or SegmentedActivity
         The computed gradient from the activity.
 
     Examples
@@ -212,4 +225,8 @@ def gradient_activity(activity, periods=1, append=True, columns=None):
         gradient = [activity] + gradient
         gradient_name = ['original'] + gradient_name
 
+    if isinstance(activity, SegmentedActivity):
+        return activity._replace(
+            pd.concat([grad.data for grad in gradient], axis=1,
+                      keys=gradient_name))
     return pd.concat(gradient, axis=1, keys=gradient_name)
@@ -9,32 +9,149 @@ from numbers import Integral
 
 import numpy as np
 import pandas as pd
+import six
 
-from ._power_profile import max_mean_power_interval
-from ._power_profile import _associated_data_power_profile
+from ..io.segmented import SegmentedActivity
+from ..metrics.power_profile import SAMPLING_WKO
+from .backend import get_backend
 
+ALGORITHMS = ('pruned', 'brute')
+DURATIONS_PRESETS = ('log', 'wko')
+N_LOG_DURATIONS = 100
 
-def activity_power_profile(activity, max_duration=None):
+
+def _validate_durations(durations, max_duration):
+    """Convert the durations into an array of seconds.
+
+    Parameters
+    ----------
+    durations : None, str or array-like
+        The durations to check. None corresponds to all durations with a
+        step of a second, ``'log'`` to log-spaced durations and ``'wko'`` to
+        the sampling of WKO+.
+
+    max_duration : int
+        The maximum duration in seconds (excluded).
+
+    Returns
+    -------
+    durations : ndarray, shape (n_durations,)
+        The sorted durations in seconds.
+
+    """
+    if durations is None:
+        return np.arange(1, max_duration, dtype=np.intp)
+
+    if isinstance(durations, six.string_types):
+        if durations not in DURATIONS_PRESETS:
+            raise ValueError('"durations" should be one of {} or an'
+                             ' array-like. Got {} instead.'
+                             .format(DURATIONS_PRESETS, durations))
+        if durations == 'log':
+            durations = np.logspace(0, np.log10(max(max_duration - 1, 1)),
+                                    num=N_LOG_DURATIONS)
+            durations = np.round(durations).astype(np.intp)
+        else:
+            durations = SAMPLING_WKO
+
+    if np.asarray(durations).dtype.kind not in 'iu':
+        durations = pd.to_timedelta(durations) // pd.Timedelta(seconds=1)
+
+    durations = np.unique(np.asarray(durations, dtype=np.intp))
+    return durations[np.bitwise_and(durations >= 1,
+                                    durations < max_duration)]
+
+
+def activity_power_profile(activity, max_duration=None, durations=None,
+                           interpolate=False, algorithm='pruned', dtype=None,
+                           target='power', chunk_size=None, max_gap=None,
+                           backend=None):
     """Compute the power profile for an activity.
 
     Read more in the :ref:`User Guide <activity_power_profile>`.
 
     Parameters
     ----------
-    activity : DataFrame
+    activity : DataFrame or SegmentedActivity
         A pandas DataFrame with at least a ``'power'`` column and the indices
         are the information about time. The activity can be read with
-        :func:`sksports.io.bikeread`.
+        :func:`sksports.io.bikeread`. No window spans the gaps between the
+        segments of a :class:`sksports.io.SegmentedActivity` and the
+        power-profile is computed up to the duration of its longest segment.
 
     max_duration : Timedelta, timedelta, np.timedelta64, int, or str, optional
         The maximum duration for which the power-profile should be computed. By
         default, it will be computed for the duration of the activity. An
         integer represents seconds.
 
+    durations : str or array-like, optional
+        The durations for which the power-profile should be computed. By
+        default, all durations with a step of a second are computed. The
+        options are:
+
+        * an array-like of Timedelta, timedelta, np.timedelta64, int, or str.
+          An integer represents seconds;
+        * ``'log'``: log-spaced durations;
+        * ``'wko'``: the durations used by WKO+ (see
+          ``sksports.metrics.power_profile.SAMPLING_WKO``).
+
+        Durations larger than ``max_duration`` are ignored.
+
+    interpolate : bool, default=False
+        Whether to linearly interpolate the power-profile computed for
+        ``durations`` on all durations with a step of a second. Only the
+        durations between two valid durations of the grid are interpolated
+        and the other ones, e.g. longer than the largest duration of the
+        grid, are NaN.
+
+    algorithm : str {'pruned', 'brute'}, default='pruned'
+        The algorithm used to find the maximum mean power for each duration:
+
+        * ``'brute'``: the mean power of every window is computed;
+        * ``'pruned'``: an upper bound of the mean power is computed for blocks
+          of windows which are skipped when they cannot contain the maximum.
+          The results are identical to the ``'brute'`` algorithm.
+
+    dtype : str or dtype, optional
+        The floating dtype of the power-profile (e.g. ``np.float32``). By
+        default, the dtype of the activity is kept. The sums are always
+        accumulated in double precision.
+
+    target : str or list of str, default='power'
+        The column(s) for which the maximal mean curve is computed (e.g.
+        ``'heart-rate'`` or ``'speed'``). The other columns are averaged on
+        the windows found for each target. Several targets are computed in a
+        single call to the kernel. The maximal mean power is never below
+        zero. The maximal mean of the other channels can be negative (e.g.
+        for ``'vam'`` on a descent) and, with the other columns, it is NaN
+        for the durations without any window free of missing values.
+
+    chunk_size : int, optional
+        If given, the activity is processed by chunks of ``chunk_size``
+        samples such that the working memory is bounded by ``chunk_size`` and
+        the largest duration instead of growing with the length of the
+        activity. The samples of each chunk are extracted from the activity
+        when the chunk is processed. The power-profile is identical to the
+        one computed at once. It is useful for multi-day activities when
+        limiting ``max_duration`` or ``durations``.
+
+    max_gap : Timedelta, timedelta, np.timedelta64, int, or str, optional
+        If given, the samples separated by more than ``max_gap`` (e.g. an
+        auto-pause removed with ``bikeread(..., max_gap=...)``) are considered
+        as not contiguous and no window spans the gap. By default, the samples
+        are considered contiguous. An integer represents seconds.
+
+    backend : str, optional
+        The backend computing the kernels (e.g. ``'cython'``, ``'numpy'``, or
+        ``'numba'``). By default, the backend is given by
+        :func:`sksports.extraction.get_backend`.
+
     Returns
     -------
-    power_profile : Series
-        A pandas Series containing the power-profile.
+    power_profile : Series or DataFrame
+        A pandas Series containing the power-profile. If ``target`` is a list,
+        a DataFrame with a column containing the maximal mean curve of each
+        target.
 
     References
     ----------
@@ -56,45 +173,822 @@ def activity_power_profile(activity, max_duration=None):
              00:00:05    64.400000
     Name: 2014-05-07 12:26:22, dtype: float64
 
+    """
+    _check_algorithm(algorithm)
+    targets = _check_target(target, activity)
+    if chunk_size is not None:
+        if not isinstance(chunk_size, Integral) or chunk_size < 1:
+            raise ValueError('"chunk_size" should be a positive integer.'
+                             ' Got {} instead.'.format(chunk_size))
+    if isinstance(target, six.string_types) or chunk_size is not None:
+        kernels = get_backend(backend)
+        activity_data, max_duration, durations = _prepare_activity(
+            activity, max_duration, durations, dtype, max_gap,
+            chunked=chunk_size is not None)
+
+        target_profiles = []
+        for col in targets:
+            activity_target = activity_data[:, activity.columns.get_loc(col)]
+            if chunk_size is None:
+                power_profile, power_profile_idx = \
+                    kernels.max_mean_power_curve(
+                        activity_target, durations,
+                        pruned=algorithm == 'pruned', clip=col == 'power')
+            else:
+                power_profile, power_profile_idx = \
+                    _max_mean_power_curve_chunked(
+                        kernels, activity_target, durations, chunk_size,
+                        pruned=algorithm == 'pruned', clip=col == 'power')
+            target_profiles.append(_power_profile_series(
+                kernels, power_profile, power_profile_idx, durations,
+                activity_data, activity.columns, col,
+                _start_time(activity),
+                max_duration if interpolate else None, chunk_size))
+
+        if isinstance(target, six.string_types):
+            return target_profiles[0]
+        return pd.concat(target_profiles, axis=1, keys=targets)
+
+    return activities_power_profile(
+        [activity], max_duration=max_duration, durations=durations,
+        interpolate=interpolate, algorithm=algorithm, dtype=dtype,
+        target=targets, max_gap=max_gap, backend=backend)[0]
+
+
+def activities_power_profile(activities, max_duration=None, durations=None,
+                             interpolate=False, algorithm='pruned',
+                             dtype=None, target='power', max_gap=None,
+                             backend=None):
+    """Compute the power profile for several activities at once.
+
+    The power-profiles of all activities are computed with a single call to a
+    parallel kernel which schedules the work over all pairs of activity and
+    duration. It is more efficient than calling
+    :func:`sksports.extraction.activity_power_profile` for each activity when
+    the activities are short.
+
+    Read more in the :ref:`User Guide <activity_power_profile>`.
+
+    Parameters
+    ----------
+    activities : list of DataFrame or SegmentedActivity, or ActivityArchive
+        The activities. Refer to
+        :func:`sksports.extraction.activity_power_profile`. An
+        :class:`sksports.io.ActivityArchive` gives all its activities.
+
+    max_duration : Timedelta, timedelta, np.timedelta64, int, or str, optional
+        The maximum duration for which the power-profile should be computed. By
+        default, it will be computed for the duration of each activity. An
+        integer represents seconds.
+
+    durations : str or array-like, optional
+        The durations for which the power-profile should be computed. Refer to
+        :func:`sksports.extraction.activity_power_profile`.
+
+    interpolate : bool, default=False
+        Whether to linearly interpolate the power-profile computed for
+        ``durations`` on all durations with a step of a second. Only the
+        durations between two valid durations of the grid are interpolated
+        and the other ones, e.g. longer than the largest duration of the
+        grid, are NaN.
+
+    algorithm : str {'pruned', 'brute'}, default='pruned'
+        The algorithm used to find the maximum mean power for each duration.
+        Refer to :func:`sksports.extraction.activity_power_profile`.
+
+    dtype : str or dtype, optional
+        The floating dtype of the power-profile. By default, the dtype of the
+        activities is kept.
+
+    target : str or list of str, default='power'
+        The column(s) for which the maximal mean curve is computed. Refer to
+        :func:`sksports.extraction.activity_power_profile`.
+
+    max_gap : Timedelta, timedelta, np.timedelta64, int, or str, optional
+        The gap above which the samples are not contiguous. Refer to
+        :func:`sksports.extraction.activity_power_profile`.
+
+    backend : str, optional
+        The backend computing the kernels. Refer to
+        :func:`sksports.extraction.activity_power_profile`.
+
+    Returns
+    -------
+    power_profiles : list of Series or list of DataFrame
+        The power-profile of each activity, identical to the output of
+        :func:`sksports.extraction.activity_power_profile`.
+
+    Examples
+    --------
+    >>> from sksports.datasets import load_fit
+    >>> from sksports.io import bikeread
+    >>> from sksports.extraction import activities_power_profile
+    >>> power_profiles = activities_power_profile(
+    ...     [bikeread(filename) for filename in load_fit()])
+    >>> len(power_profiles)
+    3
+
+    """
+    _check_algorithm(algorithm)
+    activities = list(activities)
+    activities_targets = [_check_target(target, activity)
+                          for activity in activities]
+    prepared = [_prepare_activity(activity, max_duration, durations, dtype,
+                                  max_gap)
+                for activity in activities]
+    if not prepared:
+        return []
+    kernels = get_backend(backend)
+    activities_data, max_durations, activities_durations = zip(*prepared)
+
+    # each pair of activity and target is a signal given to the batch kernel
+    signals, signals_durations, signals_clip = [], [], []
+    for activity, activity_data, activity_durations, targets in zip(
+            activities, activities_data, activities_durations,
+            activities_targets):
+        for col in targets:
+            signals.append(
+                activity_data[:, activity.columns.get_loc(col)])
+            signals_durations.append(activity_durations)
+            # only the maximal mean power is never below zero
+            signals_clip.append(col == 'power')
+    offsets = np.cumsum([0] + [signal.size for signal in signals])
+    durations_offsets = np.cumsum(
+        [0] + [duration.size for duration in signals_durations])
+    power_profile, power_profile_idx = kernels.max_mean_power_curve_batch(
+        np.concatenate(signals), offsets.astype(np.intp),
+        np.concatenate(signals_durations).astype(np.intp),
+        durations_offsets.astype(np.intp), pruned=algorithm == 'pruned',
+        clip=np.array(signals_clip, dtype=np.uint8))
+
+    power_profiles = []
+    idx_signal = 0
+    for (activity, activity_data, activity_max_duration, activity_durations,
+         targets) in zip(activities, activities_data, max_durations,
+                         activities_durations, activities_targets):
+        target_profiles = []
+        for col in targets:
+            start, end = durations_offsets[idx_signal:idx_signal + 2]
+            target_profiles.append(_power_profile_series(
+                kernels, power_profile[start:end],
+                power_profile_idx[start:end],
+                activity_durations, activity_data, activity.columns, col,
+                _start_time(activity),
+                activity_max_duration if interpolate else None))
+            idx_signal += 1
+        if isinstance(target, six.string_types):
+            power_profiles.append(target_profiles[0])
+        else:
+            power_profiles.append(
+                pd.concat(target_profiles, axis=1, keys=targets))
+    return power_profiles
+
+
+def activity_fatigue_power_profile(activity, work_thresholds,
+                                   max_duration=None, durations=None,
+                                   algorithm='pruned', dtype=None,
+                                   max_gap=None, backend=None):
+    """Compute the power profile of the efforts following some amount of work.
+
+    For each threshold, the power-profile is computed with only the efforts
+    starting once the work accumulated since the beginning of the activity
+    reaches the threshold. All thresholds are computed in a single call to a
+    parallel kernel which shares the cumulative sum of the power.
+
+    Read more in the :ref:`User Guide <activity_power_profile>`.
+
+    Parameters
+    ----------
+    activity : DataFrame or SegmentedActivity
+        A pandas DataFrame with at least a ``'power'`` column sampled at 1 Hz
+        and the indices are the information about time. The activity can be
+        read with :func:`sksports.io.bikeread`.
+
+    work_thresholds : array-like, shape (n_thresholds,)
+        The work, in kJ, to be done before the efforts start.
+
+    max_duration : Timedelta, timedelta, np.timedelta64, int, or str, optional
+        The maximum duration for which the power-profile should be computed. By
+        default, it will be computed for the duration of the activity. An
+        integer represents seconds.
+
+    durations : str or array-like, optional
+        The durations for which the power-profile should be computed. Refer to
+        :func:`sksports.extraction.activity_power_profile`.
+
+    algorithm : str {'pruned', 'brute'}, default='pruned'
+        The algorithm used to find the maximum mean power for each duration.
+        Refer to :func:`sksports.extraction.activity_power_profile`.
+
+    dtype : str or dtype, optional
+        The floating dtype of the power-profile. By default, the dtype of the
+        activity is kept.
+
+    max_gap : Timedelta, timedelta, np.timedelta64, int, or str, optional
+        The gap above which the samples are not contiguous. Refer to
+        :func:`sksports.extraction.activity_power_profile`.
+
+    backend : str, optional
+        The backend computing the kernels. Refer to
+        :func:`sksports.extraction.activity_power_profile`.
+
+    Returns
+    -------
+    fatigue_power_profile : Series
+        A pandas Series indexed by the threshold and the duration. The power is
+        NaN when no effort of a given duration starts after the threshold.
+
+    Examples
+    --------
+    >>> from sksports.datasets import load_fit
+    >>> from sksports.io import bikeread
+    >>> from sksports.extraction import activity_fatigue_power_profile
+    >>> ride = bikeread(load_fit()[1])
+    >>> fatigue_power_profile = activity_fatigue_power_profile(
+    ...     ride, work_thresholds=[0, 250, 500], durations=[1, 60, 300])
+    >>> fatigue_power_profile # doctest: +NORMALIZE_WHITESPACE
+    0    00:00:01    717.000000
+         00:01:00    360.166667
+         00:05:00    290.878299
+    250  00:00:01    717.000000
+         00:01:00    311.350000
+         00:05:00    209.786667
+    500  00:00:01    717.000000
+         00:01:00    254.800000
+         00:05:00    179.010000
+    Name: 2014-05-11 09:39:38, dtype: float64
+
+    """
+    _check_algorithm(algorithm)
+    work_thresholds = np.atleast_1d(np.asarray(work_thresholds))
+    activity_data, max_duration, durations = _prepare_activity(
+        activity, max_duration, durations, dtype, max_gap)
+
+    # without clipping, the durations without any valid window after the
+    # threshold are NaN instead of zero
+    power_profile, _, _ = get_backend(backend).max_mean_power_curve_work(
+        activity_data[:, activity.columns.get_loc('power')],
+        work_thresholds.astype(np.float64) * 1000, durations,
+        pruned=algorithm == 'pruned', clip=False)
+    power_profile = np.maximum(power_profile, 0)
+
+    return pd.Series(power_profile.ravel(),
+                     index=pd.MultiIndex.from_product(
+                         [work_thresholds,
+                          pd.to_timedelta(durations, unit='s')]),
+                     name=_start_time(activity))
+
+
+def activity_best_efforts(activity, durations, n_efforts=5, dtype=None,
+                          max_gap=None, backend=None):
+    """Find the best non-overlapping efforts of an activity.
+
+    For each duration, the best effort is selected and the efforts overlapping
+    it are discarded before selecting the next best effort. Each selection
+    scans the windows once using the cumulative sum of the power.
+
+    Read more in the :ref:`User Guide <activity_power_profile>`.
+
+    Parameters
+    ----------
+    activity : DataFrame or SegmentedActivity
+        A pandas DataFrame with at least a ``'power'`` column and the indices
+        are the information about time. The activity can be read with
+        :func:`sksports.io.bikeread`.
+
+    durations : str or array-like
+        The durations of the efforts. Refer to
+        :func:`sksports.extraction.activity_power_profile`.
+
+    n_efforts : int, default=5
+        The maximum number of efforts to find for each duration.
+
+    dtype : str or dtype, optional
+        The floating dtype of the efforts. By default, the dtype of the
+        activity is kept.
+
+    max_gap : Timedelta, timedelta, np.timedelta64, int, or str, optional
+        The gap above which the samples are not contiguous. Refer to
+        :func:`sksports.extraction.activity_power_profile`.
+
+    backend : str, optional
+        The backend computing the kernels. Refer to
+        :func:`sksports.extraction.activity_power_profile`.
+
+    Returns
+    -------
+    best_efforts : DataFrame
+        A pandas DataFrame indexed by the duration and the rank of the effort.
+        The column ``'start'`` contains the starting time of the effort and
+        the other columns the mean of each column of the activity during the
+        effort. The durations for which less than ``n_efforts`` efforts fit in
+        the activity contain less rows.
+
+    Examples
+    --------
+    >>> from sksports.datasets import load_fit
+    >>> from sksports.io import bikeread
+    >>> from sksports.extraction import activity_best_efforts
+    >>> ride = bikeread(load_fit()[0])
+    >>> best_efforts = activity_best_efforts(ride, durations=['00:05:00'],
+    ...                                      n_efforts=3)
+    >>> best_efforts['power'] # doctest: +NORMALIZE_WHITESPACE
+    duration  rank
+    00:05:00  1       225.206667
+              2       216.833333
+              3       202.893333
+    Name: power, dtype: float64
+
+    """
+    if not isinstance(n_efforts, Integral) or n_efforts < 1:
+        raise ValueError('"n_efforts" should be a positive integer. Got {}'
+                         ' instead.'.format(n_efforts))
+    activity_data, _, durations = _prepare_activity(activity, None, durations,
+                                                    dtype, max_gap)
+
+    kernels = get_backend(backend)
+    efforts, efforts_idx = kernels.max_mean_power_top_k(
+        activity_data[:, activity.columns.get_loc('power')], durations,
+        n_efforts)
+    mask_effort = efforts_idx >= 0
+    efforts_duration = np.broadcast_to(durations[:, np.newaxis],
+                                       efforts_idx.shape)[mask_effort]
+    efforts_idx = efforts_idx[mask_effort]
+
+    best_efforts = pd.DataFrame(
+        kernels._associated_data_power_profile_2d(
+            activity_data, efforts_idx, efforts_duration).T,
+        columns=activity.columns,
+        index=pd.MultiIndex.from_arrays(
+            [pd.to_timedelta(efforts_duration, unit='s'),
+             np.nonzero(mask_effort)[1] + 1],
+            names=['duration', 'rank']))
+    best_efforts['power'] = efforts[mask_effort]
+    gaps = _activity_gaps(activity, max_gap)
+    if gaps is not None:
+        # remove the missing samples inserted in the gaps from the indices
+        efforts_idx = efforts_idx - np.searchsorted(
+            gaps + np.arange(gaps.size), efforts_idx)
+    best_efforts.insert(0, 'start', activity.index[efforts_idx])
+    return best_efforts
+
+
+def _check_algorithm(algorithm):
+    """Check the algorithm used to compute the power-profile."""
+    if algorithm not in ALGORITHMS:
+        raise ValueError('"algorithm" should be one of {}. Got {} instead.'
+                         .format(ALGORITHMS, algorithm))
+
+
+def _check_target(target, activity):
+    """Check the target column(s) and return them as a list."""
+    targets = ([target] if isinstance(target, six.string_types)
+               else list(target))
+    if not targets:
+        raise ValueError('"target" should contain at least one column.')
+    missing_targets = [col for col in targets if col not in activity.columns]
+    if missing_targets:
+        raise ValueError('"target" should be a column of the activity {}.'
+                         ' Got {} instead.'.format(list(activity.columns),
+                                                   missing_targets))
+    return targets
+
+
+def _find_gaps(index, max_gap):
+    """Find the samples following a gap longer than ``max_gap``."""
+    if isinstance(max_gap, Integral):
+        max_gap = pd.Timedelta(seconds=max_gap)
+    else:
+        max_gap = pd.Timedelta(max_gap)
+    return np.flatnonzero(np.diff(index.values) >
+                          max_gap.to_timedelta64()) + 1
+
+
+def _activity_gaps(activity, max_gap):
+    """Find the samples following a gap, if any, in an activity."""
+    if isinstance(activity, SegmentedActivity):
+        return activity.bounds[1:-1]
+    if max_gap is None:
+        return None
+    return _find_gaps(activity.index, max_gap)
+
+
+def _floating_dtype(values):
+    """Get the dtype in which the kernels receive ``values``."""
+    if values.dtype.kind == 'f':
+        return values.dtype
+    return np.dtype(np.float64)
+
+
+def _start_time(activity):
+    """Get the time of the first sample of an activity."""
+    if isinstance(activity, SegmentedActivity):
+        return activity.starts[0]
+    return pd.Timestamp(activity.index[0])
+
+
+class _RowsWithGaps(object):
+    """Data of an activity extracted by slices of rows.
+
+    The slices are identical to the ones of the array built by
+    :func:`_prepare_activity`, with a missing sample in each gap, without
+    holding the whole array in memory. Only the slices of rows and the
+    selection of a column, ``rows[:, idx]``, are supported.
+
+    """
+
+    def __init__(self, data, gaps=None, dtype=None, column=None):
+        self.data = data
+        self.gaps = (np.zeros(0, dtype=np.intp) if gaps is None
+                     else np.asarray(gaps, dtype=np.intp))
+        self.column = column
+        self.dtype_ = dtype
+        # the dtype of the whole array, even when a column is selected
+        empty = data.iloc[:0]
+        self.dtype = _floating_dtype(
+            (empty if dtype is None else empty.astype(dtype)).values)
+        n_rows = data.shape[0] + self.gaps.size
+        self.shape = ((n_rows,) if column is not None
+                      else (n_rows, data.shape[1]))
+        self.size = int(np.prod(self.shape))
+        # the position of the missing samples in the array
+        self._missing = self.gaps + np.arange(self.gaps.size)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            return _RowsWithGaps(self.data, self.gaps, self.dtype_, key[1])
+        start, stop, _ = key.indices(self.shape[0])
+        # the samples of the activity before ``start`` and ``stop``
+        first = start - np.searchsorted(self._missing, start)
+        last = stop - np.searchsorted(self._missing, stop)
+        rows = (self.data.iloc[first:last] if self.column is None
+                else self.data.iloc[first:last, self.column])
+        if self.dtype_ is not None:
+            rows = rows.astype(self.dtype_, copy=False)
+        values = rows.values.astype(self.dtype, copy=False)
+        missing = self._missing[np.bitwise_and(self._missing >= start,
+                                               self._missing < stop)]
+        if not missing.size:
+            return values
+        return np.insert(values, missing - start - np.arange(missing.size),
+                         np.nan, axis=0)
+
+
+def _prepare_activity(activity, max_duration, durations, dtype,
+                      max_gap=None, chunked=False):
+    """Extract the data required to compute the power-profile.
+
+    If ``max_gap`` is given, or if the activity is segmented, a missing
+    sample is inserted in each gap such that the windows spanning a gap are
+    discarded by the kernels as any window containing missing values. If
+    ``chunked`` is True, the data are extracted by slices of rows when the
+    chunks are processed.
+
+    Returns
+    -------
+    activity_data : ndarray or _RowsWithGaps, shape (n_samples, n_channels)
+        The data of the activity, containing all its columns.
+
+    max_duration : Timedelta
+        The maximum duration bounded by the duration of the activity.
+
+    durations : ndarray, shape (n_durations,)
+        The durations in seconds for which the power-profile is computed.
+
+    """
+    if isinstance(activity, SegmentedActivity):
+        # no window is longer than the longest segment
+        elapsed_time = pd.Timedelta(seconds=int(activity.lengths.max()) - 1)
+    else:
+        elapsed_time = activity.index[-1] - activity.index[0]
+    max_duration = _check_max_duration(max_duration, activity.shape[0],
+                                       elapsed_time)
+
+    if chunked:
+        activity_data = _RowsWithGaps(
+            activity.data if isinstance(activity, SegmentedActivity)
+            else activity, _activity_gaps(activity, max_gap), dtype)
+        return (activity_data, max_duration,
+                _validate_durations(durations,
+                                    int(max_duration.total_seconds())))
+
+    if dtype is not None:
+        activity = activity.astype(dtype, copy=False)
+    if isinstance(activity, SegmentedActivity):
+        activity_data = activity.values_with_gaps()
+    else:
+        activity_data = activity.values
+        if activity_data.dtype.kind != 'f':
+            # the compact integer dtypes of a schema are promoted for the
+            # kernels which only accept floating values
+            activity_data = activity_data.astype(np.float64)
+        if max_gap is not None:
+            activity_data = np.insert(activity_data,
+                                      _find_gaps(activity.index, max_gap),
+                                      np.nan, axis=0)
+
+    return (activity_data, max_duration,
+            _validate_durations(durations,
+                                int(max_duration.total_seconds())))
+
+
+def _max_mean_power_curve_chunked(kernels, activity_power, durations,
+                                  chunk_size, pruned=False, clip=True):
+    """Compute the maximum mean power curve by chunks of samples.
+
+    The windows starting in each chunk are computed from a buffer containing
+    the chunk and the samples required by the largest duration. The
+    cumulative sum is carried from one chunk to the next such that the
+    results are identical to the kernel ``max_mean_power_curve`` of the
+    backend ``kernels``.
+
+    """
+    n_samples = activity_power.size
+    max_sum = np.full(durations.size, 0. if clip else -np.inf)
+    max_sum_idx = np.full(durations.size, 0 if clip else -1, dtype=np.intp)
+    if not durations.size:
+        return max_sum.astype(activity_power.dtype), max_sum_idx
+
+    # the windows starting in a chunk end at most ``durations[-1]`` later
+    buffer_size = chunk_size + durations[-1]
+    cumsum = np.zeros(buffer_size + 1)
+    compensation = np.zeros(buffer_size + 1)
+    n_missing = np.zeros(buffer_size + 1, dtype=np.intp)
+    for start in range(0, n_samples, chunk_size):
+        if start:
+            # carry the state of the cumulative sum at the new start
+            cumsum[0] = cumsum[chunk_size]
+            compensation[0] = compensation[chunk_size]
+            n_missing[0] = n_missing[chunk_size]
+        kernels._update_max_mean_power_curve_chunk(
+            activity_power[start:start + buffer_size], cumsum, compensation,
+            n_missing, chunk_size, start, durations, max_sum, max_sum_idx,
+            pruned=pruned, clip=clip)
+
+    max_sum[max_sum_idx < 0] = np.nan
+    return (max_sum / durations).astype(activity_power.dtype), max_sum_idx
+
+
+def _associated_data_chunked(kernels, activity_data, power_profile_idx,
+                             durations, chunk_size):
+    """Average the data on the windows of the power-profile by chunks."""
+    associated_data = np.empty((activity_data.shape[1], durations.size),
+                               dtype=activity_data.dtype)
+    if not durations.size:
+        return associated_data
+
+    buffer_size = chunk_size + durations[-1]
+    for start in range(0, activity_data.shape[0], chunk_size):
+        mask = np.bitwise_and(power_profile_idx >= start,
+                              power_profile_idx < start + chunk_size)
+        if mask.any():
+            associated_data[:, mask] = \
+                kernels._associated_data_power_profile_2d(
+                    activity_data[start:start + buffer_size],
+                    power_profile_idx[mask] - start, durations[mask])
+    return associated_data
+
+
+def _check_max_duration(max_duration, n_samples, elapsed_time=None):
+    """Convert the maximum duration into a Timedelta.
+
+    The maximum duration is bounded by the elapsed time of the activity, if
+    given.
+
     """
     if max_duration is None:
-        max_duration = pd.Timedelta(seconds=activity.shape[0])
+        max_duration = pd.Timedelta(seconds=n_samples)
     elif isinstance(max_duration, Integral):
         max_duration = pd.Timedelta(seconds=max_duration)
     else:
         max_duration = pd.Timedelta(max_duration)
 
-    max_duration = min(
-        max_duration,
-        activity.index[-1] - activity.index[0] + pd.Timedelta(seconds=1))
-
-    activity_power = activity['power']
-    activity_complement = activity.drop(['power'], axis=1)
-
-    # use the threading backend since we release the GIL.
-    power_profile, power_profile_idx = zip(
-        *[max_mean_power_interval(activity_power.values, duration)
-          for duration in range(1, max_duration.seconds)])
-    power_profile = np.array(power_profile)
-    power_profile_idx = np.array(power_profile_idx)
-
-    series_index = pd.timedelta_range(
-        "00:00:01", timedelta(seconds=max_duration.seconds - 1), freq='s')
-    series_name = pd.Timestamp(activity.index[0])
-
-    # if some additional data are available, we will add them as them on the
-    # side of the power-profile.
-    if not activity_complement.empty:
-        complement_data = {col: pd.Series(
-            _associated_data_power_profile(activity_complement[col].values,
-                                           power_profile_idx,
-                                           np.arange(1, max_duration.seconds,
-                                                     dtype=int)),
-            index=series_index, name=series_name)
-                           for col in activity_complement.columns}
-        complement_data['power'] = pd.Series(power_profile, index=series_index,
-                                             name=series_name)
-        return pd.concat(complement_data)
+    if elapsed_time is None:
+        return max_duration
+    return min(max_duration, elapsed_time + pd.Timedelta(seconds=1))
+
+
+def _power_profile_series(kernels, power_profile, power_profile_idx,
+                          durations, activity_data, columns, target,
+                          series_name, interpolate_max_duration=None,
+                          chunk_size=None, associated_data=None):
+    """Create the power-profile Series from the output of the kernels.
 
+    The data are averaged with the backend ``kernels``. All channels of
+    ``activity_data``, of shape (n_samples, n_channels), are averaged on the
+    windows found for the ``target`` channel whose maximal mean is given by
+    ``power_profile``. If ``interpolate_max_duration`` is given, the
+    power-profile is linearly interpolated between its valid durations on all
+    durations up to this maximum duration. If ``chunk_size`` is given, the
+    data are averaged by chunks of samples. If ``associated_data``, of shape
+    (n_channels, n_durations), is given, these averages are used instead.
+
+    """
+    series_index = pd.to_timedelta(durations, unit='s')
+    order = np.argsort(columns)
+    # the durations without any valid window of the target have no window
+    invalid = power_profile_idx < 0
+    power_profile_idx = np.where(invalid, 0, power_profile_idx)
+    if associated_data is not None:
+        power_profile_block = associated_data[order]
+    elif chunk_size is None:
+        power_profile_block = kernels._associated_data_power_profile_2d(
+            activity_data, power_profile_idx, durations)[order]
+    else:
+        power_profile_block = _associated_data_chunked(
+            kernels, activity_data, power_profile_idx, durations,
+            chunk_size)[order]
+    power_profile_block[:, invalid] = np.nan
+    # the maximal mean of the target is the one found by the kernel
+    power_profile_block[np.flatnonzero(
+        np.asarray(columns)[order] == target)[0]] = power_profile
+    if interpolate_max_duration is not None:
+        series_index_full = pd.timedelta_range(
+            "00:00:01",
+            timedelta(seconds=int(
+                interpolate_max_duration.total_seconds()) - 1),
+            freq='s')
+        power_profile_block = (
+            pd.DataFrame(power_profile_block.T, index=series_index)
+              .reindex(series_index_full)
+              .interpolate('linear', limit_area='inside')
+              .values.T.astype(power_profile_block.dtype))
+        series_index = series_index_full
+
+    if len(columns) > 1:
+        return pd.Series(power_profile_block.ravel(),
+                         index=pd.MultiIndex.from_product(
+                             [np.asarray(columns)[order], series_index]),
+                         name=series_name)
     else:
-        return pd.Series(power_profile, index=series_index, name=series_name)
+        return pd.Series(power_profile_block[0], index=series_index,
+                         name=series_name)
+
+
+class IncrementalPowerProfile(object):
+    """Power-profile of an activity updated as new samples are recorded.
+
+    The power-profile is updated with only the windows ending in the new
+    samples, such that the cost of an update is proportional to the number of
+    new samples instead of the duration of the whole activity. The cumulative
+    sums of all the columns are extended as well, such that the cost of
+    :meth:`power_profile` only depends on the number of durations.
+
+    Read more in the :ref:`User Guide <activity_power_profile>`.
+
+    Parameters
+    ----------
+    max_duration : Timedelta, timedelta, np.timedelta64, int, or str, optional
+        The maximum duration for which the power-profile should be computed. By
+        default, it will be computed for the duration of the activity. An
+        integer represents seconds.
+
+    backend : str, optional
+        The backend computing the kernels. Refer to
+        :func:`sksports.extraction.activity_power_profile`.
+
+    Attributes
+    ----------
+    n_samples_ : int
+        The number of samples accumulated.
+
+    See also
+    --------
+    sksports.extraction.activity_power_profile
+
+    Examples
+    --------
+    >>> from sksports.datasets import load_fit
+    >>> from sksports.io import bikeread
+    >>> from sksports.extraction import IncrementalPowerProfile
+    >>> ride = bikeread(load_fit()[0])
+    >>> incremental_power_profile = IncrementalPowerProfile()
+    >>> for start in range(0, ride.shape[0], 60):
+    ...     _ = incremental_power_profile.update(ride.iloc[start:start + 60])
+    >>> incremental_power_profile.power_profile().head()
+    cadence  00:00:01    78.000000
+             00:00:02    64.000000
+             00:00:03    62.666667
+             00:00:04    62.500000
+             00:00:05    64.400000
+    Name: 2014-05-07 12:26:22, dtype: float64
+
+    """
+
+    def __init__(self, max_duration=None, backend=None):
+        self.max_duration = max_duration
+        self.backend = backend
+        self.n_samples_ = 0
+
+    def update(self, activity):
+        """Add new samples to the activity and update the power-profile.
+
+        Parameters
+        ----------
+        activity : DataFrame
+            The new samples with at least a ``'power'`` column and the indices
+            containing the time information. The columns should be the same
+            for all updates.
+
+        Returns
+        -------
+        self : IncrementalPowerProfile
+            The updated instance.
+
+        """
+        if self.n_samples_ == 0:
+            self._columns = activity.columns
+            self._start_time = activity.index[0]
+            self._dtype = _floating_dtype(activity.values)
+            # one cumulative sum per column, the one of the power being used
+            # to find the windows
+            n_channels = activity.shape[1]
+            self._cumsum = np.zeros((n_channels, 1))
+            self._compensation = np.zeros((n_channels, 1))
+            self._n_missing = np.zeros((n_channels, 1), dtype=np.intp)
+            self._max_sum = np.zeros(0)
+            self._max_sum_idx = np.zeros(0, dtype=np.intp)
+            # the backend is kept since the buffers are specific to it
+            self._kernels = get_backend(self.backend)
+        elif not activity.columns.equals(self._columns):
+            raise ValueError('The columns of the new samples should be {}.'
+                             ' Got {} instead.'.format(
+                                 list(self._columns), list(activity.columns)))
+        if activity.empty:
+            return self
+        self._end_time = activity.index[-1]
+
+        n_samples = self.n_samples_ + activity.shape[0]
+        self._reserve(n_samples)
+        values = activity.values.astype(self._dtype, copy=False)
+
+        # only the durations up to the maximum duration need to be tracked
+        n_durations = min(n_samples, int(_check_max_duration(
+            self.max_duration, n_samples).total_seconds())) - 1
+        for idx_channel, column in enumerate(self._columns):
+            # no duration is tracked for the other columns such that only
+            # their cumulative sum is extended
+            n_tracked = n_durations if column == 'power' else 0
+            self._kernels._update_max_mean_power_curve(
+                values[:, idx_channel], self._cumsum[idx_channel],
+                self._compensation[idx_channel],
+                self._n_missing[idx_channel], self.n_samples_,
+                self._max_sum[:n_tracked], self._max_sum_idx[:n_tracked])
+        self.n_samples_ = n_samples
+
+        return self
+
+    def _reserve(self, n_samples):
+        """Grow the buffers geometrically to store ``n_samples``."""
+        if n_samples + 1 <= self._cumsum.shape[1]:
+            return
+        capacity = max(n_samples + 1, 2 * self._cumsum.shape[1])
+
+        def _grow(array, size):
+            # the samples are along the last axis
+            new_array = np.zeros(array.shape[:-1] + (size,),
+                                 dtype=array.dtype)
+            new_array[..., :array.shape[-1]] = array
+            return new_array
+
+        self._cumsum = _grow(self._cumsum, capacity)
+        self._compensation = _grow(self._compensation, capacity)
+        self._n_missing = _grow(self._n_missing, capacity)
+        self._max_sum = _grow(self._max_sum, capacity - 1)
+        self._max_sum_idx = _grow(self._max_sum_idx, capacity - 1)
+
+    def power_profile(self):
+        """Return the power-profile of the samples accumulated so far.
+
+        Returns
+        -------
+        power_profile : Series
+            A pandas Series containing the power-profile. It is identical to
+            the output of :func:`sksports.extraction.activity_power_profile`
+            applied on all the samples accumulated. The columns are averaged
+            from their cumulative sums such that the cost does not depend on
+            the number of samples.
+
+        """
+        if self.n_samples_ == 0:
+            raise ValueError('No samples were added. Call "update" before to'
+                             ' compute the power-profile.')
+        max_duration = _check_max_duration(
+            self.max_duration, self.n_samples_,
+            self._end_time - self._start_time)
+        durations = np.arange(1, int(max_duration.total_seconds()),
+                              dtype=np.intp)
+        power_profile = self._max_sum[:durations.size] / durations
+        start = self._max_sum_idx[:durations.size]
+        end = start + durations
+        # same arithmetic as the kernels averaging the data of a window
+        associated_data = (
+            ((self._cumsum[:, end] - self._cumsum[:, start]) +
+             (self._compensation[:, end] - self._compensation[:, start])) /
+            durations)
+        associated_data[self._n_missing[:, end] !=
+                        self._n_missing[:, start]] = np.nan
+        return _power_profile_series(
+            self._kernels, power_profile, start, durations, None,
+            self._columns, 'power', pd.Timestamp(self._start_time),
+            associated_data=associated_data.astype(self._dtype))
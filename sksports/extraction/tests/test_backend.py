@@ -0,0 +1,188 @@
+# Authors: Guillaume Lemaitre <g.lemaitre58@gmail.com>
+#          Cedric Lemaitre
+# License: MIT
+
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+from numpy.testing import assert_array_equal
+from pandas.testing import assert_series_equal
+
+from sksports.io import bikeread
+from sksports.datasets import load_fit
+from sksports.extraction import activity_power_profile
+from sksports.extraction import activity_best_efforts
+from sksports.extraction import IncrementalPowerProfile
+from sksports.extraction import available_backends
+from sksports.extraction import get_backend
+from sksports.extraction import register_backend
+from sksports.extraction import select_backend
+from sksports.extraction import backend as backend_module
+from sksports.extraction import _power_profile
+
+
+@pytest.fixture
+def power():
+    rng = np.random.RandomState(42)
+    power = np.round(250 + 80 * rng.randn(2000)).clip(0)
+    power[[100, 101, 1500]] = np.nan
+    return power
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    # the registry is restored after each test
+    monkeypatch.setattr(backend_module, '_BACKENDS',
+                        backend_module._BACKENDS.copy())
+    monkeypatch.setattr(backend_module, '_LOADED_BACKENDS',
+                        backend_module._LOADED_BACKENDS.copy())
+    monkeypatch.setattr(backend_module, '_SELECTED_BACKEND', None)
+    monkeypatch.delenv(backend_module.ENV_BACKEND, raising=False)
+
+
+def test_available_backends():
+    backends = available_backends()
+    assert 'cython' in backends
+    assert 'numpy' in backends
+
+
+@pytest.mark.parametrize("backend", available_backends())
+@pytest.mark.parametrize("pruned", [False, True])
+def test_backend_max_mean_power_curve(power, backend, pruned):
+    durations = np.array([1, 2, 5, 30, 300, 1999, 2000, 2500], dtype=np.intp)
+    kernels = get_backend(backend)
+    for result, expected in zip(
+            kernels.max_mean_power_curve(power, durations, pruned=pruned),
+            _power_profile.max_mean_power_curve(power, durations)):
+        assert_array_equal(result, expected)
+
+    offsets = np.array([0, 500, 2000], dtype=np.intp)
+    durations_offsets = np.array([0, 4, 8], dtype=np.intp)
+    for result, expected in zip(
+            kernels.max_mean_power_curve_batch(
+                power, offsets, durations, durations_offsets, pruned=pruned),
+            _power_profile.max_mean_power_curve_batch(
+                power, offsets, durations, durations_offsets)):
+        assert_array_equal(result, expected)
+
+    work_thresholds = np.array([0., 1e4, 2e5, 1e9])
+    for clip in (True, False):
+        for result, expected in zip(
+                kernels.max_mean_power_curve_work(
+                    power, work_thresholds, durations, pruned=pruned,
+                    clip=clip),
+                _power_profile.max_mean_power_curve_work(
+                    power, work_thresholds, durations, clip=clip)):
+            assert_array_equal(result, expected)
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_backend_top_k_associated_data(power, backend):
+    kernels = get_backend(backend)
+    durations = np.array([1, 10, 600], dtype=np.intp)
+    for result, expected in zip(
+            kernels.max_mean_power_top_k(power, durations, 4),
+            _power_profile.max_mean_power_top_k(power, durations, 4)):
+        assert_array_equal(result, expected)
+
+    rng = np.random.RandomState(0)
+    data = rng.randn(power.size, 3)
+    data[10, 1] = np.nan
+    pp_index = np.array([0, 5, 1000], dtype=np.intp)
+    durations = np.array([1, 20, 1000], dtype=np.intp)
+    assert_allclose(
+        kernels._associated_data_power_profile_2d(data, pp_index, durations),
+        _power_profile._associated_data_power_profile_2d(data, pp_index,
+                                                         durations))
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_backend_public_functions(backend):
+    activity = bikeread(load_fit()[0])
+    assert_series_equal(
+        activity_power_profile(activity, durations='log', backend=backend),
+        activity_power_profile(activity, durations='log', backend='cython'))
+    assert_series_equal(
+        activity_power_profile(activity, durations='log', chunk_size=1000,
+                               backend=backend),
+        activity_power_profile(activity, durations='log', backend='cython'))
+    best_efforts = activity_best_efforts(activity, durations=[60, 300],
+                                         backend=backend)
+    best_efforts_cython = activity_best_efforts(activity, durations=[60, 300],
+                                                backend='cython')
+    assert_array_equal(best_efforts['start'], best_efforts_cython['start'])
+    assert_allclose(best_efforts['power'], best_efforts_cython['power'])
+
+    power_profile = IncrementalPowerProfile(max_duration=600, backend=backend)
+    for start in range(0, activity.shape[0], 500):
+        power_profile.update(activity.iloc[start:start + 500])
+    assert_series_equal(
+        power_profile.power_profile().loc['power'],
+        activity_power_profile(activity, max_duration=600).loc['power'])
+
+
+def test_get_backend_env(registry, monkeypatch):
+    monkeypatch.setenv(backend_module.ENV_BACKEND, 'numpy')
+    assert get_backend().name == 'numpy'
+    # the backend given at call time takes precedence
+    assert get_backend('cython').name == 'cython'
+
+
+def test_get_backend_auto(registry):
+    assert get_backend('auto').name in available_backends()
+    assert select_backend(n_repeats=1) in available_backends()
+
+
+def _load_unavailable():
+    raise ImportError('missing dependency')
+
+
+@pytest.mark.parametrize(
+    "backend, err_msg",
+    [(1, '"backend" should be a string'),
+     ('fortran', '"backend" should be one of'),
+     ('unavailable', 'is not available: missing dependency')]
+)
+def test_get_backend_error(registry, backend, err_msg):
+    register_backend('unavailable', _load_unavailable)
+    assert 'unavailable' not in available_backends()
+    with pytest.raises(ValueError, match=err_msg):
+        get_backend(backend)
+
+
+class _WrongBackend(object):
+    name = 'wrong'
+
+    def max_mean_power_curve(self, activity_power, durations, pruned=False):
+        return (np.zeros(len(durations)),
+                np.zeros(len(durations), dtype=np.intp))
+
+
+def test_select_backend_discard(registry):
+    register_backend('wrong', _WrongBackend)
+    with pytest.warns(UserWarning, match="'wrong' is discarded"):
+        assert select_backend(n_repeats=1) != 'wrong'
+
+
+class _WrongTopK(type(get_backend('numpy'))):
+    name = 'wrong-top-k'
+
+    def max_mean_power_top_k(self, activity_power, durations, n_efforts):
+        # the efforts are rounded as if the data were integers
+        efforts, efforts_idx = super(_WrongTopK, self).max_mean_power_top_k(
+            activity_power, durations, n_efforts)
+        return np.round(efforts), efforts_idx
+
+
+def test_select_backend_discard_kernel(registry):
+    register_backend('wrong-top-k', _WrongTopK)
+    with pytest.warns(UserWarning, match="'max_mean_power_top_k'"):
+        assert select_backend(n_repeats=1) != 'wrong-top-k'
+
+
+def test_select_backend_tolerance():
+    power, durations = backend_module._benchmark_data()
+    reference = get_backend('cython')
+    for backend in available_backends():
+        assert backend_module._check_kernels(
+            get_backend(backend), reference, power, durations) == []
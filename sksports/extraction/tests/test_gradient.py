@@ -9,11 +9,14 @@ import pandas as pd
 
 import pytest
 
+from numpy.testing import assert_allclose
+
 from sksports.extraction import acceleration
 from sksports.extraction import gradient_activity
 from sksports.extraction import gradient_elevation
 from sksports.extraction import gradient_heart_rate
 from sksports.exceptions import MissingDataError
+from sksports.io import SegmentedActivity
 
 
 def test_acceleration_error():
@@ -99,3 +102,44 @@ def test_gradient_activity(activity, periods, append, columns, shape):
     output = gradient_activity(activity, periods=periods, append=append,
                                columns=columns)
     assert output.shape == shape
+
+
+def _segmented_activity():
+    # two segments separated by a stop of 10 minutes
+    index = (pd.date_range('2014-05-07 12:00:00', periods=50, freq='s')
+             .append(pd.date_range('2014-05-07 12:10:50', periods=50,
+                                   freq='s')))
+    rng = np.random.RandomState(0)
+    return pd.DataFrame(rng.random_sample((100, 4)), index=index,
+                        columns=['speed', 'elevation', 'distance',
+                                 'heart-rate'])
+
+
+@pytest.mark.parametrize(
+    "gradient, column",
+    [(acceleration, 'acceleration'),
+     (gradient_elevation, 'gradient-elevation'),
+     (gradient_heart_rate, 'gradient-heart-rate')])
+def test_gradient_segmented_activity(gradient, column):
+    activity = _segmented_activity()
+    segmented = SegmentedActivity.from_frame(activity)
+    output = gradient(segmented, append=False)
+    assert isinstance(output, SegmentedActivity)
+    # no gradient spans the gap between the segments
+    expected = pd.concat([gradient(segment, append=False)
+                          for segment in segmented.iter_segments()])
+    assert_allclose(output.data[column], expected.values)
+    appended = gradient(segmented)
+    assert appended.columns[-1] == column
+    assert_allclose(appended.data[column], expected.values)
+
+
+def test_gradient_activity_segmented_activity():
+    activity = _segmented_activity()
+    segmented = SegmentedActivity.from_frame(activity)
+    output = gradient_activity(segmented, periods=[1, 5])
+    assert isinstance(output, SegmentedActivity)
+    expected = pd.concat([gradient_activity(segment, periods=[1, 5])
+                          for segment in segmented.iter_segments()])
+    assert output.columns.equals(expected.columns)
+    assert_allclose(output.values, expected.values)
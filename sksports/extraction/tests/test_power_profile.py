@@ -4,11 +4,30 @@
 
 from datetime import timedelta
 
+import numpy as np
+import pandas as pd
 import pytest
+from pandas.testing import assert_frame_equal
+from pandas.testing import assert_series_equal
 
+from sksports.io import SegmentedActivity
 from sksports.io import bikeread
 from sksports.datasets import load_fit
 from sksports.extraction import activity_power_profile
+from sksports.extraction import activities_power_profile
+from sksports.extraction import IncrementalPowerProfile
+from sksports.extraction import activity_fatigue_power_profile
+from sksports.extraction import activity_best_efforts
+from sksports.extraction.power_profile import _prepare_activity
+from sksports.extraction._power_profile import max_mean_power_interval
+from sksports.extraction._power_profile import max_mean_power_interval_cumsum
+from sksports.extraction._power_profile import max_mean_power_curve
+from sksports.extraction._power_profile import max_mean_power_curve_work
+from sksports.extraction._power_profile import max_mean_power_top_k
+from sksports.extraction._power_profile import _cumulative_sum
+from sksports.extraction._power_profile import _associated_data_power_profile
+from sksports.extraction._power_profile import \
+    _associated_data_power_profile_2d
 
 
 @pytest.mark.parametrize(
@@ -26,6 +45,57 @@ def test_activity_power_profile(max_duration, power_profile_shape,
     assert power_profile.iloc[-1] == pytest.approx(first_element)
 
 
+@pytest.mark.parametrize(
+    "durations, expected_index",
+    [([1, 5, 60, 100000], ['00:00:01', '00:00:05', '00:01:00']),
+     (['00:01:00', '00:00:05'], ['00:00:05', '00:01:00']),
+     ('wko', ['00:00:01', '00:00:05', '00:00:30', '00:01:00', '00:03:00',
+              '00:03:30', '00:04:00', '00:04:30', '00:05:00', '00:05:30',
+              '00:06:00', '00:06:30', '00:07:00', '00:10:00', '00:20:00',
+              '00:30:00'])]
+)
+def test_activity_power_profile_durations(durations, expected_index):
+    activity = bikeread(load_fit()[0])
+    power_profile = activity_power_profile(activity)
+    power_profile_grid = activity_power_profile(activity,
+                                                durations=durations)
+    assert (power_profile_grid.loc['power'].index.tolist() ==
+            pd.to_timedelta(expected_index).tolist())
+    assert_series_equal(power_profile_grid,
+                        power_profile.loc[power_profile_grid.index])
+
+
+def test_activity_power_profile_durations_log():
+    activity = bikeread(load_fit()[0])
+    power_profile = activity_power_profile(activity, durations='log')
+    assert power_profile.loc['power'].index[0] == pd.Timedelta(seconds=1)
+    assert power_profile.loc['power'].index.is_monotonic_increasing
+    assert power_profile.shape[0] < 6 * 100
+
+
+def test_activity_power_profile_durations_interpolate():
+    activity = bikeread(load_fit()[0])
+    power_profile = activity_power_profile(activity)
+    power_profile_grid = activity_power_profile(activity, durations='wko',
+                                                interpolate=True)
+    assert power_profile_grid.shape == power_profile.shape
+    knots = pd.to_timedelta(['00:00:05', '00:05:00'])
+    assert_series_equal(power_profile_grid.loc['power'].loc[knots],
+                        power_profile.loc['power'].loc[knots])
+    # only the durations between two durations of the grid are interpolated
+    power_profile_grid = activity_power_profile(activity, durations=[1, 60],
+                                                interpolate=True)
+    power_profile_grid = power_profile_grid.loc['power']
+    assert power_profile_grid.iloc[:60].notnull().all()
+    assert power_profile_grid.iloc[60:].isnull().all()
+
+
+def test_activity_power_profile_durations_error():
+    activity = bikeread(load_fit()[0])
+    with pytest.raises(ValueError, match='"durations" should be one of'):
+        activity_power_profile(activity, durations='linear')
+
+
 def test_activity_power_profile_max_duration_too_large():
     # test that there is no segmentation fault when max_duration is set too
     # large and that we fall back to the largest possible interval.
@@ -33,3 +103,472 @@ def test_activity_power_profile_max_duration_too_large():
     power_profile = activity_power_profile(activity, max_duration=1000000)
     assert power_profile.shape == (13536,)
     assert power_profile.iloc[-1] == pytest.approx(8.2117765957446736)
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_max_mean_power_interval_cumsum(dtype):
+    rng = np.random.RandomState(42)
+    power = rng.randint(0, 1000, size=500).astype(dtype)
+    power[[10, 250]] = np.nan
+    cumsum, compensation, n_missing = _cumulative_sum(power)
+    for duration in (1, 2, 30, 200):
+        assert (max_mean_power_interval_cumsum(cumsum, compensation,
+                                               n_missing, duration) ==
+                max_mean_power_interval(power, duration))
+
+
+def test_associated_data_power_profile_2d():
+    rng = np.random.RandomState(42)
+    data = rng.rand(500, 3) * 100
+    data[[10, 250], 1] = np.nan
+    durations = np.array([1, 2, 30, 200], dtype=np.intp)
+    pp_index = rng.randint(0, 300, size=durations.size).astype(np.intp)
+    associated_data = _associated_data_power_profile_2d(
+        data, pp_index, durations)
+    assert associated_data.shape == (3, durations.size)
+    for channel in range(data.shape[1]):
+        np.testing.assert_allclose(
+            associated_data[channel],
+            _associated_data_power_profile(
+                np.ascontiguousarray(data[:, channel]), pp_index, durations))
+
+
+@pytest.mark.parametrize(
+    "power",
+    [np.random.RandomState(0).randint(0, 1000, size=2000).astype(float),
+     np.round(200 + 20 * np.random.RandomState(0).randn(5000)),
+     np.random.RandomState(0).rand(3000) * 400,
+     np.full(1000, 150.),
+     np.zeros(100)])
+def test_max_mean_power_curve_pruned(power):
+    durations = np.arange(1, power.size, dtype=np.intp)
+    power_profile, power_profile_idx = max_mean_power_curve(power, durations)
+    power_profile_pruned, power_profile_idx_pruned = max_mean_power_curve(
+        power, durations, pruned=True)
+    np.testing.assert_array_equal(power_profile_pruned, power_profile)
+    np.testing.assert_array_equal(power_profile_idx_pruned,
+                                  power_profile_idx)
+
+
+def test_activity_power_profile_algorithm():
+    activity = bikeread(load_fit()[0])
+    assert_series_equal(activity_power_profile(activity, algorithm='pruned'),
+                        activity_power_profile(activity, algorithm='brute'))
+    with pytest.raises(ValueError, match='"algorithm" should be one of'):
+        activity_power_profile(activity, algorithm='exhaustive')
+
+
+@pytest.mark.parametrize("max_duration", [None, 100])
+@pytest.mark.parametrize("chunk_size", [1, 7, 600])
+def test_incremental_power_profile(max_duration, chunk_size):
+    activity = bikeread(load_fit()[0]).iloc[:1200]
+    incremental_power_profile = IncrementalPowerProfile(
+        max_duration=max_duration)
+    for start in range(0, activity.shape[0], chunk_size):
+        incremental_power_profile.update(
+            activity.iloc[start:start + chunk_size])
+        if start % 210 == 0 or start + chunk_size >= activity.shape[0]:
+            n_samples = incremental_power_profile.n_samples_
+            assert_series_equal(
+                incremental_power_profile.power_profile(),
+                activity_power_profile(activity.iloc[:n_samples],
+                                       max_duration=max_duration),
+                check_exact=True)
+    assert incremental_power_profile.n_samples_ == activity.shape[0]
+
+
+def test_incremental_power_profile_error():
+    activity = bikeread(load_fit()[0])
+    incremental_power_profile = IncrementalPowerProfile()
+    with pytest.raises(ValueError, match='No samples were added'):
+        incremental_power_profile.power_profile()
+    incremental_power_profile.update(activity.iloc[:10])
+    with pytest.raises(ValueError, match='The columns of the new samples'):
+        incremental_power_profile.update(activity.iloc[10:20, :2])
+
+
+@pytest.mark.parametrize("durations", [None, 'wko'])
+def test_activity_power_profile_dtype(durations):
+    activity = bikeread(load_fit()[0])
+    power_profile = activity_power_profile(activity, durations=durations)
+    power_profile_32 = activity_power_profile(activity, durations=durations,
+                                              dtype=np.float32)
+    assert power_profile_32.dtype == np.float32
+    np.testing.assert_allclose(power_profile_32, power_profile, rtol=1e-5)
+    power_profile_32 = activity_power_profile(
+        bikeread(load_fit()[0], dtype=np.float32), durations=durations,
+        interpolate=True)
+    assert power_profile_32.dtype == np.float32
+
+
+@pytest.mark.parametrize(
+    "algorithm, max_duration, durations",
+    [('pruned', None, None),
+     ('brute', 300, None),
+     ('pruned', None, 'wko')])
+def test_activities_power_profile(algorithm, max_duration, durations):
+    activities = [bikeread(filename) for filename in load_fit()]
+    # add a short activity and an activity without complementary data
+    activities += [activities[0].iloc[:10], activities[1][['power']]]
+    power_profiles = activities_power_profile(
+        activities, max_duration=max_duration, durations=durations,
+        algorithm=algorithm)
+    assert len(power_profiles) == len(activities)
+    for activity, power_profile in zip(activities, power_profiles):
+        assert_series_equal(
+            power_profile,
+            activity_power_profile(activity, max_duration=max_duration,
+                                   durations=durations, algorithm=algorithm))
+
+
+def test_activities_power_profile_empty():
+    assert activities_power_profile([]) == []
+
+
+def test_max_mean_power_curve():
+    rng = np.random.RandomState(42)
+    power = rng.randint(0, 1000, size=500).astype(np.float64)
+    durations = np.arange(1, power.size, dtype=np.intp)
+    power_profile, power_profile_idx = max_mean_power_curve(power, durations)
+    expected_profile, expected_idx = zip(
+        *[max_mean_power_interval(power, d) for d in durations])
+    np.testing.assert_allclose(power_profile, expected_profile)
+    np.testing.assert_array_equal(power_profile_idx, expected_idx)
+
+
+@pytest.mark.parametrize("target", ['speed', 'cadence', 'vam'])
+def test_activity_power_profile_target(target):
+    activity = bikeread(load_fit()[0])
+    activity['vam'] = activity['elevation'].diff().fillna(0) * 3600
+    power_profile = activity_power_profile(activity, max_duration=600,
+                                           target=target)
+    durations = [1, 10, 100, 599]
+    # the windows are starting before the last sample
+    expected = [activity[target].rolling(duration).mean()
+                .values[duration - 1:-1].max()
+                for duration in durations]
+    np.testing.assert_allclose(
+        power_profile.loc[target].loc[pd.to_timedelta(durations, unit='s')],
+        expected)
+    # the power is reported as the data associated with the target
+    assert 'power' in power_profile.index.levels[0]
+
+
+@pytest.mark.parametrize("backend", ['cython', 'numpy'])
+@pytest.mark.parametrize("algorithm", ['pruned', 'brute'])
+@pytest.mark.parametrize("chunk_size", [None, 100])
+def test_activity_power_profile_target_negative(backend, algorithm,
+                                                chunk_size):
+    # a descent: the vertical speed is always negative
+    activity = bikeread(load_fit()[0]).iloc[:600]
+    activity['vam'] = -np.arange(1, 601, dtype=np.float64)
+    activity['missing'] = np.nan
+    durations = [1, 10, 100]
+    power_profile = activity_power_profile(
+        activity, durations=durations, target='vam', algorithm=algorithm,
+        chunk_size=chunk_size, backend=backend)
+    # the best windows start at the first sample and not at a clipped zero
+    expected_vam = [-(duration + 1) / 2 for duration in durations]
+    expected_power = [activity['power'].iloc[:duration].mean()
+                      for duration in durations]
+    np.testing.assert_allclose(power_profile.loc['vam'], expected_vam)
+    np.testing.assert_allclose(power_profile.loc['power'], expected_power)
+    assert_series_equal(
+        activities_power_profile([activity], durations=durations,
+                                 target=['vam'], algorithm=algorithm,
+                                 backend=backend)[0]['vam'],
+        power_profile, check_names=False)
+
+    # no window is valid when the channel is missing
+    power_profile = activity_power_profile(
+        activity, durations=durations, target='missing', algorithm=algorithm,
+        chunk_size=chunk_size, backend=backend)
+    assert power_profile.isnull().all()
+    power_profile = activities_power_profile(
+        [activity], durations=durations, target=['missing', 'power'],
+        algorithm=algorithm, backend=backend)[0]
+    assert power_profile['missing'].isnull().all()
+    assert (power_profile['power'].loc['power'] > 0).all()
+
+
+def test_activity_power_profile_several_targets():
+    activity = bikeread(load_fit()[0])
+    targets = ['power', 'cadence', 'speed']
+    power_profiles = activity_power_profile(activity, max_duration=600,
+                                            durations='log', target=targets)
+    assert isinstance(power_profiles, pd.DataFrame)
+    assert power_profiles.columns.tolist() == targets
+    for target in targets:
+        assert_series_equal(
+            power_profiles[target],
+            activity_power_profile(activity, max_duration=600,
+                                   durations='log', target=target),
+            check_names=False)
+    power_profiles = activities_power_profile([activity, activity],
+                                              max_duration=600,
+                                              target=targets)
+    assert len(power_profiles) == 2
+    assert power_profiles[0].equals(power_profiles[1])
+
+
+def test_activity_power_profile_target_error():
+    activity = bikeread(load_fit()[0])
+    with pytest.raises(ValueError, match="should be a column"):
+        activity_power_profile(activity, target='vam')
+    with pytest.raises(ValueError, match="at least one column"):
+        activity_power_profile(activity, target=[])
+
+
+@pytest.mark.parametrize("pruned", [True, False])
+def test_max_mean_power_curve_work(pruned):
+    rng = np.random.RandomState(0)
+    power = np.round(200 + 50 * rng.randn(3000)).clip(0)
+    power[[100, 2000]] = np.nan
+    durations = np.arange(1, power.size, dtype=np.intp)
+    work_thresholds = np.array([0, 1e5, 3e5, 5.8e5, 1e9])
+    power_profile, power_profile_idx, work_idx = max_mean_power_curve_work(
+        power, work_thresholds, durations, pruned=pruned)
+    cumulative_work = np.concatenate([[0], np.nancumsum(power)])
+    for threshold, pp, pp_idx, start in zip(
+            work_thresholds, power_profile, power_profile_idx, work_idx):
+        assert start == min(np.searchsorted(cumulative_work, threshold),
+                            power.size)
+        expected_pp, expected_pp_idx = max_mean_power_curve(
+            power[start:], durations, pruned=pruned)
+        np.testing.assert_array_equal(pp, expected_pp)
+        np.testing.assert_array_equal(pp_idx, expected_pp_idx + start)
+
+
+def test_activity_fatigue_power_profile():
+    activity = bikeread(load_fit()[1])
+    fatigue_power_profile = activity_fatigue_power_profile(
+        activity, [0, 250, 1000], max_duration=600)
+    assert fatigue_power_profile.shape == (3 * 599,)
+    assert_series_equal(
+        fatigue_power_profile.loc[0],
+        activity_power_profile(activity, max_duration=600).loc['power'])
+    # the profile is decreasing with the work done before the efforts
+    assert (fatigue_power_profile.loc[250] <=
+            fatigue_power_profile.loc[0]).all()
+    # the threshold is never reached
+    assert fatigue_power_profile.loc[1000].isnull().all()
+
+
+@pytest.mark.parametrize("backend", ['cython', 'numpy'])
+@pytest.mark.parametrize("algorithm", ['pruned', 'brute'])
+def test_activity_fatigue_power_profile_missing(backend, algorithm):
+    # after the first minute, a sample out of five is missing
+    power = np.full(600, 300.)
+    power[60::5] = np.nan
+    activity = pd.DataFrame(
+        {'power': power},
+        index=pd.date_range('2018-01-01', periods=600, freq='s'))
+    fatigue_power_profile = activity_fatigue_power_profile(
+        activity, [0, 18], durations=[1, 4, 5, 60], algorithm=algorithm,
+        backend=backend)
+    np.testing.assert_array_equal(fatigue_power_profile.loc[0], [300] * 4)
+    # no window longer than four seconds is free of missing values after
+    # the threshold
+    np.testing.assert_array_equal(fatigue_power_profile.loc[18],
+                                  [300, 300, np.nan, np.nan])
+
+
+@pytest.mark.parametrize("algorithm", ['pruned', 'brute'])
+@pytest.mark.parametrize("chunk_size", [1, 17, 600, 10000])
+@pytest.mark.parametrize("max_duration, durations",
+                         [(None, None), (600, None), (None, 'log')])
+def test_activity_power_profile_chunk_size(algorithm, chunk_size,
+                                           max_duration, durations):
+    activity = bikeread(load_fit()[0])
+    power_profile = activity_power_profile(
+        activity, max_duration=max_duration, durations=durations,
+        algorithm=algorithm)
+    power_profile_chunked = activity_power_profile(
+        activity, max_duration=max_duration, durations=durations,
+        algorithm=algorithm, chunk_size=chunk_size)
+    assert_series_equal(power_profile_chunked.loc['power'],
+                        power_profile.loc['power'], check_exact=True)
+    assert_series_equal(power_profile_chunked, power_profile)
+
+
+def test_activity_power_profile_multi_day():
+    # durations longer than a day should not wrap around
+    n_samples = 86400 + 3600
+    rng = np.random.RandomState(42)
+    activity = pd.DataFrame(
+        {'power': np.round(200 + 50 * rng.randn(n_samples)).clip(0)},
+        index=pd.date_range('2018-01-01', periods=n_samples, freq='s'))
+    durations = [1, 3600, 86400 + 60]
+    power_profile = activity_power_profile(activity, durations=durations)
+    assert power_profile.index.tolist() == pd.to_timedelta(
+        durations, unit='s').tolist()
+    assert power_profile.iloc[-1] == pytest.approx(
+        activity['power'].iloc[:-1].rolling(86400 + 60).mean().max())
+    power_profile_chunked = activity_power_profile(
+        activity, durations=durations, chunk_size=3600)
+    assert_series_equal(power_profile_chunked, power_profile,
+                        check_exact=True)
+
+
+@pytest.mark.parametrize("dtype", [None, np.float32])
+@pytest.mark.parametrize("segmented", [False, True])
+def test_prepare_activity_chunked(dtype, segmented):
+    rng = np.random.RandomState(42)
+    index = pd.date_range('2018-01-01', periods=100, freq='s')
+    index = index.where(np.arange(100) < 30, index + pd.Timedelta('1H'))
+    index = index.where(np.arange(100) < 31, index + pd.Timedelta('1H'))
+    activity = pd.DataFrame(
+        {'power': rng.randint(0, 500, 100).astype(np.uint16),
+         'speed': rng.rand(100)}, index=index)
+    if segmented:
+        activity = SegmentedActivity.from_frame(activity)
+    activity_data = _prepare_activity(activity, None, None, dtype,
+                                      max_gap=60)[0]
+    rows = _prepare_activity(activity, None, None, dtype, max_gap=60,
+                             chunked=True)[0]
+    assert rows.shape == activity_data.shape
+    assert rows.dtype == activity_data.dtype
+    for start, stop in [(0, 102), (0, 30), (25, 35), (30, 32), (31, 90),
+                        (95, 200)]:
+        np.testing.assert_allclose(rows[start:stop],
+                                   activity_data[start:stop])
+        np.testing.assert_allclose(rows[:, 0][start:stop],
+                                   activity_data[start:stop, 0])
+
+
+def test_activity_power_profile_chunk_size_error():
+    activity = bikeread(load_fit()[0])
+    with pytest.raises(ValueError, match="positive integer"):
+        activity_power_profile(activity, chunk_size=0)
+
+
+def _greedy_top_k(power, duration, n_efforts):
+    window_sum = pd.Series(power).rolling(duration).sum().values[duration - 1:]
+    window_sum = window_sum[:power.size - duration]
+    efforts_idx = []
+    for _ in range(n_efforts):
+        if np.all(np.isnan(window_sum)):
+            break
+        idx = np.nanargmax(window_sum)
+        efforts_idx.append(idx)
+        window_sum[max(idx - duration + 1, 0):idx + duration] = np.nan
+    return efforts_idx
+
+
+def test_max_mean_power_top_k():
+    rng = np.random.RandomState(0)
+    power = np.round(200 + 50 * rng.randn(2000)).clip(0)
+    power[[100, 1500]] = np.nan
+    durations = np.array([1, 5, 60, 300, 700, 1000, 1999], dtype=np.intp)
+    efforts, efforts_idx = max_mean_power_top_k(power, durations, 5)
+    assert efforts.shape == efforts_idx.shape == (durations.size, 5)
+    for duration, effort, effort_idx in zip(durations, efforts, efforts_idx):
+        expected_idx = _greedy_top_k(power, duration, 5)
+        n_found = len(expected_idx)
+        np.testing.assert_array_equal(effort_idx[:n_found], expected_idx)
+        assert np.all(effort_idx[n_found:] == -1)
+        assert np.all(np.isnan(effort[n_found:]))
+        assert np.all(np.diff(effort[:n_found]) <= 0)
+
+
+def test_activity_best_efforts():
+    activity = bikeread(load_fit()[0])
+    durations = [1, 300, 1200, 2000]
+    best_efforts = activity_best_efforts(activity, durations=durations,
+                                         n_efforts=3)
+    assert best_efforts.columns.tolist() == ['start'] + list(activity.columns)
+    assert best_efforts.index.names == ['duration', 'rank']
+    assert (best_efforts.groupby(level='duration').size().tolist() ==
+            [3, 3, 1, 1])
+    # the best effort is the one found by the power-profile
+    power_profile = activity_power_profile(activity, durations=durations)
+    best_effort = best_efforts.xs(1, level='rank')
+    for col in activity.columns:
+        assert_series_equal(best_effort[col], power_profile.loc[col],
+                            check_names=False)
+    # the efforts are not overlapping
+    for duration, efforts in best_efforts.groupby(level='duration'):
+        start = efforts['start'].sort_values()
+        assert (start.diff().dropna() >= duration).all()
+
+
+def test_activity_best_efforts_error():
+    activity = bikeread(load_fit()[0])
+    with pytest.raises(ValueError, match="positive integer"):
+        activity_best_efforts(activity, durations=[60], n_efforts=0)
+
+
+def test_activity_power_profile_max_gap():
+    # on data without gaps, the power-profile is unchanged
+    activity = bikeread(load_fit()[0])
+    assert_series_equal(
+        activity_power_profile(activity, durations='log', max_gap=60),
+        activity_power_profile(activity, durations='log'))
+
+    rng = np.random.RandomState(42)
+    power = np.round(200 + 50 * rng.randn(700)).clip(0)
+    index = pd.date_range('2018-01-01', periods=700, freq='s')
+    # a stop of an hour after 300 seconds
+    index = index.where(np.arange(700) < 300, index + pd.Timedelta('1H'))
+    activity = pd.DataFrame({'power': power}, index=index)
+    durations = np.array([1, 10, 200, 350])
+    for chunk_size in (None, 50):
+        power_profile = activity_power_profile(
+            activity, durations=durations, max_gap=60, chunk_size=chunk_size)
+        for duration, value in zip(durations, power_profile):
+            # the windows start before the last sample and do not span the gap
+            expected = max([power[start:start + duration].mean()
+                            for start in range(700 - duration)
+                            if start + duration <= 300 or start >= 300])
+            assert value == pytest.approx(expected)
+
+    best_efforts = activity_best_efforts(activity, durations=[200],
+                                         n_efforts=5, max_gap=60)
+    assert best_efforts.shape[0] in (2, 3)
+    assert best_efforts['start'].isin(index).all()
+    for start in best_efforts['start']:
+        end = start + pd.Timedelta(seconds=199)
+        assert (start >= index[300]) or (end < index[300])
+
+
+def test_activity_power_profile_segmented_activity():
+    activity = bikeread(load_fit()[2], max_gap=60)
+    segmented = SegmentedActivity.from_frame(activity)
+    max_length = segmented.lengths.max()
+    # the durations are bounded by the longest segment
+    power_profile = activity_power_profile(segmented)
+    expected = activity_power_profile(activity, max_gap=60)
+    assert power_profile.index.get_level_values(1).max() == \
+        pd.Timedelta(seconds=max_length - 1)
+    assert_series_equal(power_profile, expected.loc[power_profile.index])
+    assert_series_equal(activities_power_profile([segmented])[0],
+                        power_profile)
+    assert_series_equal(
+        activity_fatigue_power_profile(segmented, [0, 100],
+                                       durations=[1, 60]),
+        activity_fatigue_power_profile(activity, [0, 100], durations=[1, 60],
+                                       max_gap=60))
+    best_efforts = activity_best_efforts(segmented, durations=[60, 300])
+    assert_frame_equal(
+        best_efforts,
+        activity_best_efforts(activity, durations=[60, 300], max_gap=60))
+
+
+def test_activity_power_profile_compact_dtypes():
+    # the schema keeps integer dtypes on a fully sampled activity
+    activity = bikeread(load_fit()[0])[['power', 'cadence']].iloc[:600]
+    activity = activity.interpolate().fillna(0).round()
+    compact = activity.astype({'power': np.uint16, 'cadence': np.uint8})
+    assert compact['power'].dtype == np.uint16
+    expected = activity_power_profile(activity)
+    assert_series_equal(activity_power_profile(compact), expected)
+    assert_series_equal(activities_power_profile([compact, compact])[1],
+                        expected)
+    assert_series_equal(activity_power_profile(compact, dtype=np.float32),
+                        activity_power_profile(activity, dtype=np.float32))
+    assert_series_equal(activity_power_profile(compact[['power']]),
+                        activity_power_profile(activity[['power']]))
+    incremental_power_profile = IncrementalPowerProfile()
+    for start in range(0, compact.shape[0], 100):
+        incremental_power_profile.update(compact.iloc[start:start + 100])
+    assert_series_equal(incremental_power_profile.power_profile(), expected)
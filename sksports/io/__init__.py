@@ -6,6 +6,22 @@ The :mod:`sksports.io` module includes utility to load data.
 #          Cedric Lemaitre
 # License: MIT
 
+from .activity import Activity
+from .archive import ActivityArchive
+from .archive import write_archive
 from .base import bikeread
+from .base import bikeread_many
+from .base import frame_from_blocks
+from .cache import ActivityCache
+from .fit import iter_fit_blocks
+from .segmented import SegmentedActivity
 
-__all__ = ['bikeread']
+__all__ = ['bikeread',
+           'bikeread_many',
+           'iter_fit_blocks',
+           'frame_from_blocks',
+           'Activity',
+           'ActivityCache',
+           'ActivityArchive',
+           'SegmentedActivity',
+           'write_archive']
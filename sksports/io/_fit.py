@@ -0,0 +1,572 @@
+"""Native decoder of the record messages of FIT files.
+
+The record messages are located with a single scan of the stream. The
+requested fields are then gathered for all messages sharing a definition at
+once and written into NumPy columns, scaled and offset as specified in the
+FIT profile.
+"""
+
+# Authors: Guillaume Lemaitre <g.lemaitre58@gmail.com>
+#          Cedric Lemaitre
+# License: MIT
+
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+# seconds between the UNIX epoch and the FIT epoch (1989-12-31 00:00 UTC)
+FIT_EPOCH = 631065600
+# smaller timestamps are relative to the power-up of the device
+MIN_TIMESTAMP = 0x10000000
+
+RECORD_MESG_NUM = 20
+FIELD_DESCRIPTION_MESG_NUM = 206
+TIMESTAMP_DEF_NUM = 253
+
+# field definition number, scale, and offset of the record fields
+RECORD_FIELDS = {
+    'timestamp': (TIMESTAMP_DEF_NUM, None, None),
+    'position_lat': (0, None, None),
+    'position_long': (1, None, None),
+    'altitude': (2, 5, 500),
+    'heart_rate': (3, None, None),
+    'cadence': (4, None, None),
+    'distance': (5, 100, None),
+    'speed': (6, 1000, None),
+    'power': (7, None, None),
+    'grade': (9, 100, None),
+    'temperature': (13, None, None),
+    'left_right_balance': (30, None, None),
+}
+# the components of 'compressed_speed_distance' are the speed and distance
+COMPONENT_DEF_NUMS = (8,)
+# number of bytes read at once when decoding by blocks
+READ_SIZE = 1 << 20
+
+# base type number -> (NumPy type, invalid value); NaN is invalid for floats
+BASE_TYPES = {
+    0x00: ('u1', 0xFF),
+    0x01: ('i1', 0x7F),
+    0x02: ('u1', 0xFF),
+    0x83: ('i2', 0x7FFF),
+    0x84: ('u2', 0xFFFF),
+    0x85: ('i4', 0x7FFFFFFF),
+    0x86: ('u4', 0xFFFFFFFF),
+    0x88: ('f4', None),
+    0x89: ('f8', None),
+    0x0A: ('u1', 0),
+    0x8B: ('u2', 0),
+    0x8C: ('u4', 0),
+}
+
+_STRUCT_FORMATS = {'u1': 'B', 'i1': 'b', 'u2': 'H', 'i2': 'h', 'u4': 'I',
+                   'i4': 'i', 'f4': 'f', 'f8': 'd'}
+
+
+def _make_crc_table():
+    # the FIT checksum is the CRC-16 of the SDK computed by nibbles
+    nibble_table = (0x0000, 0xCC01, 0xD801, 0x1400, 0xF001, 0x3C00, 0x2800,
+                    0xE401, 0xA001, 0x6C00, 0x7800, 0xB401, 0x5000, 0x9C01,
+                    0x8801, 0x4400)
+    table = []
+    for byte in range(256):
+        crc = 0
+        for nibble in (byte & 0xF, byte >> 4):
+            tmp = nibble_table[crc & 0xF]
+            crc = (crc >> 4) & 0x0FFF
+            crc = crc ^ tmp ^ nibble_table[nibble]
+        table.append(crc)
+    return tuple(table)
+
+
+_CRC_TABLE = _make_crc_table()
+
+
+def calc_crc(data, crc=0):
+    """Compute the CRC of FIT data, starting from ``crc``."""
+    table = _CRC_TABLE
+    for byte in bytearray(data):
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+class FitDecodeError(ValueError):
+    """The FIT stream cannot be decoded by the native decoder.
+
+    It is raised for corrupted streams and for the layouts which are not
+    supported (e.g. array fields).
+    """
+
+
+class _EndOfBuffer(FitDecodeError):
+    """A message is not entirely contained in the data read."""
+
+
+_Definition = namedtuple('_Definition', ['mesg_num', 'endian', 'size',
+                                         'fields', 'timestamp'])
+
+
+def _read_file_header(buf, pos, check_crc):
+    """Read the header starting at ``pos``.
+
+    Returns the positions of the first and past the last data bytes.
+
+    """
+    if len(buf) - pos < 12 or bytes(buf[pos + 8:pos + 12]) != b'.FIT':
+        raise FitDecodeError('Invalid .FIT file header.')
+    header_size, _, _, data_size = struct.unpack_from('<2BHI', buf, pos)
+    data_start = pos + 12
+    if header_size > 12:
+        if header_size < 14 or len(buf) - pos < header_size:
+            raise FitDecodeError('Irregular .FIT file header size.')
+        crc = struct.unpack_from('<H', buf, pos + 12)[0]
+        if check_crc and crc and crc != calc_crc(buf[pos:pos + 12]):
+            raise FitDecodeError('CRC mismatch in the .FIT file header.')
+        data_start = pos + header_size
+    return data_start, data_start + data_size
+
+
+def _read_definition(buf, pos, has_developer_data, dev_field_names,
+                     n_bytes):
+    """Read the definition message starting at ``pos``."""
+    if pos + 5 > n_bytes:
+        raise _EndOfBuffer('Unexpected end of the .FIT file.')
+    endian = '>' if buf[pos + 1] else '<'
+    mesg_num, n_fields = struct.unpack_from(endian + 'HB', buf, pos + 2)
+    pos += 5
+    if pos + 3 * n_fields > n_bytes:
+        raise _EndOfBuffer('Unexpected end of the .FIT file.')
+    fields, size, timestamp = {}, 0, None
+    for _ in range(n_fields):
+        def_num, field_size, base_type = buf[pos:pos + 3]
+        pos += 3
+        numpy_type = BASE_TYPES.get(base_type, ('u1', None))[0]
+        if field_size % int(numpy_type[1]):
+            raise FitDecodeError('Invalid field size {} for the base type'
+                                 ' {}.'.format(field_size, base_type))
+        if (mesg_num == RECORD_MESG_NUM and
+                def_num in COMPONENT_DEF_NUMS):
+            raise FitDecodeError('The component fields are not supported.')
+        # the last field with a given number is the one reported
+        fields[def_num] = (size, field_size, base_type)
+        if def_num == TIMESTAMP_DEF_NUM:
+            if (base_type not in BASE_TYPES or numpy_type[0] == 'f' or
+                    field_size != int(numpy_type[1])):
+                raise FitDecodeError('The timestamp should be an integer'
+                                     ' field.')
+            timestamp = (size, endian + _STRUCT_FORMATS[numpy_type],
+                         BASE_TYPES[base_type][1])
+        size += field_size
+
+    if has_developer_data:
+        if pos + 1 > n_bytes:
+            raise _EndOfBuffer('Unexpected end of the .FIT file.')
+        n_dev_fields = buf[pos]
+        pos += 1
+        if pos + 3 * n_dev_fields > n_bytes:
+            raise _EndOfBuffer('Unexpected end of the .FIT file.')
+        for _ in range(n_dev_fields):
+            field_num, field_size, dev_data_index = buf[pos:pos + 3]
+            pos += 3
+            if mesg_num == RECORD_MESG_NUM:
+                # a developer field could have the name of a record field
+                name = dev_field_names.get((dev_data_index, field_num), 0)
+                if name == 0 or name in RECORD_FIELDS:
+                    raise FitDecodeError(
+                        'The developer field {} cannot be decoded.'
+                        .format(field_num))
+            size += field_size
+
+    return pos, _Definition(mesg_num, endian, size, fields, timestamp)
+
+
+def _read_field_description(buf, pos, definition):
+    """Read the name of the developer field described at ``pos``."""
+    if not all(def_num in definition.fields for def_num in (0, 1, 3)):
+        return None
+    dev_data_index = buf[pos + definition.fields[0][0]]
+    field_num = buf[pos + definition.fields[1][0]]
+    position, size, _ = definition.fields[3]
+    name = bytes(buf[pos + position:pos + position + size]).split(
+        b'\x00')[0].decode('utf-8', 'replace') or None
+    return (dev_data_index, field_num), name
+
+
+def _apply_compressed_timestamp(time_offset, timestamp):
+    base_timestamp = time_offset + (timestamp & ~0x1F)
+    if time_offset < (timestamp & 0x1F):
+        base_timestamp += 0x20
+    return base_timestamp
+
+
+class _RecordScanner(object):
+    """Locate the record messages of the data of a FIT file.
+
+    The local definitions and the last timestamp are kept between calls to
+    :meth:`scan` such that the data can be scanned by chunks. The position,
+    the definition, and the compressed timestamp (-1 if the message has a
+    regular header) of each record message are appended to ``positions``,
+    ``definitions``, and ``compressed_timestamps``.
+
+    """
+
+    def __init__(self):
+        self.local_definitions, self.dev_field_names = {}, {}
+        self.last_timestamp = 0
+        # the last regular timestamp is only read if a compressed timestamp
+        # follows, from its position or from its value once resolved
+        self._timestamp_position, self._timestamp = None, None
+        self.positions, self.definitions = [], []
+        self.compressed_timestamps = []
+
+    def scan(self, buf, pos, end, partial=False):
+        """Scan the messages starting between ``pos`` and ``end``.
+
+        If ``partial``, the scan stops at the first message which is not
+        entirely in ``buf`` and its position is returned. Otherwise, the
+        position past the last message is returned.
+
+        """
+        while pos < end:
+            try:
+                pos = self._scan_message(buf, pos)
+            except _EndOfBuffer:
+                if not partial:
+                    raise
+                break
+        return pos
+
+    def _resolve_timestamp(self, buf):
+        if self._timestamp_position is not None:
+            position, fmt, invalid = self._timestamp_position
+            self._timestamp = (struct.unpack_from(fmt, buf, position)[0],
+                               invalid)
+            self._timestamp_position = None
+
+    def _scan_message(self, buf, pos):
+        n_bytes = len(buf)
+        if pos >= n_bytes:
+            raise _EndOfBuffer('Unexpected end of the .FIT file.')
+        header = buf[pos]
+        if header & 0x80:
+            local_mesg_num = (header >> 5) & 0x3
+        elif header & 0x40:
+            pos, definition = _read_definition(
+                buf, pos + 1, header & 0x20, self.dev_field_names, n_bytes)
+            self.local_definitions[header & 0xF] = definition
+            return pos
+        else:
+            local_mesg_num = header & 0xF
+        pos += 1
+
+        definition = self.local_definitions.get(local_mesg_num)
+        if definition is None:
+            raise FitDecodeError('Data message with an invalid local message'
+                                 ' type {}.'.format(local_mesg_num))
+        if pos + definition.size > n_bytes:
+            raise _EndOfBuffer('Unexpected end of the .FIT file.')
+        if definition.timestamp is not None:
+            self._timestamp_position = (pos + definition.timestamp[0],
+                                        ) + definition.timestamp[1:]
+            self._timestamp = None
+        compressed_timestamp = -1
+        if header & 0x80:
+            # the time offset is relative to the last timestamp read
+            self._resolve_timestamp(buf)
+            if self._timestamp is not None:
+                self.last_timestamp, invalid = self._timestamp
+                if self.last_timestamp == invalid:
+                    raise FitDecodeError('Invalid timestamp preceding a'
+                                         ' compressed timestamp.')
+                self._timestamp = None
+            self.last_timestamp = compressed_timestamp = \
+                _apply_compressed_timestamp(header & 0x1F,
+                                            self.last_timestamp)
+
+        if definition.mesg_num == RECORD_MESG_NUM:
+            self.positions.append(pos)
+            self.definitions.append(definition)
+            self.compressed_timestamps.append(compressed_timestamp)
+        elif definition.mesg_num == FIELD_DESCRIPTION_MESG_NUM:
+            description = _read_field_description(buf, pos, definition)
+            if description is not None:
+                self.dev_field_names[description[0]] = description[1]
+        return pos + definition.size
+
+    def discard(self, buf, n_bytes):
+        """Shift the positions before ``n_bytes`` are removed from ``buf``."""
+        self._resolve_timestamp(buf)
+        self.positions = [pos - n_bytes for pos in self.positions]
+
+    def pop(self, n_records):
+        """Remove the first ``n_records`` record messages found."""
+        records = (self.positions[:n_records],
+                   self.definitions[:n_records],
+                   self.compressed_timestamps[:n_records])
+        del self.positions[:n_records]
+        del self.definitions[:n_records]
+        del self.compressed_timestamps[:n_records]
+        return records
+
+
+def _check_crc(buf, pos, crc):
+    if struct.unpack_from('<H', buf, pos)[0] != calc_crc(buf[:pos], crc):
+        raise FitDecodeError('CRC mismatch in the .FIT file.')
+
+
+def _scan_records(buf, check_crc):
+    """Locate the record messages of the FIT file.
+
+    Returns the position of each record message, its definition and its
+    compressed timestamp (-1 if the message has a regular header).
+
+    """
+    pos, data_end = _read_file_header(buf, 0, check_crc)
+    scanner = _RecordScanner()
+    pos = scanner.scan(buf, pos, data_end)
+
+    if pos + 2 > len(buf):
+        raise FitDecodeError('Unexpected end of the .FIT file.')
+    if check_crc:
+        _check_crc(buf, pos, 0)
+    if pos + 2 < len(buf):
+        # fitparse only reports the messages of the last chained file
+        raise FitDecodeError('The chained FIT files are not supported.')
+    return (scanner.positions, scanner.definitions,
+            scanner.compressed_timestamps)
+
+
+def _gather_field(buf, positions, definition, def_num):
+    """Read a field of all messages sharing a definition.
+
+    Returns the values and the mask of the valid values.
+
+    """
+    position, size, base_type = definition.fields[def_num]
+    if base_type not in BASE_TYPES:
+        raise FitDecodeError('The base type {} of the field {} is not'
+                             ' numeric.'.format(base_type, def_num))
+    numpy_type, invalid = BASE_TYPES[base_type]
+    dtype = np.dtype(definition.endian + numpy_type)
+    if size != dtype.itemsize:
+        raise FitDecodeError('The array field {} is not supported.'
+                             .format(def_num))
+    data = np.frombuffer(buf, dtype=np.uint8)
+    values = data[positions[:, np.newaxis] + position +
+                  np.arange(size)].view(dtype).ravel()
+    if invalid is None:
+        valid = ~np.isnan(values)
+    else:
+        valid = values != invalid
+    return values, valid
+
+
+def read_records(fileobj, fields, check_crc=True, dtypes=None):
+    """Decode the record messages of a FIT file into NumPy columns.
+
+    Parameters
+    ----------
+    fileobj : file-like object
+        The binary FIT data.
+
+    fields : sequence of str
+        The record fields to decode. The available fields are the keys of
+        ``RECORD_FIELDS``. The other fields are never decoded.
+
+    check_crc : bool, default=True
+        Whether to check the CRC of the header and the data. Skipping the
+        check avoids a pass over all the bytes.
+
+    dtypes : dict, optional
+        The storage dtype of some fields. An integer dtype is kept if the
+        field is valid in all messages and promoted to a floating dtype with
+        NaN for the missing values otherwise. An integer dtype should only be
+        given for fields without scale nor offset.
+
+    Returns
+    -------
+    data : dict
+        The decoded columns, in the order of ``fields``. The timestamps are
+        ``datetime64[ns]``. Without a given dtype, the values are converted
+        as in fitparse: integers without scale are stored in an ``int64``
+        column if there are no missing values and the other values are
+        stored as ``float64`` with missing values set to NaN. A field invalid
+        in all messages is stored as an ``object`` column of ``None``.
+
+    Raises
+    ------
+    FitDecodeError
+        If the data are corrupted or use a layout which is not supported.
+
+    """
+    buf = bytearray(fileobj.read())
+    return _decode_records(buf, *_scan_records(buf, check_crc),
+                           fields=fields, dtypes=dtypes)
+
+
+def iter_records(fileobj, fields, block_size, check_crc=True, dtypes=None,
+                 read_size=READ_SIZE):
+    """Decode the record messages of a FIT file by blocks.
+
+    The file is read by chunks and the record messages are decoded as soon
+    as ``block_size`` of them have been read, such that only the data of a
+    block and of a chunk are held in memory.
+
+    Parameters
+    ----------
+    fileobj : file-like object
+        The binary FIT data.
+
+    fields : sequence of str
+        Refer to :func:`read_records`.
+
+    block_size : int
+        The number of record messages of each block. The last block can be
+        smaller.
+
+    check_crc : bool, default=True
+        Refer to :func:`read_records`. The CRC of the data is only checked
+        once all the blocks have been yielded.
+
+    dtypes : dict, optional
+        Refer to :func:`read_records`. The dtypes inferred without a given
+        dtype can differ between blocks, e.g. an integer column with missing
+        values in a single block.
+
+    read_size : int, optional
+        The number of bytes read at once.
+
+    Yields
+    ------
+    data : dict
+        The decoded columns of a block. Refer to :func:`read_records`.
+
+    Raises
+    ------
+    FitDecodeError
+        If the data are corrupted or use a layout which is not supported.
+
+    """
+    buf = bytearray()
+
+    def _read_until(n_bytes):
+        while len(buf) < n_bytes:
+            chunk = fileobj.read(max(read_size, n_bytes - len(buf)))
+            if not chunk:
+                return False
+            buf.extend(chunk)
+        return True
+
+    _read_until(12)
+    if buf:
+        _read_until(buf[0])
+    pos, data_end = _read_file_header(buf, 0, check_crc)
+    scanner, crc = _RecordScanner(), 0
+    while True:
+        pos = scanner.scan(buf, pos, data_end, partial=True)
+        while len(scanner.positions) >= block_size:
+            yield _decode_records(buf, *scanner.pop(block_size),
+                                  fields=fields, dtypes=dtypes)
+        if pos >= data_end:
+            break
+        # only the bytes of the records not yet decoded are kept
+        start = scanner.positions[0] if scanner.positions else pos
+        scanner.discard(buf, start)
+        if check_crc:
+            crc = calc_crc(buf[:start], crc)
+        del buf[:start]
+        pos, data_end = pos - start, data_end - start
+        if not _read_until(len(buf) + 1):
+            raise FitDecodeError('Unexpected end of the .FIT file.')
+
+    if not _read_until(pos + 2):
+        raise FitDecodeError('Unexpected end of the .FIT file.')
+    if check_crc:
+        _check_crc(buf, pos, crc)
+    if _read_until(pos + 3):
+        raise FitDecodeError('The chained FIT files are not supported.')
+    if scanner.positions:
+        yield _decode_records(buf, *scanner.pop(len(scanner.positions)),
+                              fields=fields, dtypes=dtypes)
+
+
+def _decode_records(buf, positions, definitions, compressed_timestamps,
+                    fields, dtypes=None):
+    """Decode the fields of the record messages located in ``buf``."""
+    dtypes = {} if dtypes is None else dtypes
+    n_records = len(positions)
+    positions = np.array(positions, dtype=np.intp)
+    compressed_timestamps = np.array(compressed_timestamps, dtype=np.int64)
+
+    # group the record messages sharing a definition
+    groups = {}
+    for idx_record, definition in enumerate(definitions):
+        groups.setdefault(id(definition), (definition, []))[1].append(
+            idx_record)
+    groups = [(definition, np.array(indices, dtype=np.intp))
+              for definition, indices in groups.values()]
+
+    data = {}
+    for name in fields:
+        def_num, scale, offset = RECORD_FIELDS[name]
+        # fitparse reports missing fields as NaN and invalid values as None
+        absent = np.ones(n_records, dtype=bool)
+        valid = np.zeros(n_records, dtype=bool)
+        gathered = []
+        for definition, indices in groups:
+            if def_num not in definition.fields:
+                continue
+            group_values, group_valid = _gather_field(
+                buf, positions[indices], definition, def_num)
+            absent[indices] = False
+            valid[indices] = group_valid
+            gathered.append((indices, group_values))
+
+        dtype = dtypes.get(name)
+        if dtype is not None and np.dtype(dtype).kind in 'iu':
+            # the values are written in the compact dtype directly
+            column = np.zeros(n_records, dtype=dtype)
+            for indices, group_values in gathered:
+                column[indices] = group_values
+            if not valid.all():
+                column = column.astype(np.result_type(dtype, np.float32))
+                column[~valid] = np.nan
+            data[name] = column
+            continue
+
+        values = np.full(n_records, np.nan)
+        is_integer = True
+        for indices, group_values in gathered:
+            values[indices] = group_values
+            is_integer &= group_values.dtype.kind in 'iu'
+
+        if def_num == TIMESTAMP_DEF_NUM:
+            compressed = compressed_timestamps >= 0
+            values[compressed] = compressed_timestamps[compressed]
+            valid[compressed] = True
+            if not valid.all() or (values < MIN_TIMESTAMP).any():
+                raise FitDecodeError('The timestamps are missing or'
+                                     ' relative to the device power-up.')
+            data[name] = ((values.astype(np.int64) + FIT_EPOCH)
+                          .astype('datetime64[s]')
+                          .astype('datetime64[ns]'))
+            continue
+
+        if (dtype is None and n_records and not valid.any() and
+                not absent.any()):
+            data[name] = np.full(n_records, None, dtype=object)
+            continue
+        if scale:
+            values /= scale
+            is_integer = False
+        if offset:
+            values -= offset
+        values[~valid] = np.nan
+        if dtype is not None:
+            values = values.astype(dtype)
+        elif is_integer and valid.all():
+            values = values.astype(np.int64)
+        data[name] = values
+
+    return data
@@ -0,0 +1,128 @@
+"""Incremental parsing of the points of XML tracks."""
+
+# Authors: Guillaume Lemaitre <g.lemaitre58@gmail.com>
+#          Cedric Lemaitre
+# License: MIT
+
+from array import array
+from xml.etree.ElementTree import iterparse
+
+import numpy as np
+import pandas as pd
+
+# number of semicircles in a degree, the unit of the positions in FIT files
+SEMICIRCLES_PER_DEGREE = 2 ** 31 / 180.
+# number of times kept as text before being converted at once
+TIMES_BLOCK_SIZE = 4096
+
+
+def _local_name(tag):
+    """Remove the namespace of a tag."""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _resolve_column(parent_tag, tag, time_tag, elements):
+    """Get the column of an element from its tag and the tag of its parent."""
+    parent_tag, tag = _local_name(parent_tag), _local_name(tag)
+    if tag == time_tag:
+        return time_tag
+    return elements.get('{}/{}'.format(parent_tag, tag), elements.get(tag))
+
+
+def _read_point(point, time_tag, elements, attributes, resolved):
+    """Read the values of a point from its subtree.
+
+    ``resolved`` caches the column of each pair of tags of a parent and its
+    child since the same tags are repeated in all the points.
+
+    """
+    values = {column: point.get(attribute)
+              for attribute, column in attributes.items()}
+    for parent in point.iter():
+        for elem in parent:
+            key = (parent.tag, elem.tag)
+            try:
+                column = resolved[key]
+            except KeyError:
+                column = resolved[key] = _resolve_column(
+                    parent.tag, elem.tag, time_tag, elements)
+            if column is not None and elem.text is not None:
+                values[column] = elem.text
+    return values
+
+
+def parse_points(fileobj, point_tag, time_tag, elements, attributes=None):
+    """Parse the points of a XML track incrementally.
+
+    The points are read as soon as they are parsed and removed from the
+    tree, such that the memory used does not grow with the size of the tree.
+    The values are appended to typed buffers and the times are converted by
+    blocks of ``TIMES_BLOCK_SIZE`` points.
+
+    Parameters
+    ----------
+    fileobj : file-like object
+        The XML data.
+
+    point_tag : str
+        The tag of the points, without namespace.
+
+    time_tag : str
+        The tag of the time of a point. The points without time are skipped.
+
+    elements : dict
+        Map the elements of a point to the columns. An element is given by
+        its tag or by the tag of its parent and its tag separated by a slash
+        (e.g. ``'HeartRateBpm/Value'``). The namespaces are ignored.
+
+    attributes : dict, optional
+        Map the attributes of the point element to the columns.
+
+    Returns
+    -------
+    timestamps : ndarray, shape (n_points,)
+        The time of each point as ``datetime64[ns]`` in UTC.
+
+    columns : dict of array
+        The buffers of each column with NaN for the missing values.
+
+    """
+    attributes = {} if attributes is None else attributes
+    columns = {column: array('d') for column in
+               set(elements.values()) | set(attributes.values())}
+    times, timestamps, resolved = [], [], {}
+    # the ancestors of the element being parsed
+    parents = []
+    point_suffix = '}' + point_tag
+    for event, elem in iterparse(fileobj, events=('start', 'end')):
+        if event == 'start':
+            parents.append(elem)
+            continue
+        parents.pop()
+        if elem.tag != point_tag and not elem.tag.endswith(point_suffix):
+            continue
+        point = _read_point(elem, time_tag, elements, attributes, resolved)
+        # the points parsed are removed from the tree
+        if parents:
+            parents[-1].remove(elem)
+        if point.get(time_tag) is None:
+            continue
+        times.append(point[time_tag])
+        if len(times) == TIMES_BLOCK_SIZE:
+            timestamps.append(pd.to_datetime(times, utc=True).values)
+            times = []
+        for column, values in columns.items():
+            value = point.get(column)
+            values.append(np.nan if value is None else float(value))
+
+    timestamps.append(pd.to_datetime(times, utc=True).values)
+    return np.concatenate(timestamps), columns
+
+
+def to_semicircles(columns, names=('latitude', 'longitude')):
+    """Convert the positions in degrees to semicircles as in FIT files."""
+    for name in names:
+        if name in columns:
+            columns[name] = np.round(np.asarray(
+                columns[name], dtype=np.float64) * SEMICIRCLES_PER_DEGREE)
+    return columns
@@ -0,0 +1,354 @@
+"""Activity whose channels are decoded when first accessed."""
+
+# Authors: Guillaume Lemaitre <g.lemaitre58@gmail.com>
+#          Cedric Lemaitre
+# License: MIT
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import six
+
+from .archive import ActivityArchive
+from .base import bikeread
+from .fit import FIELDS_COLUMNS_INV
+from .fit import FIELDS_DATA
+from .fit import check_filename
+from .fit import check_schema
+
+# columns read by bikeread without schema
+DEFAULT_COLUMNS = [FIELDS_COLUMNS_INV[field] for field in FIELDS_DATA[1:]]
+
+
+def _gradient(name):
+    """Get a function of :mod:`sksports.extraction.gradient`."""
+    # imported when used since sksports.extraction depends on sksports.io
+    from ..extraction import gradient
+    return getattr(gradient, name)
+
+
+class Activity(object):
+    """Activity whose channels are decoded when first accessed.
+
+    The activity holds a reference to its file or to its archive and only
+    decodes the channels accessed, such that the computations requiring only
+    the power do not pay for the other channels. The derived columns (e.g.
+    the gradients or the acceleration) are computed once and kept until they
+    are invalidated.
+
+    Read more in the :ref:`User Guide <reader>`.
+
+    Parameters
+    ----------
+    source : str, ActivityArchive, or DataFrame
+        The file of the activity, read with :func:`sksports.io.bikeread`, an
+        archive containing the activity, or an activity already read.
+
+    idx : int, optional
+        The position of the activity in the archive given as ``source``.
+
+    dtype : str or dtype, optional
+        The floating dtype of the data. Refer to
+        :func:`sksports.io.bikeread`.
+
+    max_gap : Timedelta, timedelta, np.timedelta64, int, or str, optional
+        The gap which is not filled when reading a file. Refer to
+        :func:`sksports.io.bikeread`.
+
+    schema : list of str or dict, optional
+        The columns available in a file and their storage dtype. Refer to
+        :func:`sksports.io.bikeread`. By default, the six columns read by
+        :func:`sksports.io.bikeread` are available.
+
+    Attributes
+    ----------
+    columns : list of str
+        The columns of the activity, decoded or not.
+
+    Examples
+    --------
+    >>> from sksports.datasets import load_fit
+    >>> from sksports.io import Activity
+    >>> activity = Activity(load_fit()[0])
+    >>> power = activity['power']
+    >>> activity.loaded_columns
+    ['power']
+    >>> gradient = activity.gradient_elevation()
+    >>> activity.to_frame().shape
+    (2257, 6)
+
+    """
+
+    def __init__(self, source, idx=None, dtype=None, max_gap=None,
+                 schema=None):
+        self.source = source
+        self.idx = idx
+        self.dtype = dtype
+        self.max_gap = max_gap
+        self.schema = schema
+        self._index = None
+        self._channels = OrderedDict()
+        self._derived = {}
+
+        if isinstance(source, ActivityArchive):
+            if idx is None:
+                raise ValueError('"idx" should give the position of the'
+                                 ' activity in the archive.')
+            self.columns = list(source.columns(idx))
+            return
+        if idx is not None:
+            raise ValueError('"idx" should only be given with an archive.'
+                             ' Got {!r} instead.'.format(source))
+        if isinstance(source, pd.DataFrame):
+            self.columns = list(source.columns)
+            self._index = source.index
+            for column in self.columns:
+                self._channels[column] = source[column]
+        elif isinstance(source, six.string_types):
+            check_filename(source)
+            self.schema = check_schema(schema)
+            self.columns = list(DEFAULT_COLUMNS if self.schema is None
+                                else self.schema)
+        else:
+            raise ValueError('"source" should be a filename, an'
+                             ' ActivityArchive, or a DataFrame. Got {!r}'
+                             ' instead.'.format(source))
+
+    def __repr__(self):
+        return ('Activity(source={!r}, columns={}, loaded_columns={})'
+                .format(self.source, self.columns, self.loaded_columns))
+
+    @property
+    def loaded_columns(self):
+        """The columns already decoded."""
+        return list(self._channels)
+
+    @property
+    def index(self):
+        """The time of each sample."""
+        if self._index is None:
+            if isinstance(self.source, ActivityArchive):
+                self._index = self.source.index(self.idx)
+            else:
+                self.load(self.columns[:1])
+        return self._index
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, column):
+        return column in self.columns
+
+    def load(self, columns=None):
+        """Decode some channels if they are not already decoded.
+
+        The channels of a file missing from the activity are decoded in a
+        single pass over the file. Each channel accessed for the first time
+        with ``activity[column]`` requires a pass of its own, such that the
+        channels needed by a computation should be decoded at once, with
+        this method or with ``activity[columns]``.
+
+        Parameters
+        ----------
+        columns : list of str, optional
+            The columns to decode. By default, all the columns are decoded.
+
+        Returns
+        -------
+        self : Activity
+            The activity.
+
+        """
+        columns = self.columns if columns is None else list(columns)
+        unknown = [column for column in columns if column not in self.columns]
+        if unknown:
+            raise KeyError('The activity has no columns {}. The columns are'
+                           ' {}.'.format(unknown, self.columns))
+        missing = [column for column in columns
+                   if column not in self._channels]
+        if not missing:
+            return self
+
+        if isinstance(self.source, ActivityArchive):
+            for column in missing:
+                values = self.source.channel(self.idx, column)
+                if self.dtype is not None:
+                    values = values.astype(self.dtype, copy=False)
+                self._channels[column] = pd.Series(values, index=self.index,
+                                                   name=column)
+            return self
+
+        # the power is read with the other channels since its outliers
+        # remove the whole samples
+        read = list(missing)
+        if 'power' in self.columns and 'power' not in read:
+            read.append('power')
+        if self.schema is not None:
+            schema = OrderedDict((column, self.schema[column])
+                                 for column in read)
+        elif set(read) == set(DEFAULT_COLUMNS):
+            schema = None
+        else:
+            # the columns are then read with the float64 dtype of the
+            # activities read without schema
+            schema = OrderedDict((column, np.float64) for column in read)
+        data = bikeread(self.source, dtype=self.dtype, max_gap=self.max_gap,
+                        schema=schema)
+        if self._index is None:
+            self._index = data.index
+        for column in read:
+            # the power decoded again is not replaced
+            self._channels.setdefault(column, data[column])
+        return self
+
+    def __getitem__(self, column):
+        if not isinstance(column, six.string_types):
+            return self.to_frame(column)
+        return self.load([column])._channels[column]
+
+    def __setitem__(self, column, values):
+        self._channels[column] = pd.Series(np.asarray(values),
+                                           index=self.index, name=column)
+        if column not in self.columns:
+            self.columns.append(column)
+        self.invalidate([column])
+
+    def to_frame(self, columns=None):
+        """Convert the activity into a DataFrame.
+
+        Only the columns required are decoded.
+
+        Parameters
+        ----------
+        columns : list of str, optional
+            The columns of the DataFrame. By default, all the columns are
+            decoded.
+
+        Returns
+        -------
+        data : DataFrame
+            The activity, identical to the DataFrame returned by
+            :func:`sksports.io.bikeread` or
+            :meth:`sksports.io.ActivityArchive.read`.
+
+        """
+        columns = self.columns if columns is None else list(columns)
+        self.load(columns)
+        return pd.DataFrame(
+            OrderedDict((column, self._channels[column])
+                        for column in columns),
+            index=self.index, columns=columns)
+
+    def _derive(self, key, columns, func):
+        """Compute a derived column from ``columns`` if it is not cached."""
+        if key not in self._derived:
+            # the missing columns are reported by ``func``
+            data = self.to_frame([column for column in columns
+                                  if column in self.columns])
+            self._derived[key] = (set(columns), func(data))
+        return self._derived[key][1]
+
+    def invalidate(self, columns=None):
+        """Forget the derived columns such that they are computed again.
+
+        Parameters
+        ----------
+        columns : list of str, optional
+            Only the derived columns computed from these columns are
+            forgotten. By default, all the derived columns are forgotten.
+
+        Returns
+        -------
+        self : Activity
+            The activity.
+
+        """
+        if columns is None:
+            self._derived.clear()
+            return self
+        columns = set(columns)
+        for key in [key for key, (dependencies, _) in self._derived.items()
+                    if dependencies & columns]:
+            del self._derived[key]
+        return self
+
+    def acceleration(self, periods=5):
+        """Compute the acceleration.
+
+        Parameters
+        ----------
+        periods : int, default=5
+            Refer to :func:`sksports.extraction.acceleration`.
+
+        Returns
+        -------
+        acceleration : Series
+            The acceleration.
+
+        """
+        return self._derive(
+            ('acceleration', periods), ['speed'],
+            lambda data: _gradient('acceleration')(
+                data, periods=periods, append=False).rename('acceleration'))
+
+    def gradient_elevation(self, periods=5):
+        """Compute the elevation gradient.
+
+        Parameters
+        ----------
+        periods : int, default=5
+            Refer to :func:`sksports.extraction.gradient_elevation`.
+
+        Returns
+        -------
+        gradient_elevation : Series
+            The elevation gradient.
+
+        """
+        return self._derive(
+            ('gradient-elevation', periods), ['elevation', 'distance'],
+            lambda data: _gradient('gradient_elevation')(
+                data, periods=periods, append=False)
+            .rename('gradient-elevation'))
+
+    def gradient_heart_rate(self, periods=5):
+        """Compute the heart-rate gradient.
+
+        Parameters
+        ----------
+        periods : int, default=5
+            Refer to :func:`sksports.extraction.gradient_heart_rate`.
+
+        Returns
+        -------
+        gradient_heart_rate : Series
+            The heart-rate gradient.
+
+        """
+        return self._derive(
+            ('gradient-heart-rate', periods), ['heart-rate'],
+            lambda data: _gradient('gradient_heart_rate')(
+                data, periods=periods, append=False)
+            .rename('gradient-heart-rate'))
+
+    def resampled(self, rule, column='power'):
+        """Average a column over periods of time.
+
+        Parameters
+        ----------
+        rule : str or DateOffset
+            The period of time, e.g. ``'30S'`` or ``'5min'``.
+
+        column : str, default='power'
+            The column to average.
+
+        Returns
+        -------
+        resampled : Series
+            The mean of the column over each period.
+
+        """
+        return self._derive(
+            ('resampled', column, rule), [column],
+            lambda data: data[column].resample(rule).mean())
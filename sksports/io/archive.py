@@ -0,0 +1,414 @@
+"""Archive storing several activities in a single memory-mapped file."""
+
+# Authors: Guillaume Lemaitre <g.lemaitre58@gmail.com>
+#          Cedric Lemaitre
+# License: MIT
+
+import json
+import struct
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import six
+
+ARCHIVE_MAGIC = b'SKSPORTS'
+ARCHIVE_VERSION = 1
+# magic, version, reserved, offset and size of the index
+_PREAMBLE = struct.Struct('<8sHHQQ')
+# the channels are aligned such that they can be viewed with any dtype
+_ALIGNMENT = 8
+# the largest integer represented exactly in double precision
+_MAX_EXACT_FLOAT = 2 ** 53
+
+
+def _varint_encode(values):
+    """Encode int64 values as the varints of their zigzagged differences.
+
+    Parameters
+    ----------
+    values : ndarray, shape (n_samples,), dtype=int64
+        The values to encode.
+
+    Returns
+    -------
+    data : ndarray, dtype=uint8
+        The encoded values. Each difference uses 7 bits per byte and the most
+        significant bit marks the bytes which are followed by another one.
+
+    """
+    deltas = np.empty_like(values)
+    if values.size:
+        deltas[0] = values[0]
+        # the differences wrap around as the cumulative sum of the decoder
+        np.subtract(values[1:], values[:-1], out=deltas[1:])
+    zigzag = ((deltas << 1) ^ (deltas >> 63)).view(np.uint64)
+
+    groups = np.empty((zigzag.size, 10), dtype=np.uint8)
+    n_bytes = np.ones(zigzag.size, dtype=np.intp)
+    for shift in range(10):
+        shifted = zigzag >> np.uint64(7 * shift)
+        groups[:, shift] = shifted & np.uint64(0x7f)
+        if shift:
+            n_bytes += shifted != 0
+    position = np.arange(10)
+    groups[position < n_bytes[:, np.newaxis] - 1] |= 0x80
+    return groups[position < n_bytes[:, np.newaxis]]
+
+
+def _varint_decode(data, n_samples):
+    """Decode the values encoded by :func:`_varint_encode`.
+
+    Parameters
+    ----------
+    data : ndarray, dtype=uint8
+        The encoded values.
+
+    n_samples : int
+        The number of values encoded.
+
+    Returns
+    -------
+    values : ndarray, shape (n_samples,), dtype=int64
+        The decoded values.
+
+    """
+    ends = np.flatnonzero(data < 0x80)
+    if ends.size != n_samples or (ends.size and ends[-1] != data.size - 1):
+        raise ValueError('The channel is corrupted: {} values were expected'
+                         ' and {} were found.'.format(n_samples, ends.size))
+    if not n_samples:
+        return np.zeros(0, dtype=np.int64)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    shifts = np.arange(data.size) - np.repeat(starts, ends - starts + 1)
+    zigzag = np.add.reduceat(
+        (data & 0x7f).astype(np.uint64) << (7 * shifts).astype(np.uint64),
+        starts)
+    deltas = ((zigzag >> np.uint64(1)).view(np.int64) ^
+              -(zigzag & np.uint64(1)).view(np.int64))
+    return np.cumsum(deltas)
+
+
+def _integer_values(values):
+    """Return the values as int64 if they can be encoded as integers."""
+    if values.dtype.kind in 'iu':
+        return values.astype(np.int64, copy=False)
+    if values.dtype.kind == 'f':
+        with np.errstate(invalid='ignore'):
+            if (np.isfinite(values).all() and
+                    (np.abs(values) <= _MAX_EXACT_FLOAT).all() and
+                    (np.floor(values) == values).all()):
+                return values.astype(np.int64)
+    return None
+
+
+def write_archive(filename, activities, compress=True):
+    """Write several activities in an archive.
+
+    The archive is a single file storing the columns of each activity
+    contiguously. The integer channels (and the floating channels containing
+    only integers, e.g. the power) can be compressed by storing the varint of
+    the difference between consecutive samples. The other channels are stored
+    raw and are read without copy from the memory-mapped file. An index of
+    the starting time, the number of samples, and the byte offsets of each
+    activity is written at the end of the file and referenced by the header.
+
+    Read more in the :ref:`User Guide <reader>`.
+
+    Parameters
+    ----------
+    filename : str
+        The path of the archive.
+
+    activities : iterable of DataFrame
+        The activities, indexed by time, as returned by
+        :func:`sksports.io.bikeread`. They are written as they are iterated
+        such that a generator (e.g. from :func:`sksports.io.bikeread_many`)
+        is not held in memory.
+
+    compress : bool, default=True
+        Whether to compress the integer channels. If False, all the channels
+        are stored raw.
+
+    Returns
+    -------
+    n_activities : int
+        The number of activities written.
+
+    Examples
+    --------
+    >>> import os
+    >>> import tempfile
+    >>> from sksports.datasets import load_fit
+    >>> from sksports.io import bikeread, write_archive
+    >>> filename = os.path.join(tempfile.mkdtemp(), 'activities.sks')
+    >>> write_archive(filename, [bikeread(f) for f in load_fit()])
+    3
+
+    """
+    entries = []
+    with open(filename, 'wb') as f:
+        f.write(_PREAMBLE.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, 0, 0, 0))
+
+        def _write_channel(data, encoding, **metadata):
+            padding = -f.tell() % _ALIGNMENT
+            f.write(b'\x00' * padding)
+            metadata.update(encoding=encoding, offset=f.tell(),
+                            nbytes=data.nbytes)
+            f.write(data.tobytes())
+            return metadata
+
+        for activity in activities:
+            if not isinstance(activity.index, pd.DatetimeIndex):
+                raise ValueError('The activities should be indexed by time.'
+                                 ' Got {} instead.'
+                                 .format(type(activity.index).__name__))
+            index = activity.index.values.view(np.int64)
+            entry = OrderedDict(
+                [('start', int(index[0]) if index.size else 0),
+                 ('length', int(index.size)),
+                 ('freq', activity.index.freqstr),
+                 ('offset', None), ('nbytes', None),
+                 ('index', None), ('channels', [])])
+            start = f.tell()
+            if entry['freq'] is None:
+                # the time is stored in seconds whenever possible
+                unit = (10 ** 9 if not (index % 10 ** 9).any() else 1)
+                entry['index'] = _write_channel(
+                    _varint_encode(index // unit), 'delta-varint',
+                    dtype=np.dtype(np.int64).str, unit=unit)
+            for column in activity.columns:
+                values = activity[column].values
+                if values.dtype.kind not in 'biuf':
+                    raise ValueError('The column {!r} should be numerical.'
+                                     ' Got {} instead.'
+                                     .format(column, values.dtype))
+                integers = _integer_values(values) if compress else None
+                if integers is not None:
+                    channel = _write_channel(
+                        _varint_encode(integers), 'delta-varint',
+                        dtype=values.dtype.str)
+                else:
+                    channel = _write_channel(
+                        np.ascontiguousarray(values), 'raw',
+                        dtype=values.dtype.str)
+                channel['name'] = six.text_type(column)
+                entry['channels'].append(channel)
+            entry['offset'], entry['nbytes'] = start, f.tell() - start
+            entries.append(entry)
+
+        index = json.dumps(entries).encode('utf-8')
+        index_offset = f.tell()
+        f.write(index)
+        f.seek(0)
+        f.write(_PREAMBLE.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, 0,
+                               index_offset, len(index)))
+    return len(entries)
+
+
+class ActivityArchive(object):
+    """Read the activities of an archive written by
+    :func:`sksports.io.write_archive`.
+
+    The archive is memory-mapped and only the index is read when opening it.
+    :meth:`channel` returns the raw channels of an activity as views of the
+    file without copy while the compressed channels are decoded on access.
+    :meth:`read` and the iteration over the archive yield the activities as
+    DataFrame, such that it can be given to :class:`sksports.Rider` or
+    :func:`sksports.extraction.activities_power_profile`. Note that pandas
+    copies the channels into the blocks of the DataFrame.
+
+    Read more in the :ref:`User Guide <reader>`.
+
+    Parameters
+    ----------
+    filename : str
+        The path of the archive.
+
+    Attributes
+    ----------
+    start_times : DatetimeIndex
+        The starting time of each activity.
+
+    lengths : ndarray, shape (n_activities,)
+        The number of samples of each activity.
+
+    Examples
+    --------
+    >>> import os
+    >>> import tempfile
+    >>> from sksports.datasets import load_fit
+    >>> from sksports.io import ActivityArchive, bikeread, write_archive
+    >>> filename = os.path.join(tempfile.mkdtemp(), 'activities.sks')
+    >>> write_archive(filename, [bikeread(f) for f in load_fit()])
+    3
+    >>> archive = ActivityArchive(filename)
+    >>> archive.lengths
+    array([2257, 3813, 6704])
+    >>> archive[0].shape
+    (2257, 6)
+
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._buffer = np.memmap(filename, dtype=np.uint8, mode='r')
+        if self._buffer.size < _PREAMBLE.size:
+            raise ValueError('{!r} is not an activity archive.'
+                             .format(filename))
+        magic, version, _, index_offset, index_nbytes = _PREAMBLE.unpack(
+            self._buffer[:_PREAMBLE.size].tobytes())
+        if magic != ARCHIVE_MAGIC:
+            raise ValueError('{!r} is not an activity archive.'
+                             .format(filename))
+        if version > ARCHIVE_VERSION:
+            raise ValueError('The archive version {} is not supported. The'
+                             ' latest supported version is {}.'
+                             .format(version, ARCHIVE_VERSION))
+        self._entries = json.loads(
+            self._buffer[index_offset:index_offset + index_nbytes]
+            .tobytes().decode('utf-8'))
+        self.start_times = pd.DatetimeIndex(
+            np.array([entry['start'] for entry in self._entries],
+                     dtype=np.int64).view('datetime64[ns]'))
+        self.lengths = np.array([entry['length'] for entry in self._entries],
+                                dtype=np.int64)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getitem__(self, idx):
+        return self.read(idx)
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self.read(idx)
+
+    def _entry(self, idx):
+        try:
+            return self._entries[idx]
+        except (IndexError, TypeError):
+            raise IndexError('The archive contains {} activities. Got {!r}'
+                             ' instead.'.format(len(self), idx))
+
+    def _decode(self, channel, n_samples):
+        data = self._buffer[channel['offset']:
+                            channel['offset'] + channel['nbytes']]
+        dtype = np.dtype(str(channel['dtype']))
+        if channel['encoding'] == 'raw':
+            return data.view(np.ndarray).view(dtype)
+        return _varint_decode(data.view(np.ndarray), n_samples).astype(
+            dtype, copy=False)
+
+    def columns(self, idx):
+        """Get the names of the columns of an activity.
+
+        Parameters
+        ----------
+        idx : int
+            The position of the activity in the archive.
+
+        Returns
+        -------
+        columns : list of str
+            The names of the columns.
+
+        """
+        return [channel['name'] for channel in self._entry(idx)['channels']]
+
+    def channel(self, idx, column):
+        """Get a column of an activity.
+
+        Parameters
+        ----------
+        idx : int
+            The position of the activity in the archive.
+
+        column : str
+            The name of the column.
+
+        Returns
+        -------
+        values : ndarray, shape (n_samples,)
+            The values of the column. A raw channel is a read-only view of
+            the archive.
+
+        """
+        entry = self._entry(idx)
+        for channel in entry['channels']:
+            if channel['name'] == column:
+                return self._decode(channel, entry['length'])
+        raise KeyError('The activity {} has no column {!r}. The columns are'
+                       ' {}.'.format(idx, column, self.columns(idx)))
+
+    def index(self, idx):
+        """Get the time index of an activity.
+
+        Parameters
+        ----------
+        idx : int
+            The position of the activity in the archive.
+
+        Returns
+        -------
+        index : DatetimeIndex
+            The time of each sample.
+
+        """
+        entry = self._entry(idx)
+        if entry['index'] is None:
+            return pd.date_range(pd.Timestamp(entry['start']),
+                                 periods=entry['length'], freq=entry['freq'])
+        values = self._decode(entry['index'], entry['length'])
+        return pd.DatetimeIndex((values * entry['index']['unit'])
+                                .view('datetime64[ns]'))
+
+    def read(self, idx, columns=None):
+        """Read an activity.
+
+        Parameters
+        ----------
+        idx : int
+            The position of the activity in the archive.
+
+        columns : list of str, optional
+            The columns to read. By default, all the columns are read.
+
+        Returns
+        -------
+        data : DataFrame
+            The activity, identical to the DataFrame written. The channels
+            are copied into the DataFrame. Use :meth:`channel` to access a
+            raw channel without copy.
+
+        """
+        if columns is None:
+            columns = self.columns(idx)
+        return pd.DataFrame(
+            OrderedDict((column, self.channel(idx, column))
+                        for column in columns),
+            index=self.index(idx), columns=columns)
+
+    def close(self):
+        """Release the memory-mapped file.
+
+        The file is unmapped once the views returned are released.
+
+        Returns
+        -------
+        None
+
+        """
+        self._buffer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return 'ActivityArchive({!r}, n_activities={})'.format(
+            self.filename, len(self))
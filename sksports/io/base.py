@@ -4,14 +4,43 @@
 #          Cedric Lemaitre
 # License: MIT
 
+import multiprocessing
+import os
+from collections import OrderedDict
+from numbers import Integral
+
 import numpy as np
+import pandas as pd
 
+from .cache import check_cache
+from .fit import check_filename
+from .fit import check_schema
 from .fit import load_power_from_fit
+from .fit import open_file
+from .fit import records_to_frame
+from .fit import strip_compression
+from .gpx import load_power_from_gpx
+from .tcx import load_power_from_tcx
+from .text import TIME_HEADERS
+from .text import load_power_from_csv
+from ..utils.validation import split_zip_member
 
 DROP_OPTIONS = ('columns', 'rows', 'both')
 
+# extension of the files -> reader
+READERS = OrderedDict([
+    ('.fit', load_power_from_fit),
+    ('.tcx', load_power_from_tcx),
+    ('.gpx', load_power_from_gpx),
+    ('.csv', load_power_from_csv),
+])
+
+# number of bytes read to detect the format of a file without extension
+MAGIC_SIZE = 1024
 
-def bikeread(filename, drop_nan=None):
+
+def bikeread(filename, drop_nan=None, dtype=None, max_gap=None, schema=None,
+             cache=None):
     """Read power data file.
 
     Read more in the :ref:`User Guide <reader>`.
@@ -19,12 +48,44 @@ def bikeread(filename, drop_nan=None):
     Parameters
     ----------
     filename : str
-        Path to the file to read.
+        Path to the file to read. The FIT, TCX, GPX, and CSV files are
+        supported. The format is given by the extension of the file or
+        detected from its first bytes otherwise. The files compressed with
+        gzip (e.g. ``.fit.gz``) or bz2 (e.g. ``.fit.bz2``) and the members of
+        zip archives, given as ``'archive.zip/member.fit'``, are decompressed
+        while being decoded.
 
     drop_nan : str {'columns', 'rows', 'both'} or None
         Either to remove the columns/rows containing NaN values. By default,
         all data will be kept.
 
+    dtype : str or dtype, optional
+        The floating dtype of the data (e.g. ``np.float32`` to halve the
+        memory). By default, the data are stored in ``np.float64``.
+
+    max_gap : Timedelta, timedelta, np.timedelta64, int, or str, optional
+        The samples separated by more than ``max_gap`` (e.g. during an
+        auto-pause) are not resampled nor interpolated such that the gap is
+        not filled. By default, all gaps are filled with a linear
+        interpolation. An integer represents seconds.
+
+    schema : list of str or dict, optional
+        The columns to read among ``'power'``, ``'heart-rate'``,
+        ``'cadence'``, ``'distance'``, ``'elevation'``, ``'speed'``,
+        ``'left-right-balance'`` (raw FIT value: side flag in the highest bit
+        and percent in the others), ``'latitude'``, ``'longitude'`` (in
+        semicircles), ``'temperature'``, and ``'grade'``. A dict maps the
+        columns to their storage dtype. The other fields are not decoded.
+        The columns are stored with compact dtypes (e.g. ``np.uint16`` for
+        the power) which are only promoted to floating dtypes when missing
+        values need to be interpolated. By default, the six first columns
+        are read.
+
+    cache : str or ActivityCache, optional
+        The cache, or its directory, storing the activities read. The
+        activity is read from the cache if the same file was read with the
+        same options. By default, no cache is used.
+
     Returns
     -------
     data : DataFrame
@@ -48,8 +109,129 @@ def bikeread(filename, drop_nan=None):
         raise ValueError('"drop_nan" should be one of {}.'
                          ' Got {} instead.'.format(DROP_OPTIONS, drop_nan))
 
-    df = load_power_from_fit(filename)
+    reader = _get_reader(check_filename(filename))
+    cache = check_cache(cache)
+    if cache is not None:
+        # the options are normalized such that the key does not depend on
+        # their representation
+        key = cache.key(
+            filename, drop_nan=drop_nan,
+            dtype=None if dtype is None else np.dtype(dtype).str,
+            max_gap=None if max_gap is None else _check_max_gap(
+                max_gap).value,
+            schema=None if schema is None else [
+                (column, column_dtype.str) for column, column_dtype
+                in check_schema(schema).items()])
+        df = cache.get(key)
+        if df is not None:
+            return df
+
+    df = _process_activity(reader(filename, schema=schema), drop_nan, dtype,
+                           max_gap, schema)
+
+    if cache is not None:
+        cache.put(key, df)
+
+    return df
+
+
+def _get_reader(filename):
+    """Get the reader of a file from its extension or its first bytes."""
+    archive, member = split_zip_member(filename)
+    name = strip_compression(filename if member is None else member)
+    extension = os.path.splitext(name)[1].lower()
+    if extension in READERS:
+        return READERS[extension]
+
+    with open_file(filename) as fileobj:
+        magic = fileobj.read(MAGIC_SIZE)
+    if magic[8:12] == b'.FIT':
+        return load_power_from_fit
+    elif b'<TrainingCenterDatabase' in magic:
+        return load_power_from_tcx
+    elif b'<gpx' in magic:
+        return load_power_from_gpx
+    header = magic.split(b'\n', 1)[0].decode('utf-8', 'replace').lower()
+    headers = [header.strip().strip('"') for header in header.split(',')]
+    if any(time_header in headers for time_header in TIME_HEADERS[:2]):
+        return load_power_from_csv
+    raise ValueError('The format of the file {} is not supported. The'
+                     ' supported formats are {}.'
+                     .format(filename, list(READERS)))
+
+
+def frame_from_blocks(blocks, drop_nan=None, dtype=None, max_gap=None,
+                      schema=None):
+    """Assemble blocks of records into the DataFrame of an activity.
 
+    The blocks are concatenated column by column such that the memory used
+    stays close to the size of the activity.
+
+    Read more in the :ref:`User Guide <reader>`.
+
+    Parameters
+    ----------
+    blocks : iterable of dict
+        The blocks yielded by :func:`sksports.io.iter_fit_blocks`.
+
+    drop_nan : str {'columns', 'rows', 'both'} or None
+        Refer to :func:`sksports.io.bikeread`.
+
+    dtype : str or dtype, optional
+        Refer to :func:`sksports.io.bikeread`.
+
+    max_gap : Timedelta, timedelta, np.timedelta64, int, or str, optional
+        Refer to :func:`sksports.io.bikeread`.
+
+    schema : list of str or dict, optional
+        The schema given to :func:`sksports.io.iter_fit_blocks`.
+
+    Returns
+    -------
+    data : DataFrame
+        The activity, identical to the DataFrame returned by
+        :func:`sksports.io.bikeread` with the same options.
+
+    Examples
+    --------
+    >>> from sksports.datasets import load_fit
+    >>> from sksports.io import frame_from_blocks, iter_fit_blocks
+    >>> blocks = iter_fit_blocks(load_fit()[0], block_size=1000)
+    >>> activity = frame_from_blocks(blocks)
+    >>> activity.shape
+    (2257, 6)
+
+    """
+    if drop_nan is not None and drop_nan not in DROP_OPTIONS:
+        raise ValueError('"drop_nan" should be one of {}.'
+                         ' Got {} instead.'.format(DROP_OPTIONS, drop_nan))
+
+    columns = OrderedDict()
+    for block in blocks:
+        for column, values in block.items():
+            columns.setdefault(column, []).append(values)
+    data = OrderedDict()
+    for column in list(columns):
+        data[column] = _concatenate_blocks(columns.pop(column))
+    if not data:
+        raise IOError('The blocks do not contain any data.')
+    return _process_activity(records_to_frame(data), drop_nan, dtype,
+                             max_gap, schema)
+
+
+def _concatenate_blocks(arrays):
+    """Concatenate the values of a column from several blocks."""
+    if (any(values.dtype == object for values in arrays) and
+            not all(values.dtype == object for values in arrays)):
+        # the blocks in which a field is always invalid give None instead of
+        # the NaN of the other blocks
+        arrays = [np.full(values.size, np.nan) if values.dtype == object
+                  else values for values in arrays]
+    return np.concatenate(arrays)
+
+
+def _process_activity(df, drop_nan, dtype, max_gap, schema):
+    """Clean and resample the records read from a file."""
     if drop_nan is not None:
         if drop_nan == 'columns':
             df.dropna(axis=1, inplace=True)
@@ -59,8 +241,305 @@ def bikeread(filename, drop_nan=None):
             df.dropna(axis=1, inplace=True).dropna(axis=0, inplace=True)
 
     # remove possible outliers by clipping the value
-    df[df['power'] > 2500.] = np.nan
+    if 'power' in df.columns:
+        outliers = df['power'] > 2500.
+        # the compact dtypes of a schema are only promoted when needed
+        if schema is None or outliers.any():
+            df[outliers] = np.nan
 
     # resample to have a precision of a second with additional linear
     # interpolation for missing value
-    return df.resample('s').interpolate('linear')
+    df = _resample_seconds(
+        df, max_gap=None if max_gap is None else _check_max_gap(max_gap),
+        dtype=dtype)
+
+    if dtype is not None:
+        # only the columns which were not interpolated are converted
+        df = df.astype(dtype, copy=False)
+
+    return df
+
+
+def _check_max_gap(max_gap):
+    if isinstance(max_gap, Integral):
+        return pd.Timedelta(seconds=max_gap)
+    return pd.Timedelta(max_gap)
+
+
+def _sort_samples(index):
+    """Sort the timestamps and keep the last sample of each timestamp.
+
+    Returns the positions of the samples kept and their timestamps in
+    nanoseconds.
+
+    """
+    timestamps = index.values.view(np.int64)
+    # the stable sort keeps the samples of a timestamp in the order of the
+    # file such that the last one recorded is kept
+    order = np.argsort(timestamps, kind='mergesort')
+    timestamps = timestamps[order]
+    last = np.ones(timestamps.size, dtype=bool)
+    np.not_equal(timestamps[1:], timestamps[:-1], out=last[:-1])
+    return order[last], timestamps[last]
+
+
+def _interpolate_rows(block, starts):
+    """Linearly interpolate the NaN of each row of ``block`` in place.
+
+    ``starts`` gives the first column of each segment, which is interpolated
+    independently. The NaN before the first value of a segment are kept and
+    the ones after the last value take this last value as ``np.interp``.
+
+    """
+    n_samples = block.shape[1]
+    missing = np.isnan(block)
+    positions = np.arange(n_samples)
+    previous = np.where(missing, -1, positions)
+    np.maximum.accumulate(previous, axis=1, out=previous)
+    following = np.where(missing, n_samples, positions)[:, ::-1]
+    np.minimum.accumulate(following, axis=1, out=following)
+    following = following[:, ::-1]
+    if starts.size > 1:
+        # the neighbours are searched within the segment of each sample
+        lengths = np.diff(np.append(starts, n_samples))
+        previous[previous < np.repeat(starts, lengths)] = -1
+        following[following >= np.repeat(starts + lengths, lengths)] = \
+            n_samples
+
+    # flat indices are faster to gather than pairs of indices
+    missing &= previous >= 0
+    missing = np.flatnonzero(missing)
+    cols = missing % n_samples
+    offsets = missing - cols
+    x0 = previous.ravel().take(missing)
+    x1 = following.ravel().take(missing)
+    flat = block.reshape(-1)
+    values = flat.take(offsets + x0)
+    inside = np.flatnonzero(x1 < n_samples)
+    x0, x1, y0 = x0[inside], x1[inside], values[inside]
+    # same arithmetic as np.interp such that the values are identical
+    slope = (flat.take(offsets[inside] + x1) - y0) / (x1 - x0)
+    values[inside] = slope * (cols[inside] - x0) + y0
+    flat[missing] = values
+
+
+def _resample_seconds(df, max_gap=None, dtype=None):
+    """Resample an activity at 1 Hz with a linear interpolation.
+
+    The values are placed on a grid of seconds going from the first to the
+    last timestamp, rounded down to the second, and the missing values are
+    linearly interpolated. It gives the same values as
+    ``df.resample('s').interpolate('linear')``: only the samples recorded at
+    an exact second are kept. The samples are sorted by timestamp and, when
+    several samples share the same timestamp, the last one recorded is kept.
+
+    Parameters
+    ----------
+    df : DataFrame
+        The records of an activity indexed by their timestamp.
+
+    max_gap : Timedelta, optional
+        The parts separated by more than ``max_gap`` are resampled
+        independently such that the gap is not filled.
+
+    dtype : str or dtype, optional
+        The floating dtype in which the numeric columns are resampled. By
+        default, the columns are interpolated in ``np.float64`` and keep
+        their dtype.
+
+    Returns
+    -------
+    data : DataFrame
+        The activity resampled at 1 Hz.
+
+    """
+    kept, timestamps = _sort_samples(df.index)
+    seconds = timestamps // 1000000000
+    if max_gap is None:
+        gaps = np.empty(0, dtype=np.intp)
+    else:
+        gaps = np.flatnonzero(np.diff(timestamps) > max_gap.value) + 1
+    bounds = np.concatenate([[0], gaps, [timestamps.size]])
+    if timestamps.size == 0:
+        bounds = bounds[:1]
+    first, last = seconds[bounds[:-1]], seconds[bounds[1:] - 1]
+    lengths = last - first + 1
+    starts = (np.cumsum(lengths) - lengths).astype(np.intp)
+    n_samples = int(lengths.sum())
+
+    # grid position of the samples recorded at an exact second or, as
+    # pandas, of the samples of a part regularly sampled at 1 Hz
+    irregular = np.concatenate(
+        [[0], np.cumsum(np.diff(timestamps) != 1000000000)])
+    regular = ((np.diff(bounds) >= 3) &
+               (irregular[bounds[1:] - 1] == irregular[bounds[:-1]]))
+    segment = np.repeat(np.arange(lengths.size), np.diff(bounds))
+    exact = (timestamps % 1000000000 == 0) | regular[segment]
+    positions = (seconds - first[segment] + starts[segment])[exact]
+    kept = kept[exact]
+    complete = positions.size == n_samples
+
+    dtypes = df.dtypes.values
+    numeric = [idx for idx, column_dtype in enumerate(dtypes)
+               if column_dtype.kind in 'iuf']
+    # all the numeric columns are placed and interpolated in a single block,
+    # allocated with the requested dtype to bound the memory used
+    block = np.full((len(numeric), n_samples), np.nan,
+                    dtype=np.float64 if dtype is None else dtype)
+    for row, idx in enumerate(numeric):
+        block[row, positions] = df.iloc[:, idx].values[kept]
+    # the missing values of a complete grid (e.g. sensor dropouts) are
+    # interpolated as well, only in the rows containing some
+    missing = np.isnan(block).any(axis=1)
+    if missing.all() and missing.size:
+        _interpolate_rows(block, starts)
+    elif missing.any():
+        missing_rows = block[missing]
+        _interpolate_rows(missing_rows, starts)
+        block[missing] = missing_rows
+
+    index = pd.DatetimeIndex(
+        (np.repeat(first - starts, lengths) + np.arange(n_samples)) *
+        1000000000, freq='S' if max_gap is None else None,
+        name=df.index.name)
+    if df.index.tz is not None:
+        index = index.tz_localize('UTC').tz_convert(df.index.tz)
+    from_block = [dtype is not None or dtypes[idx] == np.float64 or
+                  (dtypes[idx].kind in 'iu' and not complete)
+                  for idx in numeric]
+    if len(numeric) == df.shape[1] and all(from_block):
+        # the block is wrapped without copy
+        return pd.DataFrame(block.T, index=index, columns=df.columns)
+
+    data = OrderedDict()
+    rows = dict((idx, row) for row, idx in enumerate(numeric))
+    for idx, column in enumerate(df.columns):
+        values = df.iloc[:, idx].values
+        if idx in rows:
+            if from_block[rows[idx]]:
+                resampled = block[rows[idx]]
+            elif values.dtype.kind in 'iu':
+                resampled = np.empty(n_samples, dtype=values.dtype)
+                resampled[positions] = values[kept]
+            else:
+                resampled = block[rows[idx]]
+                if values.dtype.kind == 'f':
+                    resampled = resampled.astype(values.dtype, copy=False)
+        else:
+            resampled = np.full(n_samples, np.nan, dtype=object)
+            resampled[positions] = values[kept]
+            if complete:
+                resampled = resampled.astype(values.dtype, copy=False)
+        data[column] = resampled
+    return pd.DataFrame(data, index=index, columns=df.columns)
+
+
+def _bikeread_arrays(args):
+    """Read a file and return its columns as arrays.
+
+    The arrays are pickled faster than the DataFrame when sent back from a
+    worker process.
+
+    """
+    idx_file, filename, params = args
+    df = bikeread(filename, **params)
+    return (idx_file, df.index.values.view(np.int64), df.index.freqstr,
+            [(column, df[column].values) for column in df.columns])
+
+
+def _arrays_to_frame(index, freq, columns):
+    return pd.DataFrame(OrderedDict(columns),
+                        index=pd.DatetimeIndex(index, freq=freq))
+
+
+def _effective_n_jobs(n_jobs):
+    if not isinstance(n_jobs, Integral) or n_jobs == 0:
+        raise ValueError('"n_jobs" should be a non-zero integer. Got {!r}'
+                         ' instead.'.format(n_jobs))
+    if n_jobs < 0:
+        return max(multiprocessing.cpu_count() + 1 + n_jobs, 1)
+    return n_jobs
+
+
+def bikeread_many(filenames, n_jobs=1, ordered=True, chunksize=None,
+                  drop_nan=None, dtype=None, max_gap=None, schema=None,
+                  cache=None):
+    """Read several power data files with a pool of processes.
+
+    Read more in the :ref:`User Guide <reader>`.
+
+    Parameters
+    ----------
+    filenames : list of str
+        Paths to the files to read.
+
+    n_jobs : int, default=1
+        The number of processes reading the files. ``-1`` uses all the
+        processors. With ``n_jobs=1``, the files are read in the current
+        process.
+
+    ordered : bool, default=True
+        Whether to yield the activities in the order of ``filenames``.
+        Otherwise, they are yielded as soon as they are read.
+
+    chunksize : int, optional
+        The number of files sent at once to a process. By default, the files
+        are split in about four chunks per process.
+
+    drop_nan : str {'columns', 'rows', 'both'} or None
+        Refer to :func:`sksports.io.bikeread`.
+
+    dtype : str or dtype, optional
+        Refer to :func:`sksports.io.bikeread`.
+
+    max_gap : Timedelta, timedelta, np.timedelta64, int, or str, optional
+        Refer to :func:`sksports.io.bikeread`.
+
+    schema : list of str or dict, optional
+        Refer to :func:`sksports.io.bikeread`.
+
+    cache : str or ActivityCache, optional
+        Refer to :func:`sksports.io.bikeread`. The cache can be shared by
+        the processes.
+
+    Yields
+    ------
+    filename : str
+        The path of the file read.
+
+    data : DataFrame
+        Power data and time data, as returned by
+        :func:`sksports.io.bikeread`.
+
+    Examples
+    --------
+    >>> from sksports.datasets import load_fit
+    >>> from sksports.io import bikeread_many
+    >>> activities = [activity for _, activity
+    ...               in bikeread_many(load_fit(), n_jobs=2)]
+    >>> len(activities)
+    3
+
+    """
+    filenames = list(filenames)
+    n_jobs = min(_effective_n_jobs(n_jobs), max(len(filenames), 1))
+    params = {'drop_nan': drop_nan, 'dtype': dtype, 'max_gap': max_gap,
+              'schema': schema, 'cache': check_cache(cache)}
+    if n_jobs == 1:
+        for filename in filenames:
+            yield filename, bikeread(filename, **params)
+        return
+
+    tasks = [(idx_file, filename, params)
+             for idx_file, filename in enumerate(filenames)]
+    if chunksize is None:
+        chunksize = max(len(tasks) // (4 * n_jobs), 1)
+    pool = multiprocessing.Pool(n_jobs)
+    try:
+        imap = pool.imap if ordered else pool.imap_unordered
+        for idx_file, index, freq, columns in imap(_bikeread_arrays, tasks,
+                                                   chunksize):
+            yield filenames[idx_file], _arrays_to_frame(index, freq, columns)
+    finally:
+        pool.terminate()
+        pool.join()
@@ -0,0 +1,283 @@
+"""On-disk cache of the activities read."""
+
+# Authors: Guillaume Lemaitre <g.lemaitre58@gmail.com>
+#          Cedric Lemaitre
+# License: MIT
+
+import errno
+import hashlib
+import os
+import tempfile
+import warnings
+import zipfile
+from collections import OrderedDict
+from numbers import Integral
+
+import numpy as np
+import pandas as pd
+import six
+
+from .fit import open_file
+
+# bump the version when the content of the entries changes
+CACHE_VERSION = 1
+CACHE_SUFFIX = '.npz'
+
+
+def _replace(src, dst):
+    """Atomically move ``src`` to ``dst``, overwriting it if it exists."""
+    if hasattr(os, 'replace'):
+        os.replace(src, dst)
+    else:
+        # os.rename overwrites atomically on POSIX
+        os.rename(src, dst)
+
+
+def _remove(path):
+    """Remove a file which could have been removed by another process."""
+    try:
+        os.remove(path)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+
+
+class ActivityCache(object):
+    """On-disk cache of the activities read with :func:`sksports.io.bikeread`.
+
+    The activities are stored in a directory, in the NumPy ``.npz`` format,
+    and are addressed by the hash of the content of the file read and of the
+    reading options. The least recently used activities are evicted when the
+    size of the cache exceeds ``max_size``. The entries are written in a
+    temporary file which is atomically renamed such that several processes
+    can share the same cache. The entries are loaded without pickle: the
+    columns of objects, given by the fields invalid in all the records, are
+    stored as NaN and the activities with other objects are not cached.
+
+    Read more in the :ref:`User Guide <reader>`.
+
+    Parameters
+    ----------
+    directory : str
+        The directory storing the activities. It is created if it does not
+        exist.
+
+    max_size : int, optional
+        The maximum size of the cache in bytes. By default, the size is not
+        bounded.
+
+    Examples
+    --------
+    >>> import tempfile
+    >>> from sksports.datasets import load_fit
+    >>> from sksports.io import ActivityCache, bikeread
+    >>> cache = ActivityCache(tempfile.mkdtemp(), max_size=10 * 1024 ** 2)
+    >>> activity = bikeread(load_fit()[0], cache=cache)
+    >>> len(cache)
+    1
+
+    """
+
+    def __init__(self, directory, max_size=None):
+        if max_size is not None and (not isinstance(max_size, Integral) or
+                                     max_size <= 0):
+            raise ValueError('"max_size" should be a positive integer. Got'
+                             ' {!r} instead.'.format(max_size))
+        self.directory = directory
+        self.max_size = max_size
+        try:
+            os.makedirs(directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST or not os.path.isdir(directory):
+                raise
+
+    def key(self, filename, **options):
+        """Compute the key addressing an activity.
+
+        Parameters
+        ----------
+        filename : str
+            The path of the file read. The key of a compressed file is
+            computed from its decompressed content.
+
+        **options : dict
+            The options used to read the file. They should have a stable
+            representation.
+
+        Returns
+        -------
+        key : str
+            The hexadecimal digest of the content and the options.
+
+        """
+        digest = hashlib.sha256()
+        with open_file(filename) as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        digest.update(repr((CACHE_VERSION, sorted(options.items())))
+                      .encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def _entries(self):
+        """List the path, last access time and size of the entries."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # evicted by another process
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def __len__(self):
+        return len(self._entries())
+
+    @property
+    def size(self):
+        """The size of the cache in bytes."""
+        return sum(size for _, _, size in self._entries())
+
+    def get(self, key):
+        """Get the activity addressed by ``key``.
+
+        Parameters
+        ----------
+        key : str
+            The key returned by :meth:`key`.
+
+        Returns
+        -------
+        data : DataFrame or None
+            The activity or ``None`` if it is not in the cache.
+
+        """
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                columns = [six.text_type(column)
+                           for column in entry['columns']]
+                freq = six.text_type(entry['freq']) or None
+                index = pd.DatetimeIndex(entry['index'], freq=freq)
+                data = pd.DataFrame(
+                    OrderedDict((column, _load_column(entry, idx))
+                                for idx, column in enumerate(columns)),
+                    index=index, columns=columns)
+        except (IOError, OSError):
+            return None
+        except (ValueError, KeyError, zipfile.BadZipfile):
+            # an entry which cannot be read is discarded
+            _remove(path)
+            return None
+        try:
+            # the modification time tracks the last access for the eviction
+            os.utime(path, None)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key, data):
+        """Store an activity and evict the least recently used ones.
+
+        Parameters
+        ----------
+        key : str
+            The key returned by :meth:`key`.
+
+        data : DataFrame
+            The activity to store.
+
+        Returns
+        -------
+        None
+
+        """
+        arrays = {'index': data.index.values.view(np.int64),
+                  'freq': np.array(data.index.freqstr or ''),
+                  'columns': np.array([six.text_type(column)
+                                       for column in data.columns])}
+        for idx, column in enumerate(data.columns):
+            values = data[column].values
+            if values.dtype == object:
+                # the entries are loaded without pickle: the columns of the
+                # fields invalid in all the records are stored as NaN
+                if not pd.isnull(values).all():
+                    warnings.warn('The activity is not cached since its'
+                                  ' column {!r} contains objects.'
+                                  .format(column))
+                    return
+                arrays['none_{}'.format(idx)] = np.array(
+                    [value is None for value in values], dtype=bool)
+                values = np.full(values.size, np.nan)
+            arrays['column_{}'.format(idx)] = values
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays)
+            _replace(tmp_path, self._path(key))
+        except BaseException:
+            _remove(tmp_path)
+            raise
+        self._evict(keep=self._path(key))
+
+    def _evict(self, keep):
+        if self.max_size is None:
+            return
+        entries = sorted(self._entries())
+        total_size = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if total_size <= self.max_size:
+                break
+            # the entry just stored is kept even if it exceeds the size
+            if path == keep:
+                continue
+            _remove(path)
+            total_size -= size
+
+    def clear(self):
+        """Remove all the activities of the cache.
+
+        Returns
+        -------
+        None
+
+        """
+        for _, path, _ in self._entries():
+            _remove(path)
+
+
+def _load_column(entry, idx):
+    """Load a column of an entry, restoring the columns of objects."""
+    values = entry['column_{}'.format(idx)]
+    if 'none_{}'.format(idx) in entry.files:
+        values = values.astype(object)
+        values[entry['none_{}'.format(idx)]] = None
+    return values
+
+
+def check_cache(cache):
+    """Check the cache given to the readers.
+
+    Parameters
+    ----------
+    cache : str, ActivityCache, or None
+        A directory or a cache.
+
+    Returns
+    -------
+    cache : ActivityCache or None
+        The cache.
+
+    """
+    if cache is None or isinstance(cache, ActivityCache):
+        return cache
+    if isinstance(cache, six.string_types):
+        return ActivityCache(cache)
+    raise ValueError('"cache" should be a directory or an ActivityCache. Got'
+                     ' {!r} instead.'.format(cache))
@@ -4,8 +4,15 @@
 #          Cedric Lemaitre
 # License: MIT
 
+import bz2
+import gzip
+import io
 import os
+import zipfile
 from collections import defaultdict
+from collections import OrderedDict
+from contextlib import contextmanager
+from numbers import Integral
 
 import pandas as pd
 import numpy as np
@@ -13,10 +20,88 @@ import six
 
 from fitparse import FitFile
 
+from ._fit import FitDecodeError
+from ._fit import RECORD_FIELDS
+from ._fit import iter_records
+from ._fit import read_records
+from ..utils.validation import split_zip_member
+
 # 'timestamp' will be consider as the index of the DataFrame later on
 FIELDS_DATA = ('timestamp', 'power', 'heart_rate', 'cadence', 'distance',
                'altitude', 'speed')
 
+# column of the DataFrame -> field of the FIT record messages
+FIELDS_COLUMNS = OrderedDict([
+    ('power', 'power'),
+    ('heart-rate', 'heart_rate'),
+    ('cadence', 'cadence'),
+    ('distance', 'distance'),
+    ('elevation', 'altitude'),
+    ('speed', 'speed'),
+    ('left-right-balance', 'left_right_balance'),
+    ('latitude', 'position_lat'),
+    ('longitude', 'position_long'),
+    ('temperature', 'temperature'),
+    ('grade', 'grade'),
+])
+
+# field of the FIT record messages -> column of the DataFrame
+FIELDS_COLUMNS_INV = {field: column
+                      for column, field in FIELDS_COLUMNS.items()}
+
+# extension of the compressed files -> class decompressing the stream
+COMPRESSIONS = OrderedDict([('.gz', gzip.GzipFile), ('.bz2', bz2.BZ2File)])
+
+# compact dtype of the columns selected with a schema
+SCHEMA_DTYPES = {
+    'power': np.uint16,
+    'heart-rate': np.uint8,
+    'cadence': np.uint8,
+    'distance': np.float64,
+    'elevation': np.float32,
+    'speed': np.float32,
+    'left-right-balance': np.uint8,
+    'latitude': np.int32,
+    'longitude': np.int32,
+    'temperature': np.int8,
+    'grade': np.float32,
+}
+
+
+def check_filename(filename, extension=None):
+    """Check that a file exists, possibly compressed or in a zip archive.
+
+    Parameters
+    ----------
+    filename : str
+        The file to check. Refer to :func:`open_file` for the compressed
+        files and the members of zip archives.
+
+    extension : str, optional
+        The extension that the file should have once decompressed (e.g.
+        ``'.fit'``). By default, the extension is not checked.
+
+    Returns
+    -------
+    filename : str
+        The checked filename.
+
+    """
+    if not isinstance(filename, six.string_types):
+        raise ValueError('filename needs to be a string. Got {}'.format(
+            type(filename)))
+    archive, member = split_zip_member(filename)
+    name = strip_compression(filename if member is None else member)
+    if extension is not None and not name.lower().endswith(extension):
+        raise ValueError('The file is not a {} file.'.format(extension[1:]))
+    if member is None and os.path.isfile(filename):
+        return filename
+    elif member is not None and zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive) as zip_file:
+            if member in zip_file.namelist():
+                return filename
+    raise ValueError('The file does not exist.')
+
 
 def check_filename_fit(filename):
     """Method to check if the filename corresponds to a fit file.
@@ -32,30 +117,181 @@ def check_filename_fit(filename):
         The checked filename.
 
     """
+    return check_filename(filename, '.fit')
 
-    # Check that filename is of string type
-    if isinstance(filename, six.string_types):
-        # Check that this is a fit file
-        if filename.endswith('.fit'):
-            # Check that the file is existing
-            if os.path.isfile(filename):
-                return filename
-            else:
-                raise ValueError('The file does not exist.')
+
+def strip_compression(filename):
+    """Remove the extension of the compression from a filename."""
+    for extension in COMPRESSIONS:
+        if filename.endswith(extension):
+            return filename[:-len(extension)]
+    return filename
+
+
+@contextmanager
+def open_file(filename, seekable=False):
+    """Open the binary stream of an activity file.
+
+    The files compressed with gzip (e.g. ``.fit.gz``) or bz2 (e.g.
+    ``.fit.bz2``) and the members of zip archives (e.g.
+    ``'archive.zip/member.fit'``) are decompressed while they are read,
+    without being extracted on the disk.
+
+    Parameters
+    ----------
+    filename : str
+        The path to the file, checked with :func:`check_filename`.
+
+    seekable : bool, default=False
+        Whether the stream should support seeking from the end. A
+        decompressed stream is then read in memory.
+
+    Yields
+    ------
+    fileobj : file-like object
+        The binary data.
+
+    """
+    archive, member = split_zip_member(filename)
+    # the files are closed in the reverse order of their opening
+    opened = []
+    try:
+        if member is None:
+            opened.append(open(filename, 'rb'))
         else:
-            raise ValueError('The file is not a fit file.')
+            zip_file = zipfile.ZipFile(archive)
+            opened.append(zip_file)
+            opened.append(zip_file.open(member))
+        name = filename if member is None else member
+        compressed = False
+        for extension, decompressor in COMPRESSIONS.items():
+            if name.endswith(extension):
+                opened.append(decompressor(fileobj=opened[-1], mode='rb')
+                              if decompressor is gzip.GzipFile
+                              else decompressor(opened[-1], mode='rb'))
+                compressed = True
+        if seekable and (member is not None or compressed):
+            opened.append(io.BytesIO(opened[-1].read()))
+        yield opened[-1]
+    finally:
+        for fileobj in reversed(opened):
+            fileobj.close()
+
+
+def check_schema(schema):
+    """Check the schema of the columns to decode.
+
+    Parameters
+    ----------
+    schema : list of str, dict, or None
+        The columns to decode or a dict mapping the columns to their dtype.
+        The columns given in a list or mapped to ``None`` are stored with the
+        dtype of ``SCHEMA_DTYPES``.
+
+    Returns
+    -------
+    schema : OrderedDict or None
+        The dtype of each column to decode.
+
+    """
+    if schema is None:
+        return None
+    if isinstance(schema, dict):
+        schema = OrderedDict(schema.items())
     else:
-        raise ValueError('filename needs to be a string. Got {}'.format(
-            type(filename)))
+        schema = OrderedDict((column, None) for column in schema)
+    if not schema:
+        raise ValueError('"schema" should contain at least one column.')
+
+    for column, dtype in schema.items():
+        if column not in FIELDS_COLUMNS:
+            raise ValueError('"schema" should contain columns among {}. Got'
+                             ' {!r} instead.'.format(list(FIELDS_COLUMNS),
+                                                     column))
+        dtype = np.dtype(SCHEMA_DTYPES[column] if dtype is None else dtype)
+        _, scale, offset = RECORD_FIELDS[FIELDS_COLUMNS[column]]
+        if dtype.kind in 'iu' and (scale or offset):
+            raise ValueError('The column {!r} cannot be stored with the'
+                             ' integer dtype {} since its values are'
+                             ' scaled.'.format(column, dtype))
+        if dtype.kind not in 'iuf':
+            raise ValueError('The column {!r} should be stored with a'
+                             ' numeric dtype. Got {} instead.'
+                             .format(column, dtype))
+        schema[column] = dtype
+    return schema
+
+
+def _read_records_fitparse(fileobj, fields=FIELDS_DATA, check_crc=True,
+                           dtypes=None):
+    """Read the record messages with fitparse.
+
+    Without ``dtypes``, the values are stored as decoded by fitparse.
+    Otherwise, the columns are converted as in
+    :func:`sksports.io._fit.read_records`.
+
+    """
+    activity = FitFile(fileobj, check_crc=check_crc)
+    activity.parse()
+    records = activity.get_messages(name='record')
+
+    data = defaultdict(list)
+    if dtypes is None:
+        for rec in records:
+            values = rec.get_values()
+            for key in fields:
+                data[key].append(values.get(key, np.NaN))
+        return data
+
+    for rec in records:
+        for key in fields:
+            field_data = rec.get(key)
+            if field_data is None:
+                value = None
+            elif key == 'timestamp' or RECORD_FIELDS[key][1]:
+                value = field_data.value
+            else:
+                # the raw value is not rendered (e.g. the balance side)
+                value = field_data.raw_value
+            data[key].append(np.NaN if value is None else value)
+
+    for key in fields:
+        if key == 'timestamp':
+            data[key] = np.array(data[key], dtype='datetime64[ns]')
+            continue
+        column = np.array(data[key], dtype=np.float64)
+        dtype = dtypes[key]
+        if dtype.kind in 'iu' and np.isnan(column).any():
+            dtype = np.result_type(dtype, np.float32)
+        data[key] = column.astype(dtype)
+    return data
 
 
-def load_power_from_fit(filename):
+def load_power_from_fit(filename, check_crc=True, schema=None):
     """Method to open the power data from FIT file into a pandas dataframe.
 
+    The record messages are decoded directly into NumPy columns. The files
+    which cannot be decoded this way (e.g. corrupted files or unusual
+    layouts) are read with fitparse instead.
+
     Parameters
     ----------
     filename : str,
-        Path to the FIT file.
+        Path to the FIT file, possibly compressed. Refer to
+        :func:`open_file`.
+
+    check_crc : bool, default=True
+        Whether to check the CRC of the file. Skipping the check speeds up
+        the reading.
+
+    schema : list of str or dict, optional
+        The columns to decode, among the keys of ``FIELDS_COLUMNS``, or a
+        dict mapping these columns to their storage dtype. The columns given
+        in a list are stored with the compact dtype of ``SCHEMA_DTYPES``
+        (e.g. ``np.uint16`` for the power). An integer column is promoted to
+        a floating dtype only if some values are missing. The other fields
+        are not decoded. By default, the power, heart-rate, cadence,
+        distance, elevation, and speed are decoded as with fitparse.
 
     Returns
     -------
@@ -63,27 +299,188 @@ def load_power_from_fit(filename):
         Power records of the ride.
 
     """
-    filename = check_filename_fit(filename)
-    activity = FitFile(filename)
-    activity.parse()
-    records = activity.get_messages(name='record')
+    filename = check_filename(filename)
+    fields, dtypes = _schema_fields(check_schema(schema))
+    try:
+        with open_file(filename) as fileobj:
+            data = read_records(fileobj, fields, check_crc=check_crc,
+                                dtypes=dtypes)
+    except FitDecodeError:
+        # fitparse decodes the layouts which are not supported or reports
+        # the error
+        with open_file(filename, seekable=True) as fileobj:
+            data = _read_records_fitparse(fileobj, fields,
+                                          check_crc=check_crc, dtypes=dtypes)
+
+    return records_to_frame(_rename_records(data, fields), filename)
+
+
+def _schema_fields(schema):
+    """Get the FIT fields to decode and their dtypes from a schema."""
+    if schema is None:
+        return FIELDS_DATA, None
+    fields = (FIELDS_DATA[0],) + tuple(FIELDS_COLUMNS[column]
+                                       for column in schema)
+    dtypes = {FIELDS_COLUMNS[column]: dtype
+              for column, dtype in schema.items()}
+    return fields, dtypes
+
+
+def _rename_records(data, fields):
+    """Name the decoded fields as the columns of the DataFrame."""
+    return OrderedDict((FIELDS_COLUMNS_INV.get(field, field), data[field])
+                       for field in fields)
 
-    data = defaultdict(list)
-    for rec in records:
-        values = rec.get_values()
-        for key in FIELDS_DATA:
-            data[key].append(values.get(key, np.NaN))
 
-    data = pd.DataFrame(data)
+def records_to_frame(data, filename=None):
+    """Build the DataFrame of the records indexed by their timestamp.
+
+    Parameters
+    ----------
+    data : dict
+        The columns of the records, including the ``'timestamp'``, in the
+        order of the DataFrame.
+
+    filename : str, optional
+        The file read, reported if there are no records.
+
+    Returns
+    -------
+    data : DataFrame
+        Power records of the ride.
+
+    """
+    data = pd.DataFrame(data, columns=list(data))
     if data.empty:
         raise IOError('The file {} does not contain any data.'.format(
             filename))
 
-    # rename the columns for consistency
-    data.rename(columns={'heart_rate': 'heart-rate', 'altitude': 'elevation'},
-                inplace=True)
-
     data.set_index(FIELDS_DATA[0], inplace=True)
     del data.index.name
 
     return data
+
+
+def columns_to_frame(timestamps, columns, schema=None, filename=None):
+    """Build the DataFrame of an activity from columns of floats.
+
+    It is used by the readers of the formats storing text values, which are
+    buffered as floats with NaN for the missing values.
+
+    Parameters
+    ----------
+    timestamps : ndarray, shape (n_samples,)
+        The time of each sample as ``datetime64[ns]``.
+
+    columns : dict
+        The values of the columns read, as sequences of floats.
+
+    schema : OrderedDict, optional
+        The schema returned by :func:`check_schema`. The columns which are
+        not read are filled with NaN and the integer columns are promoted to
+        a floating dtype if some values are missing. By default, the
+        power, heart-rate, cadence, distance, elevation, and speed are
+        returned as ``float64``.
+
+    filename : str, optional
+        The file read, reported if there are no records.
+
+    Returns
+    -------
+    data : DataFrame
+        Power records of the ride.
+
+    """
+    if schema is None:
+        schema = OrderedDict((FIELDS_COLUMNS_INV[field], None)
+                             for field in FIELDS_DATA[1:])
+    n_samples = len(timestamps)
+    data = OrderedDict([(FIELDS_DATA[0], timestamps)])
+    for column, dtype in schema.items():
+        values = (np.asarray(columns[column], dtype=np.float64)
+                  if column in columns else np.full(n_samples, np.nan))
+        if dtype is not None:
+            if dtype.kind in 'iu' and np.isnan(values).any():
+                dtype = np.result_type(dtype, np.float32)
+            values = values.astype(dtype)
+        data[column] = values
+    return records_to_frame(data, filename)
+
+
+def iter_fit_blocks(filename, block_size=65536, check_crc=True, schema=None):
+    """Read the records of a FIT file by blocks of columns.
+
+    The file is read by chunks and the records are decoded as soon as a
+    block is complete. The memory used is therefore bounded by the size of a
+    block instead of growing with the size of the file. The blocks can be
+    assembled with :func:`sksports.io.frame_from_blocks`.
+
+    The files which cannot be decoded natively (e.g. unusual layouts) are
+    read at once with fitparse before being split into blocks.
+
+    Read more in the :ref:`User Guide <reader>`.
+
+    Parameters
+    ----------
+    filename : str
+        Path to the FIT file, possibly compressed. Refer to
+        :func:`sksports.io.bikeread`.
+
+    block_size : int, default=65536
+        The number of records of each block. The last block can be smaller.
+
+    check_crc : bool, default=True
+        Whether to check the CRC of the file. The CRC is checked once all the
+        records have been read.
+
+    schema : list of str or dict, optional
+        The columns to decode. Refer to :func:`sksports.io.bikeread`.
+
+    Yields
+    ------
+    block : OrderedDict
+        The timestamps of the records, as ``datetime64[ns]``, under the key
+        ``'timestamp'``, followed by the columns of the block named as in
+        :func:`sksports.io.bikeread`.
+
+    Raises
+    ------
+    IOError
+        If the file is found to be corrupted after some blocks were yielded.
+
+    Examples
+    --------
+    >>> from sksports.datasets import load_fit
+    >>> from sksports.io import iter_fit_blocks
+    >>> for block in iter_fit_blocks(load_fit()[0], block_size=1000):
+    ...     print(block['power'].shape)
+    (1000,)
+    (1000,)
+    (243,)
+
+    """
+    filename = check_filename(filename)
+    if not isinstance(block_size, Integral) or block_size < 1:
+        raise ValueError('"block_size" should be a positive integer. Got {!r}'
+                         ' instead.'.format(block_size))
+    fields, dtypes = _schema_fields(check_schema(schema))
+    n_blocks = 0
+    try:
+        with open_file(filename) as fileobj:
+            for data in iter_records(fileobj, fields, block_size,
+                                     check_crc=check_crc, dtypes=dtypes):
+                yield _rename_records(data, fields)
+                n_blocks += 1
+    except FitDecodeError as e:
+        if n_blocks:
+            raise IOError('The file {} cannot be read by blocks: {}'
+                          .format(filename, e))
+        with open_file(filename, seekable=True) as fileobj:
+            data = _read_records_fitparse(fileobj, fields,
+                                          check_crc=check_crc, dtypes=dtypes)
+        data = records_to_frame(_rename_records(data, fields), filename)
+        for start in range(0, data.shape[0], block_size):
+            block = data.iloc[start:start + block_size]
+            yield OrderedDict(
+                [(FIELDS_DATA[0], block.index.values)] +
+                [(column, block[column].values) for column in block.columns])
@@ -0,0 +1,64 @@
+"""Methods to read GPX files."""
+
+# Authors: Guillaume Lemaitre <g.lemaitre58@gmail.com>
+#          Cedric Lemaitre
+# License: MIT
+
+from ._xml import parse_points
+from ._xml import to_semicircles
+from .fit import check_filename
+from .fit import check_schema
+from .fit import columns_to_frame
+from .fit import open_file
+
+# element of a track point -> column of the DataFrame
+ELEMENTS_COLUMNS = {
+    'power': 'power',
+    'hr': 'heart-rate',
+    'cad': 'cadence',
+    'distance': 'distance',
+    'ele': 'elevation',
+    'speed': 'speed',
+    'atemp': 'temperature',
+}
+
+# attribute of a track point -> column of the DataFrame
+ATTRIBUTES_COLUMNS = {
+    'lat': 'latitude',
+    'lon': 'longitude',
+}
+
+
+def load_power_from_gpx(filename, schema=None):
+    """Method to open the power data from GPX file into a pandas dataframe.
+
+    The track points are parsed incrementally and removed once read. The
+    heart-rate, cadence, and temperature are read from the track point
+    extension of Garmin and the power from the ``power`` extension. The
+    position is converted to semicircles as in the FIT files.
+
+    Parameters
+    ----------
+    filename : str
+        Path to the GPX file, possibly compressed. Refer to
+        :func:`sksports.io.fit.open_file`.
+
+    schema : list of str or dict, optional
+        The columns to read. Refer to
+        :func:`sksports.io.fit.load_power_from_fit`. The columns which are
+        not available in GPX files (e.g. the distance) are filled with NaN.
+
+    Returns
+    -------
+    data : DataFrame
+        Power records of the ride.
+
+    """
+    filename = check_filename(filename)
+    schema = check_schema(schema)
+    with open_file(filename) as fileobj:
+        timestamps, columns = parse_points(fileobj, 'trkpt', 'time',
+                                           ELEMENTS_COLUMNS,
+                                           ATTRIBUTES_COLUMNS)
+    return columns_to_frame(timestamps, to_semicircles(columns), schema,
+                            filename)
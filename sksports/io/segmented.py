@@ -0,0 +1,254 @@
+"""Activity stored as continuous segments sampled at 1 Hz."""
+
+# Authors: Guillaume Lemaitre <g.lemaitre58@gmail.com>
+#          Cedric Lemaitre
+# License: MIT
+
+from numbers import Integral
+
+import numpy as np
+import pandas as pd
+import six
+
+NANOSECONDS = 1000000000
+
+
+class SegmentedActivity(object):
+    """Activity stored as continuous segments sampled at 1 Hz.
+
+    Each segment is a continuous recording starting at its own time. The
+    samples of all segments are stored one after the other, without the
+    timestamps, and the gaps between the segments (e.g. an auto-pause or an
+    overnight stop) are not stored. The memory and the computations scale
+    with the recorded time instead of the elapsed time.
+    :func:`sksports.extraction.activity_power_profile`, the metrics of
+    :mod:`sksports.metrics`, and the gradients of :mod:`sksports.extraction`
+    accept a segmented activity and never combine samples across a gap.
+
+    Read more in the :ref:`User Guide <reader>`.
+
+    Parameters
+    ----------
+    data : DataFrame
+        The samples of all the segments, one after the other. The index is
+        ignored.
+
+    starts : array-like of datetime, shape (n_segments,)
+        The time of the first sample of each segment.
+
+    lengths : array-like of int, shape (n_segments,)
+        The number of samples of each segment.
+
+    Attributes
+    ----------
+    data : DataFrame
+        The samples of all the segments indexed by their position.
+
+    starts : DatetimeIndex
+        The time of the first sample of each segment.
+
+    lengths : ndarray, shape (n_segments,)
+        The number of samples of each segment.
+
+    Examples
+    --------
+    >>> from sksports.datasets import load_fit
+    >>> from sksports.io import SegmentedActivity, bikeread
+    >>> ride = bikeread(load_fit()[2], max_gap='00:01:00')
+    >>> segmented_ride = SegmentedActivity.from_frame(ride)
+    >>> segmented_ride.lengths
+    array([1294, 1029, 1140, 1558])
+
+    """
+
+    def __init__(self, data, starts, lengths):
+        # the samples are indexed by their position without copy
+        self.data = data.copy(deep=False)
+        self.data.index = pd.RangeIndex(data.shape[0])
+        self.starts = pd.DatetimeIndex(starts)
+        self.lengths = np.asarray(lengths, dtype=np.intp)
+        if self.starts.size != self.lengths.size:
+            raise ValueError('"starts" and "lengths" should have the same'
+                             ' size. Got {} and {} instead.'
+                             .format(self.starts.size, self.lengths.size))
+        if (self.lengths < 1).any() or self.lengths.sum() != data.shape[0]:
+            raise ValueError('"lengths" should be positive and sum to the'
+                             ' number of samples {}. Got {} instead.'
+                             .format(data.shape[0], self.lengths.sum()))
+
+    @classmethod
+    def from_frame(cls, data):
+        """Split an activity indexed by time into continuous segments.
+
+        A new segment starts at each sample which does not follow the
+        previous one by exactly a second, such as after the gaps kept by
+        :func:`sksports.io.bikeread` with ``max_gap``.
+
+        Parameters
+        ----------
+        data : DataFrame
+            The activity indexed by the time of the samples.
+
+        Returns
+        -------
+        activity : SegmentedActivity
+            The segmented activity.
+
+        """
+        timestamps = data.index.values.view(np.int64)
+        starts = np.flatnonzero(np.diff(timestamps) != NANOSECONDS) + 1
+        bounds = np.concatenate([[0], starts, [timestamps.size]])
+        if not timestamps.size:
+            bounds = bounds[:1]
+        return cls(data, data.index[bounds[:-1]], np.diff(bounds))
+
+    @property
+    def bounds(self):
+        """The position of the first sample of each segment followed by the
+        number of samples."""
+        return np.concatenate([[0], np.cumsum(self.lengths)]).astype(np.intp)
+
+    @property
+    def columns(self):
+        """The columns of the activity."""
+        return self.data.columns
+
+    @property
+    def shape(self):
+        """The number of samples and of columns."""
+        return self.data.shape
+
+    @property
+    def values(self):
+        """The samples as an array."""
+        return self.data.values
+
+    @property
+    def index(self):
+        """The time of each sample."""
+        offsets = np.repeat(self.starts.values.view(np.int64) -
+                            self.bounds[:-1] * NANOSECONDS, self.lengths)
+        return pd.DatetimeIndex(
+            offsets + np.arange(self.shape[0]) * NANOSECONDS)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return ('SegmentedActivity(n_samples={}, n_segments={}, columns={})'
+                .format(self.shape[0], self.lengths.size,
+                        list(self.columns)))
+
+    def _replace(self, data):
+        """Create an activity with the same segments and other samples."""
+        return SegmentedActivity(data, self.starts, self.lengths)
+
+    def __getitem__(self, key):
+        if isinstance(key, six.string_types):
+            key = [key]
+        return self._replace(self.data[key])
+
+    def __setitem__(self, key, value):
+        if isinstance(value, SegmentedActivity):
+            if not np.array_equal(value.lengths, self.lengths):
+                raise ValueError('The segments of the value do not match the'
+                                 ' segments of the activity.')
+            value = value.data.iloc[:, 0]
+        self.data[key] = np.asarray(value)
+
+    def astype(self, dtype, copy=True):
+        """Cast the samples to ``dtype``.
+
+        Parameters
+        ----------
+        dtype : str or dtype
+            The dtype of the samples.
+
+        copy : bool, default=True
+            Whether to copy the samples already stored with ``dtype``.
+
+        Returns
+        -------
+        activity : SegmentedActivity
+            The activity with the samples cast.
+
+        """
+        return self._replace(self.data.astype(dtype, copy=copy))
+
+    def diff(self, periods=1):
+        """Compute the difference between samples within each segment.
+
+        Parameters
+        ----------
+        periods : int, default=1
+            The number of samples between the samples subtracted.
+
+        Returns
+        -------
+        activity : SegmentedActivity
+            The differences. The first ``periods`` samples of each segment
+            are NaN.
+
+        """
+        if not isinstance(periods, Integral) or periods < 1:
+            raise ValueError('"periods" should be a positive integer. Got {}'
+                             ' instead.'.format(periods))
+        values = self.data.values.astype(np.float64)
+        diff = np.full(values.shape, np.nan)
+        with np.errstate(invalid='ignore'):
+            diff[periods:] = values[periods:] - values[:-periods]
+        # the differences spanning a gap are discarded
+        position = (np.arange(self.shape[0]) -
+                    np.repeat(self.bounds[:-1], self.lengths))
+        diff[position < periods] = np.nan
+        return self._replace(pd.DataFrame(diff, columns=self.columns))
+
+    def values_with_gaps(self):
+        """Get the samples with a missing sample between the segments.
+
+        Any window spanning a gap contains the missing sample, such that the
+        kernels of the power-profile and the rolling means discard it.
+
+        Returns
+        -------
+        values : ndarray, shape (n_samples + n_segments - 1, n_columns)
+            The samples with a NaN row inserted at each gap.
+
+        """
+        values = self.data.values
+        if values.dtype.kind != 'f':
+            values = values.astype(np.float64)
+        return np.insert(values, self.bounds[1:-1], np.nan, axis=0)
+
+    def iter_segments(self):
+        """Iterate over the segments.
+
+        Yields
+        ------
+        segment : DataFrame
+            The samples of a segment indexed by their time.
+
+        """
+        for start, (first, last) in zip(self.starts,
+                                        zip(self.bounds[:-1],
+                                            self.bounds[1:])):
+            segment = self.data.iloc[first:last]
+            segment.index = pd.date_range(start, periods=last - first,
+                                          freq='s')
+            yield segment
+
+    def to_frame(self):
+        """Convert the activity into a DataFrame indexed by time.
+
+        The gaps are not filled, as with :func:`sksports.io.bikeread` and
+        ``max_gap``.
+
+        Returns
+        -------
+        data : DataFrame
+            The samples indexed by their time.
+
+        """
+        data = self.data.copy()
+        data.index = self.index
+        return data
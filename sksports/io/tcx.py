@@ -0,0 +1,58 @@
+"""Methods to read TCX files."""
+
+# Authors: Guillaume Lemaitre <g.lemaitre58@gmail.com>
+#          Cedric Lemaitre
+# License: MIT
+
+from ._xml import parse_points
+from ._xml import to_semicircles
+from .fit import check_filename
+from .fit import check_schema
+from .fit import columns_to_frame
+from .fit import open_file
+
+# element of a trackpoint -> column of the DataFrame
+ELEMENTS_COLUMNS = {
+    'Watts': 'power',
+    'HeartRateBpm/Value': 'heart-rate',
+    'Cadence': 'cadence',
+    'RunCadence': 'cadence',
+    'DistanceMeters': 'distance',
+    'AltitudeMeters': 'elevation',
+    'Speed': 'speed',
+    'LatitudeDegrees': 'latitude',
+    'LongitudeDegrees': 'longitude',
+}
+
+
+def load_power_from_tcx(filename, schema=None):
+    """Method to open the power data from TCX file into a pandas dataframe.
+
+    The trackpoints are parsed incrementally and removed once read. The
+    power and the speed are read from the activity extension of Garmin. The
+    position is converted to semicircles as in the FIT files.
+
+    Parameters
+    ----------
+    filename : str
+        Path to the TCX file, possibly compressed. Refer to
+        :func:`sksports.io.fit.open_file`.
+
+    schema : list of str or dict, optional
+        The columns to read. Refer to
+        :func:`sksports.io.fit.load_power_from_fit`. The columns which are
+        not available in TCX files are filled with NaN.
+
+    Returns
+    -------
+    data : DataFrame
+        Power records of the ride.
+
+    """
+    filename = check_filename(filename)
+    schema = check_schema(schema)
+    with open_file(filename) as fileobj:
+        timestamps, columns = parse_points(fileobj, 'Trackpoint', 'Time',
+                                           ELEMENTS_COLUMNS)
+    return columns_to_frame(timestamps, to_semicircles(columns), schema,
+                            filename)
@@ -0,0 +1,135 @@
+"""Test the activities decoded on demand."""
+
+# Authors: Guillaume Lemaitre <g.lemaitre58@gmail.com>
+#          Cedric Lemaitre
+# License: MIT
+
+from collections import OrderedDict
+
+import pytest
+
+import numpy as np
+
+from pandas.testing import assert_frame_equal
+from pandas.testing import assert_series_equal
+
+from sksports.datasets import load_fit
+from sksports.exceptions import MissingDataError
+from sksports.extraction import acceleration
+from sksports.extraction import gradient_elevation
+from sksports.io import Activity
+from sksports.io import ActivityArchive
+from sksports.io import bikeread
+from sksports.io import write_archive
+
+
+@pytest.mark.parametrize("filename", load_fit())
+@pytest.mark.parametrize(
+    "params",
+    [{}, {'max_gap': 60}, {'dtype': np.float32},
+     {'schema': ['power', 'cadence', 'latitude']},
+     {'schema': {'power': 'float32', 'speed': None}}])
+def test_activity_file(filename, params):
+    activity = Activity(filename, **params)
+    assert activity.loaded_columns == []
+    cadence = activity['cadence'] if 'cadence' in activity else None
+    expected = bikeread(filename, **params)
+    if cadence is not None:
+        assert activity.loaded_columns[0] == 'cadence'
+        assert_series_equal(cadence, expected['cadence'])
+    assert_frame_equal(activity.to_frame(), expected)
+    assert sorted(activity.loaded_columns) == sorted(expected.columns)
+    assert len(activity) == expected.shape[0]
+
+
+def test_activity_file_single_pass(monkeypatch):
+    filename = load_fit()[0]
+    calls = []
+
+    def counted_bikeread(*args, **kwargs):
+        calls.append(kwargs['schema'])
+        return bikeread(*args, **kwargs)
+
+    monkeypatch.setattr('sksports.io.activity.bikeread', counted_bikeread)
+    activity = Activity(filename)
+    data = activity[['speed', 'cadence']]
+    assert len(calls) == 1
+    assert sorted(activity.loaded_columns) == ['cadence', 'power', 'speed']
+    assert_frame_equal(data, bikeread(filename)[['speed', 'cadence']])
+    # the remaining channels are decoded with the dtype of bikeread
+    assert_frame_equal(activity.to_frame(), bikeread(filename))
+    assert len(calls) == 2
+    assert calls[-1] == OrderedDict(
+        (column, np.float64)
+        for column in ['heart-rate', 'distance', 'elevation', 'power'])
+
+
+def test_activity_archive(tmpdir):
+    filename = str(tmpdir.join('activities.sks'))
+    write_archive(filename, [bikeread(fit) for fit in load_fit()])
+    with ActivityArchive(filename) as archive:
+        activity = Activity(archive, idx=1)
+        assert activity.columns == archive.columns(1)
+        power = activity['power']
+        assert activity.loaded_columns == ['power']
+        assert power.index.equals(archive.index(1))
+        assert_frame_equal(activity[['power', 'speed']],
+                           archive.read(1, columns=['power', 'speed']))
+        assert_frame_equal(activity.to_frame(), archive.read(1))
+
+
+def test_activity_derived_columns():
+    data = bikeread(load_fit()[0])
+    activity = Activity(data)
+    gradient = activity.gradient_elevation()
+    assert activity.gradient_elevation() is gradient
+    assert gradient.name == 'gradient-elevation'
+    assert_series_equal(
+        gradient,
+        gradient_elevation(data.copy(), append=False)
+        .rename('gradient-elevation'))
+    # the source is not modified
+    assert 'gradient-elevation' not in data.columns
+    assert activity.gradient_elevation(periods=1) is not gradient
+    accel = activity.acceleration()
+    assert_series_equal(accel, acceleration(data.copy(), append=False)
+                        .rename('acceleration'))
+    resampled = activity.resampled('30S')
+    assert_series_equal(resampled, data['power'].resample('30S').mean())
+
+    # only the derived columns depending on the modified column are computed
+    # again
+    activity['elevation'] = activity['elevation'] + 10
+    assert activity.acceleration() is accel
+    assert activity.gradient_elevation() is not gradient
+    assert activity.resampled('30S') is resampled
+    activity.invalidate()
+    assert activity.resampled('30S') is not resampled
+
+
+def test_activity_setitem():
+    activity = Activity(load_fit()[0])
+    activity['double-power'] = activity['power'] * 2
+    activity['power'] = activity['double-power'] / 4
+    activity.load()
+    assert_series_equal(activity['power'],
+                        (activity['double-power'] / 4).rename('power'))
+    assert activity.columns[-1] == 'double-power'
+    assert activity.to_frame().shape == (2257, 7)
+
+
+def test_activity_missing_data():
+    activity = Activity(load_fit()[0], schema=['power'])
+    with pytest.raises(MissingDataError, match='speed data are required'):
+        activity.acceleration()
+    with pytest.raises(KeyError, match='has no columns'):
+        activity['speed']
+
+
+@pytest.mark.parametrize(
+    "source, idx, err_msg",
+    [(load_fit()[0], 1, '"idx" should only be given with an archive'),
+     (1, None, '"source" should be a filename')])
+def test_activity_error(source, idx, err_msg):
+    with pytest.raises(ValueError, match=err_msg):
+        Activity(source, idx=idx)
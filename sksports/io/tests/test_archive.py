@@ -0,0 +1,123 @@
+"""Testing the archive of activities."""
+
+# Authors: Guillaume Lemaitre <g.lemaitre58@gmail.com>
+#          Cedric Lemaitre
+# License: MIT
+
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.testing import assert_array_equal
+from pandas.testing import assert_frame_equal
+from pandas.testing import assert_series_equal
+
+from sksports.datasets import load_fit
+from sksports.extraction import activities_power_profile
+from sksports.extraction import activity_power_profile
+from sksports.io import ActivityArchive
+from sksports.io import bikeread
+from sksports.io import bikeread_many
+from sksports.io import write_archive
+from sksports.io.archive import _varint_decode
+from sksports.io.archive import _varint_encode
+
+
+@pytest.fixture
+def activities():
+    return [bikeread(load_fit()[0]),
+            bikeread(load_fit()[2], max_gap=60),
+            bikeread(load_fit()[1], schema=['power', 'cadence', 'speed'])
+            .fillna(0).astype({'power': np.uint16, 'cadence': np.uint8,
+                               'speed': np.float32})]
+
+
+@pytest.mark.parametrize(
+    "values",
+    [np.array([], dtype=np.int64),
+     np.array([0, -1, 2 ** 62, -2 ** 63, 2 ** 63 - 1, 5]),
+     np.random.RandomState(42).randint(-1000, 1000, size=1000)])
+def test_varint(values):
+    values = values.astype(np.int64)
+    assert_array_equal(_varint_decode(_varint_encode(values), values.size),
+                       values)
+
+
+def test_varint_corrupted():
+    data = _varint_encode(np.arange(10))
+    with pytest.raises(ValueError, match='10 values were expected'):
+        _varint_decode(data[:-1], 10)
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_archive_round_trip(tmpdir, activities, compress):
+    filename = str(tmpdir.join('activities.sks'))
+    assert write_archive(filename, iter(activities), compress=compress) == 3
+    archive = ActivityArchive(filename)
+    assert len(archive) == 3
+    assert_array_equal(archive.lengths,
+                       [activity.shape[0] for activity in activities])
+    assert_array_equal(archive.start_times,
+                       pd.DatetimeIndex([activity.index[0]
+                                         for activity in activities]))
+    for activity, activity_archive in zip(activities, archive):
+        assert_frame_equal(activity_archive, activity, check_exact=True)
+        assert activity_archive.index.freq == activity.index.freq
+    assert_frame_equal(archive.read(1, columns=['speed', 'power']),
+                       activities[1][['speed', 'power']])
+
+
+def test_archive_compress(tmpdir, activities):
+    filename = str(tmpdir.join('activities.sks'))
+    write_archive(filename, activities, compress=True)
+    size_compressed = tmpdir.join('activities.sks').size()
+    write_archive(filename, activities, compress=False)
+    assert size_compressed < tmpdir.join('activities.sks').size()
+
+
+def test_archive_zero_copy(tmpdir, activities):
+    filename = str(tmpdir.join('activities.sks'))
+    write_archive(filename, activities)
+    archive = ActivityArchive(filename)
+    # the speed is not made of integers and is stored raw
+    speed = archive.channel(0, 'speed')
+    assert not speed.flags.owndata
+    assert not speed.flags.writeable
+    assert_array_equal(speed, activities[0]['speed'].values)
+    # the power is compressed and decoded
+    power = archive.channel(2, 'power')
+    assert power.dtype == np.uint16
+    assert_array_equal(power, activities[2]['power'].values)
+
+
+def test_archive_extraction(tmpdir):
+    filename = str(tmpdir.join('activities.sks'))
+    write_archive(filename, (activity for _, activity
+                             in bikeread_many(load_fit())))
+    with ActivityArchive(filename) as archive:
+        power_profiles = activities_power_profile(archive, durations='wko')
+        for filename, power_profile in zip(load_fit(), power_profiles):
+            assert_series_equal(
+                power_profile,
+                activity_power_profile(bikeread(filename), durations='wko'))
+        assert_series_equal(
+            activity_power_profile(archive[0], durations='wko'),
+            power_profiles[0])
+
+
+def test_archive_error(tmpdir, activities):
+    filename = str(tmpdir.join('activities.sks'))
+    tmpdir.join('activities.sks').write_binary(b'not an archive' * 3)
+    with pytest.raises(ValueError, match='is not an activity archive'):
+        ActivityArchive(filename)
+
+    with pytest.raises(ValueError, match='should be indexed by time'):
+        write_archive(filename, [activities[0].reset_index(drop=True)])
+    with pytest.raises(ValueError, match='should be numerical'):
+        write_archive(filename, [activities[0].assign(name='ride')])
+
+    write_archive(filename, activities)
+    archive = ActivityArchive(filename)
+    with pytest.raises(IndexError, match='contains 3 activities'):
+        archive[3]
+    with pytest.raises(KeyError, match="no column 'torque'"):
+        archive.channel(0, 'torque')
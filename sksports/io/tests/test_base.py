@@ -0,0 +1,232 @@
+"""Testing the common interface to read bike files."""
+
+# Authors: Guillaume Lemaitre <g.lemaitre58@gmail.com>
+#          Cedric Lemaitre
+# License: MIT
+
+import os
+import zipfile
+
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from numpy.testing import assert_allclose
+from pandas.testing import assert_frame_equal
+
+from sksports.datasets import load_fit
+from sksports.io import bikeread
+from sksports.io import bikeread_many
+from sksports.io import frame_from_blocks
+from sksports.io import iter_fit_blocks
+from sksports.io.base import _resample_seconds
+from sksports.io.fit import load_power_from_fit
+from sksports.utils import validate_filenames
+
+
+@pytest.mark.parametrize("dtype", [np.float32, 'float32', np.float64])
+def test_bikeread_dtype(dtype):
+    activity = bikeread(load_fit()[0])
+    activity_dtype = bikeread(load_fit()[0], dtype=dtype)
+    assert (activity_dtype.dtypes == np.dtype(dtype)).all()
+    assert_allclose(activity_dtype, activity, rtol=1e-6)
+
+
+def test_bikeread_drop_nan_error():
+    with pytest.raises(ValueError, match='"drop_nan" should be one of'):
+        bikeread(load_fit()[0], drop_nan='all')
+
+
+@pytest.mark.parametrize("max_gap", [60, '00:01:00'])
+def test_bikeread_max_gap(max_gap):
+    # the first file has a gap of 15 seconds which is filled
+    assert_frame_equal(bikeread(load_fit()[0], max_gap=max_gap),
+                       bikeread(load_fit()[0]))
+    # the third file has several gaps longer than a minute
+    activity = bikeread(load_fit()[2])
+    activity_gap = bikeread(load_fit()[2], max_gap=max_gap)
+    assert activity_gap.shape[0] < activity.shape[0]
+    gaps = np.diff(activity_gap.index.values) / np.timedelta64(1, 's')
+    assert np.sum(gaps != 1) == 3
+    assert np.all(gaps[gaps != 1] > 60)
+    assert_frame_equal(activity.loc[activity_gap.index], activity_gap)
+
+
+def test_bikeread_schema():
+    activity = bikeread(load_fit()[0])
+    activity_power = bikeread(load_fit()[0], schema=['power'])
+    assert activity_power.columns.tolist() == ['power']
+    assert_frame_equal(activity_power, activity[['power']])
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2, -1])
+@pytest.mark.parametrize("ordered", [True, False])
+def test_bikeread_many(n_jobs, ordered):
+    filenames = load_fit()
+    activities = list(bikeread_many(filenames, n_jobs=n_jobs, ordered=ordered,
+                                    chunksize=1, max_gap=60))
+    if ordered:
+        assert [filename for filename, _ in activities] == filenames
+    activities = dict(activities)
+    assert sorted(activities) == sorted(filenames)
+    for filename in filenames:
+        assert_frame_equal(activities[filename],
+                           bikeread(filename, max_gap=60))
+
+
+def test_bikeread_many_schema():
+    filename, activity = next(bikeread_many(load_fit()[:2], n_jobs=2,
+                                            schema={'cadence': 'uint8'}))
+    assert_frame_equal(activity, bikeread(filename, schema=['cadence']))
+
+
+@pytest.mark.parametrize("n_jobs", [0, 1.5])
+def test_bikeread_many_n_jobs_error(n_jobs):
+    with pytest.raises(ValueError, match='"n_jobs" should be a non-zero'):
+        next(bikeread_many(load_fit(), n_jobs=n_jobs))
+
+
+@pytest.mark.parametrize("block_size", [1, 500, 100000])
+@pytest.mark.parametrize(
+    "params",
+    [{},
+     {'drop_nan': 'columns', 'dtype': np.float32},
+     {'max_gap': 60},
+     {'schema': ['power', 'cadence', 'left-right-balance']}]
+)
+def test_frame_from_blocks(block_size, params):
+    schema = params.get('schema')
+    for filename in load_fit():
+        blocks = iter_fit_blocks(filename, block_size=block_size,
+                                 schema=schema)
+        assert_frame_equal(frame_from_blocks(blocks, **params),
+                           bikeread(filename, **params), check_exact=True)
+
+
+@pytest.mark.parametrize(
+    "block_size, err_msg",
+    [(0, '"block_size" should be a positive integer'),
+     (1.5, '"block_size" should be a positive integer')]
+)
+def test_iter_fit_blocks_error(block_size, err_msg):
+    with pytest.raises(ValueError, match=err_msg):
+        next(iter_fit_blocks(load_fit()[0], block_size=block_size))
+
+
+def test_frame_from_blocks_error():
+    with pytest.raises(IOError, match='do not contain any data'):
+        frame_from_blocks([])
+    with pytest.raises(ValueError, match='"drop_nan" should be one of'):
+        frame_from_blocks([], drop_nan='all')
+
+
+def test_bikeread_many_zip(tmpdir):
+    archive = str(tmpdir.join('rides.zip'))
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for filename in load_fit():
+            zip_file.write(filename, os.path.basename(filename))
+    filenames = list(validate_filenames(archive + '/*.fit'))
+    assert len(filenames) == 3
+    for (_, activity), (_, activity_zip) in zip(
+            bikeread_many(load_fit()),
+            bikeread_many(filenames, n_jobs=2, cache=str(tmpdir))):
+        assert_frame_equal(activity_zip, activity)
+
+
+def _resample_pandas(df, max_gap=None):
+    if max_gap is None:
+        return df.resample('s').interpolate('linear')
+    gaps = np.flatnonzero(np.diff(df.index.values) >
+                          max_gap.to_timedelta64()) + 1
+    bounds = np.concatenate([[0], gaps, [df.shape[0]]])
+    return pd.concat([df.iloc[start:end].resample('s').interpolate('linear')
+                      for start, end in zip(bounds[:-1], bounds[1:])])
+
+
+@pytest.mark.parametrize("filename", load_fit())
+@pytest.mark.parametrize(
+    "schema",
+    [None, ['power', 'cadence'], {'power': 'float32', 'heart-rate': 'uint8'}])
+@pytest.mark.parametrize("max_gap", [None, '00:01:00', '00:00:03'])
+def test_resample_seconds_fit(filename, schema, max_gap):
+    df = load_power_from_fit(filename, schema=schema)
+    max_gap = None if max_gap is None else pd.Timedelta(max_gap)
+    resampled = _resample_seconds(df, max_gap=max_gap)
+    assert_frame_equal(resampled, _resample_pandas(df, max_gap=max_gap),
+                       check_exact=True)
+    assert resampled.index.freq == (None if max_gap else 's')
+
+
+@pytest.mark.parametrize("max_gap", [None, pd.Timedelta('00:01:00')])
+def test_resample_seconds_irregular(max_gap):
+    # sub-second samples, gaps, parts sampled at 1 Hz with an offset, and
+    # columns of different dtypes
+    rng = np.random.RandomState(42)
+    n_samples = 5000
+    steps = rng.choice([1, 1, 1, 2, 5, 90], n_samples) * 1000000000
+    offsets = rng.choice([0, 0, 0, 500000000], n_samples)
+    index = pd.DatetimeIndex(pd.Timestamp('2014-05-07').value +
+                             np.cumsum(steps) + offsets)
+    df = pd.DataFrame({'power': rng.randint(0, 500, n_samples)
+                       .astype(np.uint16),
+                       'speed': rng.rand(n_samples).astype(np.float32),
+                       'distance': rng.rand(n_samples),
+                       'grade': [None] * n_samples},
+                      index=index,
+                      columns=['power', 'speed', 'distance', 'grade'])
+    df.iloc[rng.rand(n_samples) < 0.1, 2] = np.nan
+    assert_frame_equal(_resample_seconds(df, max_gap=max_gap),
+                       _resample_pandas(df, max_gap=max_gap),
+                       check_exact=True)
+
+
+def test_resample_seconds_unordered_duplicated():
+    index = pd.to_datetime(['2014-05-07 12:00:03', '2014-05-07 12:00:00',
+                            '2014-05-07 12:00:03', '2014-05-07 12:00:05'])
+    df = pd.DataFrame({'power': [100., 200., 400., 300.]}, index=index)
+    resampled = _resample_seconds(df)
+    # the samples are sorted and the last sample of a timestamp is kept
+    assert_allclose(resampled['power'],
+                    [200., 266.666667, 333.333333, 400., 350., 300.])
+    assert resampled.index[0] == pd.Timestamp('2014-05-07 12:00:00')
+    assert resampled.index.freq == 's'
+
+
+@pytest.mark.parametrize("max_gap", [None, pd.Timedelta('00:00:03')])
+def test_resample_seconds_complete_missing(max_gap):
+    # sensor dropouts in a recording sampled at 1 Hz, including at the end
+    rng = np.random.RandomState(0)
+    n_samples = 1000
+    index = pd.date_range('2014-05-07', periods=n_samples, freq='s')
+    df = pd.DataFrame({'power': rng.randint(0, 500, n_samples)
+                       .astype(np.uint16),
+                       'speed': rng.rand(n_samples).astype(np.float32),
+                       'distance': rng.rand(n_samples)},
+                      index=index, columns=['power', 'speed', 'distance'])
+    df.iloc[rng.rand(n_samples) < 0.2, 1:] = np.nan
+    df.iloc[-5:, 2] = np.nan
+    resampled = _resample_seconds(df, max_gap=max_gap)
+    assert not resampled.isnull().values.any()
+    assert_frame_equal(resampled, _resample_pandas(df, max_gap=max_gap),
+                       check_exact=True)
+
+
+def test_resample_seconds_complete_dropouts():
+    index = pd.date_range('2018', periods=5, freq='s')
+    df = pd.DataFrame({'power': [100., np.nan, np.nan, 200., 300.]},
+                      index=index)
+    assert_frame_equal(_resample_seconds(df),
+                       df.resample('s').interpolate('linear'),
+                       check_exact=True)
+
+
+@pytest.mark.parametrize("max_gap", [None, pd.Timedelta('00:01:00')])
+def test_resample_seconds_dtype(max_gap):
+    df = load_power_from_fit(load_fit()[2],
+                             schema={'power': 'uint16', 'speed': 'float64'})
+    resampled = _resample_seconds(df, max_gap=max_gap)
+    # the interpolation block is allocated with the requested dtype
+    resampled_32 = _resample_seconds(df, max_gap=max_gap, dtype=np.float32)
+    assert (resampled_32.dtypes == np.float32).all()
+    assert_frame_equal(resampled_32, resampled.astype(np.float32))
@@ -0,0 +1,149 @@
+"""Testing the on-disk cache of the activities."""
+
+# Authors: Guillaume Lemaitre <g.lemaitre58@gmail.com>
+#          Cedric Lemaitre
+# License: MIT
+
+import os
+import shutil
+
+import pytest
+
+import numpy as np
+from pandas.testing import assert_frame_equal
+
+from sksports.datasets import load_fit
+from sksports.io import ActivityCache
+from sksports.io import bikeread
+from sksports.io import bikeread_many
+
+
+@pytest.mark.parametrize(
+    "params",
+    [{},
+     {'max_gap': 60, 'dtype': np.float32},
+     {'schema': ['power', 'cadence'], 'drop_nan': 'columns'}]
+)
+def test_bikeread_cache(tmpdir, params):
+    cache = ActivityCache(str(tmpdir))
+    activity = bikeread(load_fit()[0], **params)
+    assert_frame_equal(bikeread(load_fit()[0], cache=cache, **params),
+                       activity)
+    assert len(cache) == 1
+    # the second read is a hit
+    assert_frame_equal(bikeread(load_fit()[0], cache=cache, **params),
+                       activity)
+    assert len(cache) == 1
+    # the key depends on the content and the options
+    bikeread(load_fit()[1], cache=cache, **params)
+    bikeread(load_fit()[0], cache=cache, drop_nan='rows')
+    assert len(cache) == 3
+
+
+def test_bikeread_cache_key_options(tmpdir):
+    cache = ActivityCache(str(tmpdir))
+    bikeread(load_fit()[0], cache=str(tmpdir), max_gap=60, dtype='float32')
+    bikeread(load_fit()[0], cache=cache, max_gap='00:01:00',
+             dtype=np.float32)
+    assert len(cache) == 1
+    # the key does not depend on the path of the file
+    filename = str(tmpdir.join('copy.fit'))
+    shutil.copy(load_fit()[0], filename)
+    assert (cache.key(filename, dtype=None) ==
+            cache.key(load_fit()[0], dtype=None))
+
+
+def _entry_path(cache, filename):
+    key = cache.key(filename, drop_nan=None, dtype=None, max_gap=None,
+                    schema=None)
+    return cache._path(key)
+
+
+def test_activity_cache_eviction(tmpdir):
+    filenames = load_fit()
+    cache = ActivityCache(str(tmpdir))
+    for filename in filenames:
+        bikeread(filename, cache=cache)
+    sizes = [os.stat(_entry_path(cache, filename)).st_size
+             for filename in filenames]
+    cache.clear()
+    assert len(cache) == 0
+
+    cache = ActivityCache(str(tmpdir), max_size=sizes[0] + sizes[2])
+    for age, filename in zip([200, 100], filenames[:2]):
+        bikeread(filename, cache=cache)
+        path = _entry_path(cache, filename)
+        mtime = os.stat(path).st_mtime - age
+        os.utime(path, (mtime, mtime))
+    # reading the oldest activity marks it as recently used
+    bikeread(filenames[0], cache=cache)
+    bikeread(filenames[2], cache=cache)
+    assert cache.size <= cache.max_size
+    assert os.path.exists(_entry_path(cache, filenames[0]))
+    assert not os.path.exists(_entry_path(cache, filenames[1]))
+    assert os.path.exists(_entry_path(cache, filenames[2]))
+
+
+def test_activity_cache_corrupted_entry(tmpdir):
+    cache = ActivityCache(str(tmpdir))
+    activity = bikeread(load_fit()[0], cache=cache)
+    (_, path, _), = cache._entries()
+    with open(path, 'wb') as f:
+        f.write(b'corrupted')
+    assert_frame_equal(bikeread(load_fit()[0], cache=cache), activity)
+    assert len(cache) == 1
+
+
+def test_activity_cache_processes(tmpdir):
+    # several processes write and read the same cache
+    filenames = load_fit() * 3
+    cache = ActivityCache(str(tmpdir))
+    activities = dict(bikeread_many(load_fit(), n_jobs=1))
+    for _ in range(2):
+        for filename, activity in bikeread_many(filenames, n_jobs=3,
+                                                chunksize=1, cache=cache):
+            assert_frame_equal(activity, activities[filename])
+    assert len(cache) == 3
+    assert not [name for name in os.listdir(str(tmpdir))
+                if not name.endswith('.npz')]
+
+
+def test_activity_cache_object_column(tmpdir):
+    # the fields invalid in all the records give columns of objects
+    cache = ActivityCache(str(tmpdir))
+    activity = bikeread(load_fit()[0]).iloc[:10]
+    activity['grade'] = np.array([None] * 5 + [np.nan] * 5, dtype=object)
+    cache.put('grade', activity)
+    cached = cache.get('grade')
+    assert_frame_equal(cached, activity)
+    assert cached['grade'].iloc[0] is None
+    assert np.isnan(cached['grade'].iloc[-1])
+
+    # the other objects cannot be stored without pickle
+    activity['grade'] = 'flat'
+    with pytest.warns(UserWarning, match='contains objects'):
+        cache.put('flat', activity)
+    assert cache.get('flat') is None
+    assert len(cache) == 1
+
+
+@pytest.mark.parametrize(
+    "params, err_msg",
+    [({'max_size': 0}, '"max_size" should be a positive integer'),
+     ({'max_size': 1.5}, '"max_size" should be a positive integer')]
+)
+def test_activity_cache_error(tmpdir, params, err_msg):
+    with pytest.raises(ValueError, match=err_msg):
+        ActivityCache(str(tmpdir), **params)
+
+
+def test_bikeread_cache_error():
+    with pytest.raises(ValueError, match='"cache" should be a directory'):
+        bikeread(load_fit()[0], cache=1)
+
+
+def test_bikeread_cache_missing_file(tmpdir):
+    cache = ActivityCache(str(tmpdir.join('cache')))
+    with pytest.raises(ValueError, match='The file does not exist.'):
+        bikeread(str(tmpdir.join('missing.fit')), cache=cache)
+    assert len(cache) == 0
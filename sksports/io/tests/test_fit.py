@@ -4,17 +4,35 @@
 #          Cedric Lemaitre
 # License: MIT
 
+import bz2
+import gzip
+import io
+import os
+import struct
+import zipfile
+
 import pytest
 
 import numpy as np
+import pandas as pd
 
 from datetime import date
 
 from numpy.testing import assert_allclose
+from pandas.testing import assert_frame_equal
 
 from sksports.datasets import load_fit
+from sksports.io.fit import iter_fit_blocks
 from sksports.io.fit import load_power_from_fit
 from sksports.io.fit import check_filename_fit
+from sksports.io.fit import open_file
+from sksports.io.fit import FIELDS_DATA
+from sksports.io.fit import check_schema
+from sksports.io.fit import _read_records_fitparse
+from sksports.io._fit import calc_crc
+from sksports.io._fit import iter_records
+from sksports.io._fit import read_records
+from sksports.io._fit import FitDecodeError
 
 
 ride = np.array(
@@ -87,3 +105,283 @@ def test_check_filename_fit():
     filename = load_fit()[0]
     my_filename = check_filename_fit(filename)
     assert my_filename == filename
+
+
+@pytest.fixture
+def compressed_fit(tmpdir):
+    """Write the first FIT file of the dataset compressed in several ways."""
+    content = open(load_fit()[0], 'rb').read()
+    filenames = []
+    for extension, compression in [('gz', gzip.GzipFile),
+                                   ('bz2', bz2.BZ2File)]:
+        filename = str(tmpdir.join('ride.fit.' + extension))
+        with compression(filename, 'wb') as fileobj:
+            fileobj.write(content)
+        filenames.append(filename)
+    archive = str(tmpdir.join('rides.zip'))
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr('2014/ride.fit', content)
+        zip_file.writestr('ride.fit.gz', gzip.compress(content))
+    filenames += [archive + '/2014/ride.fit', archive + '/ride.fit.gz']
+    return filenames
+
+
+@pytest.mark.parametrize("schema", [None, ['power', 'speed']])
+def test_load_power_from_fit_compressed(compressed_fit, schema):
+    data = load_power_from_fit(load_fit()[0], schema=schema)
+    for filename in compressed_fit:
+        assert check_filename_fit(filename) == filename
+        assert_frame_equal(load_power_from_fit(filename, schema=schema),
+                           data, check_exact=True)
+        blocks = list(iter_fit_blocks(filename, block_size=1000,
+                                      schema=schema))
+        assert len(blocks) == 3
+
+
+@pytest.mark.parametrize("member", [None, 'unsupported.fit',
+                                    'unsupported.fit.gz'])
+def test_load_power_from_fit_compressed_fitparse(tmpdir, member):
+    content = _synthetic_fit('<') * 2
+    if member is None:
+        filename = str(tmpdir.join('unsupported.fit.gz'))
+        with gzip.GzipFile(filename, 'wb') as fileobj:
+            fileobj.write(content)
+    else:
+        archive = str(tmpdir.join('unsupported.zip'))
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            zip_file.writestr(member, gzip.compress(content)
+                              if member.endswith('.gz') else content)
+        filename = archive + '/' + member
+    with open_file(filename, seekable=True) as fileobj:
+        assert isinstance(fileobj, io.BytesIO)
+    # the fallback on fitparse reads the decompressed stream in memory
+    assert load_power_from_fit(filename)['power'].iloc[0] == 200
+    blocks = list(iter_fit_blocks(filename, block_size=1000))
+    assert blocks[0]['power'][0] == 200
+
+
+@pytest.mark.parametrize(
+    "member, msg",
+    [('ride.fit', 'The file does not exist.'),
+     ('ride.txt', 'The file is not a fit file.'),
+     ('2014/ride.fit.xz', 'The file is not a fit file.')])
+def test_check_filename_fit_zip_error(compressed_fit, member, msg):
+    archive = os.path.dirname(compressed_fit[-1])
+    with pytest.raises(ValueError, match=msg):
+        check_filename_fit(archive + '/' + member)
+
+
+def _fit_definition(local_mesg_num, mesg_num, fields, endian='<'):
+    # fields is a list of (field definition number, size, base type)
+    message = struct.pack(endian + 'BBBHB', 0x40 | local_mesg_num, 0,
+                          endian == '>', mesg_num, len(fields))
+    for field in fields:
+        message += struct.pack('3B', *field)
+    return message
+
+
+def _fit_data(local_mesg_num, fmt, values, endian='<', time_offset=None):
+    if time_offset is None:
+        header = local_mesg_num
+    else:
+        header = 0x80 | (local_mesg_num << 5) | time_offset
+    return struct.pack('B', header) + struct.pack(endian + fmt, *values)
+
+
+def _fit_file(messages):
+    data = b''.join(messages)
+    header = struct.pack('<2BHI4s', 14, 16, 2014, len(data), b'.FIT')
+    header += struct.pack('<H', calc_crc(header))
+    content = header + data
+    return content + struct.pack('<H', calc_crc(content))
+
+
+def _synthetic_fit(endian):
+    timestamp = 800000000
+    record = [(253, 4, 0x86), (7, 2, 0x84), (3, 1, 0x02), (4, 1, 0x02),
+              (2, 2, 0x84)]
+    record_no_hr = [(253, 4, 0x86), (7, 2, 0x84), (4, 1, 0x02),
+                    (6, 2, 0x84)]
+    messages = [
+        _fit_definition(0, 20, record, endian),
+        _fit_data(0, 'IHBBH', (timestamp, 200, 120, 0xFF, 2600), endian),
+        _fit_data(0, 'IHBBH', (timestamp + 1, 0xFFFF, 0xFF, 0xFF, 2605),
+                  endian),
+        # an event message updates the timestamp of the compressed headers
+        _fit_definition(1, 21, [(253, 4, 0x86), (0, 1, 0x00)], endian),
+        _fit_data(1, 'IB', (timestamp + 40, 0), endian),
+        _fit_definition(2, 20, record_no_hr[1:], endian),
+        _fit_data(2, 'HBH', (210, 0xFF, 8000), endian,
+                  time_offset=(timestamp + 42) & 0x1F),
+        _fit_data(2, 'HBH', (220, 0xFF, 0xFFFF), endian,
+                  time_offset=(timestamp + 45) & 0x1F),
+        _fit_definition(0, 20, record_no_hr, endian),
+        _fit_data(0, 'IHBH', (timestamp + 46, 230, 0xFF, 8100), endian),
+    ]
+    return _fit_file(messages)
+
+
+@pytest.mark.parametrize("filename",
+                         load_fit() + load_fit(set_data='corrupted'))
+@pytest.mark.parametrize("check_crc", [True, False])
+def test_read_records_fitparse(filename, check_crc):
+    with open(filename, 'rb') as fileobj:
+        data = pd.DataFrame(read_records(fileobj, FIELDS_DATA,
+                                         check_crc=check_crc))
+    with open(filename, 'rb') as fileobj:
+        data_fitparse = pd.DataFrame(_read_records_fitparse(fileobj))
+    if data_fitparse.empty:
+        assert data.empty
+    else:
+        assert_frame_equal(data, data_fitparse, check_exact=True)
+
+
+@pytest.mark.parametrize("endian", ['<', '>'])
+def test_read_records_synthetic(endian):
+    content = _synthetic_fit(endian)
+    data = pd.DataFrame(read_records(io.BytesIO(content), FIELDS_DATA))
+    assert_frame_equal(
+        data, pd.DataFrame(_read_records_fitparse(io.BytesIO(content))),
+        check_exact=True)
+    assert data['timestamp'].diff().dt.total_seconds().tolist()[1:5] == [
+        1, 41, 3, 1]
+    # the cadence is invalid in all messages
+    assert data['cadence'].dtype == object
+    assert data['power'].isnull().sum() == 1
+
+
+def _concatenate_records(blocks):
+    blocks = [pd.DataFrame(block) for block in blocks]
+    # the fields invalid in a whole block are None instead of NaN
+    return pd.concat(blocks, ignore_index=True).fillna(np.nan)
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 1000])
+@pytest.mark.parametrize("read_size", [1, 100, 1 << 20])
+def test_iter_records(block_size, read_size):
+    for content in [_synthetic_fit('<'), _synthetic_fit('>'),
+                    open(load_fit()[0], 'rb').read()]:
+        blocks = list(iter_records(io.BytesIO(content), FIELDS_DATA,
+                                   block_size, read_size=read_size))
+        assert all(len(block['power']) == block_size
+                   for block in blocks[:-1])
+        assert 0 < len(blocks[-1]['power']) <= block_size
+        data = pd.DataFrame(read_records(io.BytesIO(content), FIELDS_DATA))
+        assert_frame_equal(_concatenate_records(blocks), data.fillna(np.nan),
+                           check_dtype=False, check_exact=True)
+
+
+@pytest.mark.parametrize(
+    "content, err_msg",
+    [(_synthetic_fit('<')[:-10], 'Unexpected end'),
+     (_synthetic_fit('<')[:-1], 'Unexpected end'),
+     (_synthetic_fit('<') * 2, 'chained')]
+)
+def test_iter_records_error(content, err_msg):
+    with pytest.raises(FitDecodeError, match=err_msg):
+        list(iter_records(io.BytesIO(content), FIELDS_DATA, 1, read_size=8))
+
+
+def test_read_records_crc(tmpdir):
+    content = bytearray(_synthetic_fit('<'))
+    # corrupt the power of the first record
+    content[40] ^= 0x01
+    with pytest.raises(FitDecodeError, match='CRC mismatch'):
+        read_records(io.BytesIO(content), FIELDS_DATA)
+    with pytest.raises(FitDecodeError, match='CRC mismatch'):
+        list(iter_records(io.BytesIO(content), FIELDS_DATA, 2, read_size=8))
+    filename = str(tmpdir.join('corrupted.fit'))
+    with open(filename, 'wb') as fileobj:
+        fileobj.write(content)
+    with pytest.raises(ValueError, match='CRC Mismatch'):
+        load_power_from_fit(filename)
+    assert load_power_from_fit(filename, check_crc=False)['power'].iloc[0] \
+        == 201
+
+
+@pytest.mark.parametrize(
+    "content, err_msg",
+    [(_fit_file([_fit_definition(0, 20, [(253, 4, 0x86), (7, 2, 0x84),
+                                         (8, 3, 0x0D)]),
+                 _fit_data(0, 'IH3B', (800000000, 200, 0x10, 0x20, 0x30))]),
+      'component'),
+     (_synthetic_fit('<') * 2, 'chained')]
+)
+def test_load_power_from_fit_unsupported(tmpdir, content, err_msg):
+    # the layouts which are not supported are decoded by fitparse
+    with pytest.raises(FitDecodeError, match=err_msg):
+        read_records(io.BytesIO(content), FIELDS_DATA)
+    filename = str(tmpdir.join('unsupported.fit'))
+    with open(filename, 'wb') as fileobj:
+        fileobj.write(content)
+    data = load_power_from_fit(filename)
+    assert data['power'].iloc[0] in (200, 230)
+
+
+def test_iter_fit_blocks_fitparse(tmpdir):
+    filename = str(tmpdir.join('unsupported.fit'))
+    with open(filename, 'wb') as fileobj:
+        fileobj.write(_fit_file(
+            [_fit_definition(0, 20, [(253, 4, 0x86), (7, 2, 0x84),
+                                     (8, 3, 0x0D)])] +
+            [_fit_data(0, 'IH3B', (800000000 + i, 200 + i, 0x10, 0x20, 0x30))
+             for i in range(5)]))
+    # the layouts which are not supported are read with fitparse
+    blocks = list(iter_fit_blocks(filename, block_size=2))
+    assert [block['power'].tolist() for block in blocks] == [
+        [200, 201], [202, 203], [204]]
+
+    with open(filename, 'wb') as fileobj:
+        fileobj.write(_synthetic_fit('<') * 2)
+    # the chained file is only detected once some blocks were yielded
+    with pytest.raises(IOError, match='cannot be read by blocks'):
+        list(iter_fit_blocks(filename, block_size=2))
+
+
+@pytest.mark.parametrize(
+    "schema, dtypes",
+    [(['power', 'cadence'], [np.uint16, np.uint8]),
+     ({'power': np.float32, 'elevation': None}, [np.float32, np.float32]),
+     (['heart-rate', 'latitude'], [np.float32, np.int32])]
+)
+def test_load_power_from_fit_schema(schema, dtypes):
+    filename = load_fit()[0]
+    data = load_power_from_fit(filename, schema=schema)
+    assert data.columns.tolist() == list(schema)
+    assert data.dtypes.tolist() == dtypes
+    data_full = load_power_from_fit(filename)
+    for column in set(data.columns) & set(data_full.columns):
+        assert_allclose(data[column], data_full[column], rtol=1e-6)
+
+
+def test_load_power_from_fit_schema_fitparse(tmpdir):
+    # the columns decoded by fitparse follow the schema as well
+    content = _synthetic_fit('<')
+    schema = ['power', 'heart-rate', 'cadence', 'speed']
+    filename = str(tmpdir.join('synthetic.fit'))
+    with open(filename, 'wb') as fileobj:
+        fileobj.write(content)
+    data = load_power_from_fit(filename, schema=schema)
+    fields = ('timestamp', 'power', 'heart_rate', 'cadence', 'speed')
+    dtypes = {'power': np.dtype(np.uint16), 'heart_rate': np.dtype(np.uint8),
+              'cadence': np.dtype(np.uint8),
+              'speed': np.dtype(np.float32)}
+    data_fitparse = pd.DataFrame(
+        _read_records_fitparse(io.BytesIO(content), fields, dtypes=dtypes),
+        columns=fields).set_index('timestamp')
+    del data_fitparse.index.name
+    data_fitparse.columns = schema
+    assert_frame_equal(data, data_fitparse)
+    assert data.dtypes.tolist() == [np.float32] * 4
+
+
+@pytest.mark.parametrize(
+    "schema, err_msg",
+    [([], 'at least one column'),
+     (['power', 'watts'], 'should contain columns among'),
+     ({'speed': np.uint16}, 'cannot be stored with the integer dtype'),
+     ({'power': object}, 'numeric dtype')]
+)
+def test_check_schema_error(schema, err_msg):
+    with pytest.raises(ValueError, match=err_msg):
+        check_schema(schema)
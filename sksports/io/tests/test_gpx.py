@@ -0,0 +1,76 @@
+"""Testing the reader of GPX files."""
+
+# Authors: Guillaume Lemaitre <g.lemaitre58@gmail.com>
+#          Cedric Lemaitre
+# License: MIT
+
+import numpy as np
+import pytest
+from pandas.testing import assert_frame_equal
+
+from sksports.datasets import load_fit
+from sksports.io import bikeread
+from sksports.io.fit import load_power_from_fit
+from sksports.io.gpx import load_power_from_gpx
+
+SCHEMA = ['power', 'heart-rate', 'cadence', 'elevation', 'latitude',
+          'longitude', 'temperature']
+
+
+def _write_gpx(filename, data):
+    """Write the records of a FIT file as a GPX file."""
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<gpx creator="test" version="1.1" xmlns="http://www.topografix.com/'
+        'GPX/1/1" xmlns:gpxtpx="http://www.garmin.com/xmlschemas/'
+        'TrackPointExtension/v1">',
+        '<metadata><time>2014-05-07T12:26:22Z</time></metadata>',
+        '<trk><name>Ride</name><trkseg>']
+    for time, row in data.iterrows():
+        point = ['<trkpt lat="{!r}" lon="{!r}"><ele>{!r}</ele>'
+                 '<time>{}Z</time><extensions><power>{:d}</power>'
+                 '<gpxtpx:TrackPointExtension>'
+                 .format(row['latitude'] * 180 / 2 ** 31,
+                         row['longitude'] * 180 / 2 ** 31,
+                         float(row['elevation']), time.isoformat(),
+                         int(row['power']))]
+        if not np.isnan(row['temperature']):
+            point.append('<gpxtpx:atemp>{:d}</gpxtpx:atemp>'
+                         .format(int(row['temperature'])))
+        if not np.isnan(row['heart-rate']):
+            point.append('<gpxtpx:hr>{:d}</gpxtpx:hr>'
+                         .format(int(row['heart-rate'])))
+        point.append('<gpxtpx:cad>{:d}</gpxtpx:cad>'
+                     '</gpxtpx:TrackPointExtension></extensions></trkpt>'
+                     .format(int(row['cadence'])))
+        lines.append(''.join(point))
+    lines.append('</trkseg></trk></gpx>')
+    with open(filename, 'wb') as f:
+        f.write('\n'.join(lines).encode('utf-8'))
+
+
+@pytest.fixture
+def data():
+    data = load_power_from_fit(load_fit()[0], schema=SCHEMA)
+    return data.astype({'elevation': np.float64})
+
+
+def test_load_power_from_gpx(tmpdir, data):
+    filename = str(tmpdir.join('ride.gpx'))
+    _write_gpx(filename, data)
+    assert_frame_equal(load_power_from_gpx(filename, schema=SCHEMA), data,
+                       check_dtype=False, check_exact=True)
+    gpx = load_power_from_gpx(filename)
+    assert gpx.columns.tolist() == ['power', 'heart-rate', 'cadence',
+                                    'distance', 'elevation', 'speed']
+    # the distance and the speed are not available in GPX files
+    assert gpx[['distance', 'speed']].isnull().all().all()
+
+
+def test_bikeread_gpx(tmpdir, data):
+    filename = str(tmpdir.join('ride.gpx'))
+    _write_gpx(filename, data)
+    columns = ['power', 'cadence', 'elevation']
+    assert_frame_equal(bikeread(filename, schema=columns),
+                       bikeread(load_fit()[0], schema=columns),
+                       check_dtype=False)
@@ -0,0 +1,104 @@
+"""Test the activities stored as continuous segments."""
+
+# Authors: Guillaume Lemaitre <g.lemaitre58@gmail.com>
+#          Cedric Lemaitre
+# License: MIT
+
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from numpy.testing import assert_array_equal
+from pandas.testing import assert_frame_equal
+
+from sksports.datasets import load_fit
+from sksports.io import SegmentedActivity
+from sksports.io import bikeread
+
+
+@pytest.fixture
+def activity():
+    # three segments separated by a stop of 10 minutes and of a night
+    index = (pd.date_range('2014-05-07 12:00:00', periods=30, freq='s')
+             .append(pd.date_range('2014-05-07 12:10:30', periods=20,
+                                   freq='s'))
+             .append(pd.date_range('2014-05-08 08:00:00', periods=10,
+                                   freq='s')))
+    return pd.DataFrame({'power': np.arange(60, dtype=np.float64),
+                         'cadence': np.arange(60, dtype=np.uint8)},
+                        index=index, columns=['power', 'cadence'])
+
+
+def test_segmented_activity_from_frame(activity):
+    segmented = SegmentedActivity.from_frame(activity)
+    assert_array_equal(segmented.lengths, [30, 20, 10])
+    assert_array_equal(segmented.bounds, [0, 30, 50, 60])
+    assert segmented.starts[1] == pd.Timestamp('2014-05-07 12:10:30')
+    assert segmented.shape == (60, 2)
+    assert len(segmented) == 60
+    assert segmented.index.equals(activity.index)
+    assert_frame_equal(segmented.to_frame(), activity)
+    segments = list(segmented.iter_segments())
+    assert [segment.shape[0] for segment in segments] == [30, 20, 10]
+    assert_frame_equal(pd.concat(segments), activity)
+
+
+def test_segmented_activity_bikeread():
+    activity = bikeread(load_fit()[2], max_gap='00:01:00')
+    segmented = SegmentedActivity.from_frame(activity)
+    assert segmented.lengths.size == 4
+    assert_frame_equal(segmented.to_frame(), activity)
+
+
+def test_segmented_activity_getitem_setitem(activity):
+    segmented = SegmentedActivity.from_frame(activity)
+    power = segmented['power']
+    assert isinstance(power, SegmentedActivity)
+    assert power.columns.tolist() == ['power']
+    assert_array_equal(power.lengths, segmented.lengths)
+    segmented['double'] = power
+    assert_array_equal(segmented.data['double'], activity['power'])
+    segmented['zeros'] = np.zeros(60)
+    assert segmented.columns.tolist() == ['power', 'cadence', 'double',
+                                          'zeros']
+
+
+def test_segmented_activity_diff(activity):
+    segmented = SegmentedActivity.from_frame(activity)
+    diff = segmented.diff(periods=2)
+    expected = pd.concat([segment.diff(periods=2)
+                          for segment in segmented.iter_segments()])
+    assert_array_equal(diff.values, expected.values.astype(np.float64))
+    assert np.isnan(diff.data['power'].values[[0, 1, 30, 31, 50, 51]]).all()
+
+
+def test_segmented_activity_values_with_gaps(activity):
+    segmented = SegmentedActivity.from_frame(activity)
+    values = segmented.values_with_gaps()
+    assert values.shape == (62, 2)
+    assert values.dtype == np.float64
+    assert np.isnan(values[[30, 51]]).all()
+    assert_array_equal(np.delete(values, [30, 51], axis=0), activity.values)
+
+
+def test_segmented_activity_astype(activity):
+    segmented = SegmentedActivity.from_frame(activity).astype(np.float32)
+    assert (segmented.data.dtypes == np.float32).all()
+
+
+@pytest.mark.parametrize(
+    "starts, lengths, err_msg",
+    [(['2014-05-07 12:00:00'], [30, 30], 'should have the same size'),
+     (['2014-05-07 12:00:00', '2014-05-07 13:00:00'], [30, 20],
+      'sum to the number of samples'),
+     (['2014-05-07 12:00:00', '2014-05-07 13:00:00'], [60, 0],
+      'should be positive')])
+def test_segmented_activity_error(activity, starts, lengths, err_msg):
+    with pytest.raises(ValueError, match=err_msg):
+        SegmentedActivity(activity, starts, lengths)
+
+
+def test_segmented_activity_diff_error(activity):
+    with pytest.raises(ValueError, match='"periods" should be a positive'):
+        SegmentedActivity.from_frame(activity).diff(periods=0)
@@ -0,0 +1,110 @@
+"""Testing the reader of TCX files."""
+
+# Authors: Guillaume Lemaitre <g.lemaitre58@gmail.com>
+#          Cedric Lemaitre
+# License: MIT
+
+import gzip
+from xml.etree.ElementTree import iterparse
+
+import numpy as np
+import pytest
+from pandas.testing import assert_frame_equal
+
+from sksports.datasets import load_fit
+from sksports.io import bikeread
+from sksports.io import _xml
+from sksports.io.fit import load_power_from_fit
+from sksports.io.tcx import load_power_from_tcx
+
+SCHEMA = ['power', 'heart-rate', 'cadence', 'distance', 'elevation', 'speed',
+          'latitude', 'longitude']
+
+
+def _write_tcx(filename, data, opener=open):
+    """Write the records of a FIT file as a TCX file."""
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<TrainingCenterDatabase xmlns="http://www.garmin.com/xmlschemas/'
+        'TrainingCenterDatabase/v2" xmlns:ns3="http://www.garmin.com/'
+        'xmlschemas/ActivityExtension/v2">',
+        '<Activities><Activity Sport="Biking"><Id>2014-05-07T12:26:22Z</Id>',
+        '<Lap StartTime="2014-05-07T12:26:22Z"><DistanceMeters>1.0'
+        '</DistanceMeters><Cadence>1</Cadence><AverageHeartRateBpm><Value>1'
+        '</Value></AverageHeartRateBpm><Track>']
+    for time, row in data.iterrows():
+        point = ['<Trackpoint><Time>{}Z</Time>'.format(time.isoformat())]
+        if not np.isnan(row['latitude']):
+            point.append(
+                '<Position><LatitudeDegrees>{!r}</LatitudeDegrees>'
+                '<LongitudeDegrees>{!r}</LongitudeDegrees></Position>'
+                .format(row['latitude'] * 180 / 2 ** 31,
+                        row['longitude'] * 180 / 2 ** 31))
+        point.append('<AltitudeMeters>{!r}</AltitudeMeters>'
+                     '<DistanceMeters>{!r}</DistanceMeters>'
+                     .format(float(row['elevation']), row['distance']))
+        if not np.isnan(row['heart-rate']):
+            point.append('<HeartRateBpm><Value>{:d}</Value></HeartRateBpm>'
+                         .format(int(row['heart-rate'])))
+        point.append('<Cadence>{:d}</Cadence><Extensions><ns3:TPX>'
+                     '<ns3:Speed>{!r}</ns3:Speed><ns3:Watts>{:d}</ns3:Watts>'
+                     '</ns3:TPX></Extensions></Trackpoint>'
+                     .format(int(row['cadence']), float(row['speed']),
+                             int(row['power'])))
+        lines.append(''.join(point))
+    lines.append('</Track></Lap></Activity></Activities>'
+                 '</TrainingCenterDatabase>')
+    with opener(filename, 'wb') as f:
+        f.write('\n'.join(lines).encode('utf-8'))
+
+
+@pytest.fixture
+def data():
+    data = load_power_from_fit(load_fit()[0], schema=SCHEMA)
+    return data.astype({'elevation': np.float64, 'speed': np.float64})
+
+
+def test_load_power_from_tcx(tmpdir, data):
+    filename = str(tmpdir.join('ride.tcx'))
+    _write_tcx(filename, data)
+    assert_frame_equal(load_power_from_tcx(filename, schema=SCHEMA), data,
+                       check_dtype=False, check_exact=True)
+    tcx = load_power_from_tcx(filename, schema={'power': 'uint16',
+                                                'temperature': 'int8'})
+    assert tcx['power'].dtype == np.uint16
+    # the temperature is not available in TCX files
+    assert tcx['temperature'].isnull().all()
+
+
+def test_load_power_from_tcx_incremental(tmpdir, data, monkeypatch):
+    filename = str(tmpdir.join('ride.tcx'))
+    _write_tcx(filename, data)
+    roots = []
+
+    def recorded_iterparse(*args, **kwargs):
+        for event, elem in iterparse(*args, **kwargs):
+            if not roots:
+                roots.append(elem)
+            yield event, elem
+
+    monkeypatch.setattr(_xml, 'iterparse', recorded_iterparse)
+    # the times are converted by several blocks
+    monkeypatch.setattr(_xml, 'TIMES_BLOCK_SIZE', 1000)
+    assert_frame_equal(load_power_from_tcx(filename, schema=SCHEMA), data,
+                       check_dtype=False, check_exact=True)
+    # the points parsed are not kept in the tree
+    assert not any(elem.tag.endswith('Trackpoint')
+                   for elem in roots[0].iter())
+
+
+@pytest.mark.parametrize("params", [{}, {'max_gap': 60, 'dtype': 'float32'}])
+def test_bikeread_tcx(tmpdir, data, params):
+    filename = str(tmpdir.join('ride.tcx.gz'))
+    _write_tcx(filename, data, opener=gzip.open)
+    assert_frame_equal(bikeread(filename, **params),
+                       bikeread(load_fit()[0], **params), check_dtype=False)
+    # the format is detected from the content without extension
+    filename = str(tmpdir.join('ride'))
+    _write_tcx(filename, data)
+    assert_frame_equal(bikeread(filename, **params),
+                       bikeread(load_fit()[0], **params), check_dtype=False)
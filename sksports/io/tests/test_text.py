@@ -0,0 +1,54 @@
+"""Testing the reader of CSV files."""
+
+# Authors: Guillaume Lemaitre <g.lemaitre58@gmail.com>
+#          Cedric Lemaitre
+# License: MIT
+
+import numpy as np
+import pytest
+from pandas.testing import assert_frame_equal
+
+from sksports.datasets import load_fit
+from sksports.io import bikeread
+from sksports.io.fit import load_power_from_fit
+from sksports.io.text import load_power_from_csv
+
+
+def test_load_power_from_csv(tmpdir):
+    data = load_power_from_fit(load_fit()[0])
+    filename = str(tmpdir.join('ride.csv'))
+    data.to_csv(filename)
+    assert_frame_equal(load_power_from_csv(filename), data,
+                       check_dtype=False)
+
+    # the time can be given in seconds and the FIT names are accepted
+    csv = data.rename(columns={'heart-rate': 'heart_rate'})
+    csv.insert(0, 'time', data.index.values.astype(np.int64) // 10 ** 9)
+    csv.to_csv(filename, index=False)
+    assert_frame_equal(
+        load_power_from_csv(filename, schema={'power': 'uint16',
+                                              'heart-rate': 'float32'}),
+        data[['power', 'heart-rate']].astype({'power': np.uint16,
+                                              'heart-rate': np.float32}))
+
+
+def test_bikeread_csv(tmpdir):
+    filename = str(tmpdir.join('ride.csv.bz2'))
+    load_power_from_fit(load_fit()[0]).to_csv(filename, compression='bz2')
+    assert_frame_equal(bikeread(filename), bikeread(load_fit()[0]),
+                       check_dtype=False)
+    filename = str(tmpdir.join('ride.txt'))
+    load_power_from_fit(load_fit()[0]).to_csv(filename, index_label='time')
+    assert_frame_equal(bikeread(filename), bikeread(load_fit()[0]),
+                       check_dtype=False)
+
+
+def test_load_power_from_csv_error(tmpdir):
+    filename = str(tmpdir.join('ride.csv'))
+    tmpdir.join('ride.csv').write('power,cadence\n200,90\n')
+    with pytest.raises(ValueError, match='does not have a time column'):
+        load_power_from_csv(filename)
+    filename = str(tmpdir.join('ride.dat'))
+    tmpdir.join('ride.dat').write('power,cadence\n200,90\n')
+    with pytest.raises(ValueError, match='is not supported'):
+        bikeread(filename)
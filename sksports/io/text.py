@@ -0,0 +1,80 @@
+"""Methods to read CSV files."""
+
+# Authors: Guillaume Lemaitre <g.lemaitre58@gmail.com>
+#          Cedric Lemaitre
+# License: MIT
+
+import numpy as np
+import pandas as pd
+
+from .fit import FIELDS_COLUMNS
+from .fit import check_filename
+from .fit import check_schema
+from .fit import columns_to_frame
+from .fit import open_file
+
+# header of the time column, the index written by DataFrame.to_csv has no
+# header
+TIME_HEADERS = ('timestamp', 'time', 'unnamed: 0')
+
+
+def _header_column(header):
+    """Get the column of the DataFrame corresponding to a header."""
+    header = header.strip().lower()
+    if header in TIME_HEADERS:
+        return 'timestamp'
+    if header in FIELDS_COLUMNS:
+        return header
+    # the name of the FIT fields (e.g. 'heart_rate') are also accepted
+    for column, field in FIELDS_COLUMNS.items():
+        if header == field:
+            return column
+    return None
+
+
+def load_power_from_csv(filename, schema=None):
+    """Method to open the power data from CSV file into a pandas dataframe.
+
+    The file should have a header naming the columns as in the DataFrame
+    returned by :func:`sksports.io.bikeread` (e.g. as written by
+    :meth:`pandas.DataFrame.to_csv`). The time is given by the column
+    ``'timestamp'`` or ``'time'``, or by the first column if it has no
+    header, either as dates or as seconds since the UNIX epoch. Only the
+    columns used are parsed, with the C parser of pandas.
+
+    Parameters
+    ----------
+    filename : str
+        Path to the CSV file, possibly compressed. Refer to
+        :func:`sksports.io.fit.open_file`.
+
+    schema : list of str or dict, optional
+        The columns to read. Refer to
+        :func:`sksports.io.fit.load_power_from_fit`. The columns which are
+        not in the file are filled with NaN.
+
+    Returns
+    -------
+    data : DataFrame
+        Power records of the ride.
+
+    """
+    filename = check_filename(filename)
+    schema = check_schema(schema)
+    with open_file(filename) as fileobj:
+        data = pd.read_csv(
+            fileobj, usecols=lambda header: _header_column(header) is not None)
+    data.columns = [_header_column(header) for header in data.columns]
+    if 'timestamp' not in data.columns:
+        raise ValueError('The file {} does not have a time column. The time'
+                         ' should be in a column named {}.'
+                         .format(filename, TIME_HEADERS[:2]))
+
+    timestamps = data.pop('timestamp')
+    if timestamps.dtype.kind in 'iuf':
+        timestamps = pd.to_datetime(timestamps, unit='s').values
+    else:
+        timestamps = pd.to_datetime(timestamps, utc=True).values
+    columns = {column: data[column].values.astype(np.float64)
+               for column in data.columns}
+    return columns_to_frame(timestamps, columns, schema, filename)
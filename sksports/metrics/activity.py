@@ -16,6 +16,9 @@ the lower the better.
 from __future__ import division
 
 import numpy as np
+import pandas as pd
+
+from ..io.segmented import SegmentedActivity
 
 TS_SCALE_GRAPPE = dict([('I1', 2.), ('I2', 2.5), ('I3', 3.),
                         ('I4', 3.5), ('I5', 4.5), ('I6', 7.),
@@ -83,8 +86,10 @@ def normalized_power_score(activity_power, mpa, window_width=30):
 
     Parameters
     ----------
-    activity_power : Series
-        A Series containing the power data from an activity.
+    activity_power : Series or SegmentedActivity
+        A Series containing the power data from an activity, or a
+        :class:`sksports.io.SegmentedActivity` with a ``'power'`` column
+        whose gaps are not counted.
 
     mpa : float
         Maximum power aerobic. Use :func:`metrics.ftp2mpa` if you use the
@@ -117,6 +122,10 @@ def normalized_power_score(activity_power, mpa, window_width=30):
     Normalized power 218.49 W
 
     """
+    if isinstance(activity_power, SegmentedActivity):
+        # the windows spanning a gap contain a missing sample and are dropped
+        activity_power = pd.Series(
+            activity_power['power'].values_with_gaps()[:, 0])
 
     smooth_activity = (activity_power.rolling(window_width, center=True)
                                      .mean().dropna())
@@ -139,8 +148,10 @@ def intensity_factor_score(activity_power, mpa):
 
     Parameters
     ----------
-    activity_power : Series
-        A Series containing the power data from an activity.
+    activity_power : Series or SegmentedActivity
+        A Series containing the power data from an activity, or a
+        :class:`sksports.io.SegmentedActivity` with a ``'power'`` column
+        whose gaps are not counted.
 
     mpa : float
         Maximum power aerobic. Use :func:`metrics.ftp2mpa` if you use the
@@ -183,8 +194,10 @@ def training_stress_score(activity_power, mpa):
 
     Parameters
     ----------
-    activity_power : Series
-        A Series containing the power data from an activity.
+    activity_power : Series or SegmentedActivity
+        A Series containing the power data from an activity, or a
+        :class:`sksports.io.SegmentedActivity` with a ``'power'`` column
+        whose gaps are not counted.
 
     mpa : float
         Maximum power aerobic. Use :func:`metrics.ftp2mpa` if you use the
@@ -212,9 +225,10 @@ def training_stress_score(activity_power, mpa):
     Training stress score 32.38
 
     """
-    activity_power = activity_power.resample('1S').mean()
+    if not isinstance(activity_power, SegmentedActivity):
+        activity_power = activity_power.resample('1S').mean()
     if_score = intensity_factor_score(activity_power, mpa)
-    return (activity_power.size * if_score ** 2) / 3600 * 100
+    return (len(activity_power) * if_score ** 2) / 3600 * 100
 
 
 def training_load_score(activity_power, mpa):
@@ -227,8 +241,10 @@ def training_load_score(activity_power, mpa):
 
     Parameters
     ----------
-    activity_power : Series
-        A Series containing the power data from an activity.
+    activity_power : Series or SegmentedActivity
+        A Series containing the power data from an activity, or a
+        :class:`sksports.io.SegmentedActivity` with a ``'power'`` column
+        whose gaps are not counted.
 
     mpa : float
         Maximum power aerobic. Use :func:`metrics.ftp2mpa` if you use the
@@ -257,7 +273,10 @@ def training_load_score(activity_power, mpa):
 
     """
     tls_score = 0.
-    activity_power = activity_power.resample('1S').mean()
+    if isinstance(activity_power, SegmentedActivity):
+        activity_power = activity_power.data['power']
+    else:
+        activity_power = activity_power.resample('1S').mean()
     for key in TS_SCALE_GRAPPE.keys():
         power_samples = activity_power[
             np.bitwise_and(activity_power >= ESIE_SCALE_GRAPPE[key][0] * mpa,
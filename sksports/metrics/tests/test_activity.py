@@ -9,6 +9,7 @@ import pytest
 import pandas as pd
 import numpy as np
 
+from sksports.io import SegmentedActivity
 from sksports.metrics import normalized_power_score
 from sksports.metrics import intensity_factor_score
 from sksports.metrics import training_stress_score
@@ -49,3 +50,29 @@ def test_scores(score_func, params, expected_score):
 
 def test_convert_mpa_ftp():
     assert mpa2ftp(ftp2mpa(ftp)) == pytest.approx(ftp)
+
+
+def test_scores_segmented_activity():
+    # a stop of an hour in the middle of the ride is not counted
+    index = ride_2.index.where(np.arange(ride_2.size) < 70,
+                               ride_2.index + pd.Timedelta('1H'))
+    segmented = SegmentedActivity.from_frame(
+        ride_2.to_frame().set_index(index))
+    assert segmented.lengths.tolist() == [70, 70]
+
+    # the rolling windows spanning the stop are discarded
+    smooth = pd.concat([segment['power'].rolling(30, center=True).mean()
+                        for segment in segmented.iter_segments()]).dropna()
+    smooth = smooth[smooth > 0.3 * mpa]
+    normalized_power = (smooth ** 4).mean() ** 0.25
+    intensity_factor = normalized_power / mpa2ftp(mpa)
+    assert normalized_power_score(segmented, mpa) == \
+        pytest.approx(normalized_power)
+    assert normalized_power_score(segmented, mpa) != \
+        pytest.approx(normalized_power_score(ride_2, mpa))
+    assert intensity_factor_score(segmented, mpa) == \
+        pytest.approx(intensity_factor)
+    assert training_stress_score(segmented['power'], mpa) == \
+        pytest.approx(140 * intensity_factor ** 2 / 3600 * 100)
+    assert training_load_score(segmented, mpa) == \
+        pytest.approx(training_load_score(ride_2, mpa))
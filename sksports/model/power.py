@@ -11,6 +11,7 @@ from scipy import constants
 
 from ..extraction import gradient_elevation
 from ..extraction import acceleration
+from ..io import Activity
 
 
 def strava_power_model(activity, cyclist_weight, bike_weight=6.8,
@@ -26,8 +27,9 @@ def strava_power_model(activity, cyclist_weight, bike_weight=6.8,
 
     Parameters
     ----------
-    activity : DataFrame
-        The activity containing the ride information.
+    activity : DataFrame or Activity
+        The activity containing the ride information. The gradients of an
+        :class:`sksports.io.Activity` are computed once and cached.
 
     cyclist_weight : float
         The cyclist weight in kg.
@@ -88,10 +90,19 @@ def strava_power_model(activity, cyclist_weight, bike_weight=6.8,
     Freq: S, dtype: float64
 
     """
-    if 'gradient-elevation' not in activity.columns:
-        activity = gradient_elevation(activity)
-    if use_acceleration and 'acceleration' not in activity.columns:
-        activity = acceleration(activity)
+    if isinstance(activity, Activity):
+        # the gradients are computed once and cached by the activity
+        slope = activity.gradient_elevation()
+        if use_acceleration:
+            acc = activity.acceleration()
+    else:
+        if 'gradient-elevation' not in activity.columns:
+            activity = gradient_elevation(activity)
+        if use_acceleration and 'acceleration' not in activity.columns:
+            activity = acceleration(activity)
+        slope = activity['gradient-elevation']  # grade
+        if use_acceleration:
+            acc = activity['acceleration']  # m.s^-1
 
     temperature_kelvin = constants.convert_temperature(
         temperature, 'Celsius', 'Kelvin')
@@ -114,14 +125,12 @@ def strava_power_model(activity, cyclist_weight, bike_weight=6.8,
         (standard_atmosphere * temperature_kelvin))  # kg.m^-3
     power_wind = 0.5 * air_density * surface_rider * coef_drag * speed**3
 
-    slope = activity['gradient-elevation']  # grade
     power_gravity = (total_weight * constants.g *
                      np.sin(np.arctan(slope)) * speed)
 
     power_total = power_roll_res + power_wind + power_gravity
 
     if use_acceleration:
-        acc = activity['acceleration']  # m.s^-1
         power_acceleration = total_weight * acc
         # multiply by the average speed between t and t-1
         power_acceleration = power_acceleration * (speed * (1 + acc)) / 2
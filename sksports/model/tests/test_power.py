@@ -13,6 +13,9 @@ from numpy.testing import assert_allclose
 import pandas as pd
 from pandas.testing import assert_series_equal
 
+from sksports.datasets import load_fit
+from sksports.io import Activity
+from sksports.io import bikeread
 from sksports.model import strava_power_model
 from sksports.extraction import gradient_elevation
 from sksports.extraction import acceleration
@@ -107,3 +110,19 @@ def test_strava_power_model():
                                                       cyclist_weight=70,
                                                       surface_rider=0.5)
     assert_array_less(power_initial, power_increase_surface_rider)
+
+
+@pytest.mark.parametrize("use_acceleration", [False, True])
+def test_strava_power_model_activity(use_acceleration):
+    ride = bikeread(load_fit()[0])
+    lazy_ride = Activity(load_fit()[0])
+    power = strava_power_model(lazy_ride, cyclist_weight=70,
+                               use_acceleration=use_acceleration)
+    assert 'heart-rate' not in lazy_ride.loaded_columns
+    assert_allclose(power,
+                    strava_power_model(ride, cyclist_weight=70,
+                                       use_acceleration=use_acceleration))
+    # the gradients are not computed again
+    gradient = lazy_ride.gradient_elevation()
+    strava_power_model(lazy_ride, cyclist_weight=78)
+    assert lazy_ride.gradient_elevation() is gradient
@@ -6,12 +6,18 @@ import os
 import shutil
 from tempfile import mkdtemp
 
+import numpy as np
+import pandas as pd
 import pytest
 from pandas.testing import assert_frame_equal
+from pandas.testing import assert_series_equal
 
 from sksports.base import Rider
 from sksports.datasets import load_fit
 from sksports.datasets import load_rider
+from sksports.io import ActivityArchive
+from sksports.io import bikeread
+from sksports.io import write_archive
 
 
 def test_rider_add_activities_update():
@@ -33,6 +39,68 @@ def test_rider_add_activities(rider, filename, expected_shape):
     assert rider.power_profile_.shape == expected_shape
 
 
+def test_rider_add_activities_durations():
+    rider = Rider(durations='wko')
+    rider.add_activities(load_fit())
+    assert rider.power_profile_.shape == (6 * 18, 3)
+    rpp = rider.record_power_profile()
+    assert rpp.shape == (18, 6)
+
+
+def test_rider_add_activities_interpolate():
+    rider = Rider(durations='wko', interpolate=True)
+    rider.add_activities(load_fit()[0])
+    rider_full = Rider()
+    rider_full.add_activities(load_fit()[0])
+    assert rider.power_profile_.index.equals(rider_full.power_profile_.index)
+    knots = pd.to_timedelta(['00:00:05', '00:05:00'])
+    assert_frame_equal(rider.power_profile_.loc['power'].loc[knots],
+                       rider_full.power_profile_.loc['power'].loc[knots])
+    # the durations longer than the last duration of the grid are not filled
+    power = rider.power_profile_.loc['power'].iloc[:, 0]
+    last_knot = power.last_valid_index()
+    assert last_knot < power.index[-1]
+    assert power.loc[:last_knot].notnull().all()
+
+
+def test_rider_add_activities_work_thresholds():
+    rider = Rider(durations='wko', work_thresholds=[0, 250, 500])
+    rider.add_activities(load_fit())
+    assert rider.fatigue_power_profile_.shape == (3 * 18, 3)
+    assert_series_equal(
+        rider.fatigue_power_profile_.loc[0].iloc[:, 0],
+        rider.power_profile_.loc['power'].iloc[:, 0], check_names=False)
+    rider.delete_activities('07 May 2014')
+    assert rider.fatigue_power_profile_.shape == (3 * 18, 2)
+
+
+def test_rider_add_activities_max_gap():
+    rider = Rider(durations='wko', max_gap=60)
+    rider.add_activities(load_fit())
+    assert rider.power_profile_.shape == (6 * 18, 3)
+    # the gaps of the first activities are shorter than a minute
+    rider_filled = Rider(durations='wko')
+    rider_filled.add_activities(load_fit())
+    assert_frame_equal(rider.power_profile_.iloc[:, :2],
+                       rider_filled.power_profile_.iloc[:, :2])
+
+
+def test_rider_add_activities_dtype():
+    rider = Rider(dtype=np.float32)
+    rider.add_activities(load_fit()[0])
+    assert (rider.power_profile_.dtypes == np.float32).all()
+
+
+def test_rider_add_activities_archive(tmpdir):
+    filename = str(tmpdir.join('activities.sks'))
+    rider = Rider(durations='wko', dtype=np.float32)
+    rider.add_activities(load_fit())
+    write_archive(filename, [bikeread(f) for f in load_fit()])
+    rider_archive = Rider(durations='wko', dtype=np.float32)
+    rider_archive.add_activities(ActivityArchive(filename))
+    assert_frame_equal(rider_archive.power_profile_, rider.power_profile_)
+
+
 @pytest.mark.parametrize(
     "dates, time_comparison, expected_shape",
     [('07 May 2014', False, (33515, 2)),
@@ -2,6 +2,7 @@
 #          Cedric Lemaitre
 # License: MIT
 
+import zipfile
 from os.path import dirname, join
 
 import pytest
@@ -18,3 +19,15 @@ filenames = load_fit()
      (join(dirname(filenames[0]), '*.fit'), filenames)])
 def test_validate_filenames(filenames, expected_filenames):
     assert list(validate_filenames(filenames)) == expected_filenames
+
+
+def test_validate_filenames_zip(tmpdir):
+    archive = str(tmpdir.join('rides.zip'))
+    with zipfile.ZipFile(archive, 'w') as zip_file:
+        for member in ['b.fit', 'a.fit', 'notes.txt', '2014/c.fit']:
+            zip_file.writestr(member, b'')
+    assert validate_filenames(archive + '/*.fit') == [
+        archive + '/a.fit', archive + '/b.fit']
+    assert validate_filenames(str(tmpdir.join('*.zip/2014/*'))) == [
+        archive + '/2014/c.fit']
+    assert validate_filenames(archive + '/missing.fit') == []
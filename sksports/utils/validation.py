@@ -4,10 +4,59 @@
 #          Cedric Lemaitre
 # License: MIT
 
+import fnmatch
 import glob
 import os
+import zipfile
 from itertools import chain
 
+# separator between a zip archive and the path of one of its members
+ZIP_SEPARATOR = '.zip/'
+
+
+def split_zip_member(filename):
+    """Split the path to a member of a zip archive.
+
+    Parameters
+    ----------
+    filename : str
+        The path to a file or to a member of a zip archive written as
+        ``'archive.zip/member'``.
+
+    Returns
+    -------
+    filename : str
+        The path to the file or to the zip archive.
+
+    member : str or None
+        The path of the member in the archive or None if ``filename`` is not
+        a path to a member of a zip archive.
+
+    """
+    idx = filename.lower().find(ZIP_SEPARATOR)
+    if idx == -1:
+        return filename, None
+    return (filename[:idx + len(ZIP_SEPARATOR) - 1],
+            filename[idx + len(ZIP_SEPARATOR):])
+
+
+def _glob(pattern):
+    """Expand the wildcards of a path, including in the members of zip
+    archives."""
+    pattern, member = split_zip_member(os.path.expanduser(pattern))
+    if member is None:
+        return sorted(glob.glob(pattern))
+    filenames = []
+    for archive in sorted(glob.glob(pattern)):
+        with zipfile.ZipFile(archive) as zip_file:
+            # as with glob, the wildcards do not match across directories
+            members = [name for name in fnmatch.filter(zip_file.namelist(),
+                                                       member)
+                       if name.count('/') == member.count('/')]
+        filenames += ['{}/{}'.format(archive, member)
+                      for member in sorted(members)]
+    return filenames
+
 
 def validate_filenames(filenames):
     """Check the filenames and expand in the case of wildcard.
@@ -20,7 +69,9 @@ def validate_filenames(filenames):
 
         * a filename or a list of filename to the file to read;
         * a filename or a list of filename containing a wildcard
-          (e.g. ``'./data/*.fit'``).
+          (e.g. ``'./data/*.fit'``);
+        * a member of a zip archive written as ``'archive.zip/member'``,
+          possibly with wildcards (e.g. ``'./data/*.zip/*.fit'``).
 
     Returns
     -------
@@ -37,7 +88,6 @@ def validate_filenames(filenames):
 
     """
     if isinstance(filenames, list):
-        return chain.from_iterable([sorted(glob.glob(os.path.expanduser(f)))
-                                    for f in filenames])
+        return chain.from_iterable([_glob(f) for f in filenames])
     else:
-        return sorted(glob.glob(os.path.expanduser(filenames)))
+        return _glob(filenames)